@@ -219,13 +219,21 @@ def start_session(run_id=None):
     return None, {"run_id": run_id}
 
 
-def merge_artifacts(old_artifacts, artifacts):
+def merge_artifacts(old_artifacts, artifacts, changed_tests=None):
     """
     This is extremely important and merges the old_Artifacts from a composite-uncollect build
     with the new artifacts for this run
+
+    When ``changed_tests`` (a list of test idents) is passed, only the artifacts of those tests
+    are merged, which keeps the periodic report builds cheap on long runs.
     """
-    old_artifacts.update(artifacts)
-    return {"old_artifacts": old_artifacts}, None
+    if changed_tests is None:
+        old_artifacts.update(artifacts)
+        return {"old_artifacts": old_artifacts}, None
+    updates = {ident: artifacts[ident] for ident in changed_tests if ident in artifacts}
+    old_artifacts.update(updates)
+    # old_artifacts is the global dict itself, so it is already up to date
+    return None, None
 
 
 def parse_setup_dir(test_name, test_location, artifactor_config, artifact_dir, run_id):
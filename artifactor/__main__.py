@@ -5,7 +5,8 @@ import bottle
 import click
 
 from artifactor import Artifactor, initialize
-from artifactor.plugins import filedump, logger, merkyl, ostriz, post_result, reporter, video
+from artifactor.plugins import (
+    filedump, logger, merkyl, nav_timing, ostriz, post_result, reporter, video)
 from cfme.utils.conf import env
 from cfme.utils.net import random_port
 from cfme.utils.path import log_path
@@ -31,6 +32,7 @@ def run(port, run_id=None):
     art.register_plugin(reporter.Reporter, "reporter")
     art.register_plugin(post_result.PostResult, "post-result")
     art.register_plugin(ostriz.Ostriz, "ostriz")
+    art.register_plugin(nav_timing.NavTiming, "nav-timing")
 
     initialize(art)
 
@@ -41,6 +43,7 @@ def run(port, run_id=None):
     art.configure_plugin("reporter")
     art.configure_plugin("post-result")
     art.configure_plugin("ostriz")
+    art.configure_plugin("nav-timing")
     art.fire_hook("start_session", run_id=run_id)
 
     # Stash this where slaves can find it
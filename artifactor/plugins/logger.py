@@ -15,7 +15,7 @@ import os
 from logging import makeLogRecord
 
 from artifactor import ArtifactorBasePlugin
-from cfme.utils.log import make_file_handler
+from cfme.utils.log import make_file_handler, unpack_log_records
 
 
 class Logger(ArtifactorBasePlugin):
@@ -34,6 +34,7 @@ class Logger(ArtifactorBasePlugin):
         self.register_plugin_hook("start_test", self.start_test)
         self.register_plugin_hook("finish_test", self.finish_test)
         self.register_plugin_hook("log_message", self.log_message)
+        self.register_plugin_hook("log_batch", self.log_batch)
 
     def configure(self):
         self.configured = True
@@ -86,10 +87,21 @@ class Logger(ArtifactorBasePlugin):
         # json transport fallout: args must be a dict or a tuple, json makes a tuple into a list
         args = log_record["args"]
         log_record["args"] = tuple(args) if isinstance(args, list) else args
-        record = makeLogRecord(log_record)
+        self._handle_records([makeLogRecord(log_record)], slaveid)
+
+    @ArtifactorBasePlugin.check_configured
+    def log_batch(self, records, slaveid):
+        """Write a batch of records packed by :py:func:`cfme.utils.log.pack_log_records`"""
+        self._handle_records(unpack_log_records(records), slaveid)
+
+    def _handle_records(self, records, slaveid):
         if not slaveid:
             slaveid = "Master"
-        if slaveid in self.store:
-            handler = self.store[slaveid].handler
-            if handler and record.levelno >= handler.level:
+        if slaveid not in self.store:
+            return
+        handler = self.store[slaveid].handler
+        if not handler:
+            return
+        for record in records:
+            if record.levelno >= handler.level:
                 handler.handle(record)
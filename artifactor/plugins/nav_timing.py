@@ -0,0 +1,45 @@
+""" Navigation timing plugin for Artifactor
+
+Add a stanza to the artifactor config like this,
+artifactor:
+    log_dir: /home/username/outdir
+    plugins:
+        nav-timing:
+            enabled: True
+            plugin: nav_timing
+
+Merges the navigation timings of all test processes and writes them to ``nav_timings.json``
+and ``nav_timings.csv`` in ``log_dir`` when the session finishes.
+"""
+import json
+import os
+
+from artifactor import ArtifactorBasePlugin
+from cfme.utils.nav_timing import NavigationTimings
+
+
+class NavTiming(ArtifactorBasePlugin):
+    def plugin_initialize(self):
+        self.register_plugin_hook("nav_timings", self.nav_timings)
+        self.register_plugin_hook("finish_session", self.write_timings)
+
+    def configure(self):
+        self.configured = True
+
+    @ArtifactorBasePlugin.check_configured
+    def nav_timings(self, slaveid, timings):
+        if not slaveid:
+            slaveid = "Master"
+        self.store[slaveid] = timings
+
+    @ArtifactorBasePlugin.check_configured
+    def write_timings(self, log_dir):
+        if not self.store:
+            return
+        merged = NavigationTimings()
+        for timings in self.store.values():
+            merged.merge(NavigationTimings.from_dict(timings))
+        with open(os.path.join(log_dir, "nav_timings.json"), "w") as f:
+            json.dump(merged.to_dict(), f, indent=2, sort_keys=True)
+        with open(os.path.join(log_dir, "nav_timings.csv"), "w") as f:
+            merged.write_csv(f)
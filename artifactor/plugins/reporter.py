@@ -11,10 +11,19 @@ artifactor:
             enabled: True
             plugin: reporter
             only_failed: False #Only show faled tests in the report
+            artifact_store: True #Append finished tests to artifacts.jsonl in log_dir
+
+Finished tests are processed only once and their report data are reused by the following
+report builds, so rebuilding the report during the run only processes the tests that changed.
+The reports are streamed to the files as they are rendered.
+
+The ``artifacts.jsonl`` file written by the artifact store contains one line per finished test,
+see :py:class:`ArtifactStore`.
 """
 import csv
 import datetime
 import difflib
+import json
 import math
 import os
 import re
@@ -42,6 +51,16 @@ _tests_tpl = {
 URL = re.compile(r"https?://[^/\s]+(?:/[^/\s?]+)*/?(?:\?(?:[^&\s=]+(?:=[^&\s]+)?&?)*)?")
 
 
+COLORS = {
+    "passed": "success",
+    "failed": "warning",
+    "error": "danger",
+    "xpassed": "danger",
+    "xfailed": "success",
+    "skipped": "info",
+}
+
+
 def overall_test_status(statuses):
     # Handle some logic for when to count certain tests as which state
     for when, status in statuses.items():
@@ -58,7 +77,48 @@ def overall_test_status(statuses):
     return "passed"
 
 
+class ArtifactStore(object):
+    """Append-only, line-delimited JSON store of the test artifacts
+
+    Every line holds the artifacts of one test as they were when the test finished. When a test
+    is stored multiple times, the last line wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, test_ident, artifacts):
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"test": test_ident, "artifacts": artifacts}, default=str))
+            f.write("\n")
+
+
+def _test_fingerprint(test):
+    """Cheap summary of the test artifacts that changes whenever the report data would change"""
+    return (
+        test.get("finish_time"),
+        len(test.get("files", [])),
+        tuple(sorted((when, tuple(status)) for when, status in test["statuses"].items()
+                     if when != "overall")),
+        bool(test.get("skipped")),
+        bool(test.get("old")),
+    )
+
+
 class ReporterBase(object):
+    @property
+    def processed_tests(self):
+        """Cache of ``test_name: (fingerprint, test_data)`` of already finished tests"""
+        if not hasattr(self, "_processed_tests"):
+            self._processed_tests = {}
+        return self._processed_tests
+
+    @property
+    def template_env(self):
+        if not hasattr(self, "_template_env"):
+            self._template_env = Environment(loader=FileSystemLoader(template_path.strpath))
+        return self._template_env
+
     def _run_report(self, old_artifacts, artifact_dir, version=None, fw_version=None):
         template_data = self.process_data(old_artifacts, artifact_dir, version, fw_version)
 
@@ -80,15 +140,107 @@ class ReporterBase(object):
             )
 
     def render_report(self, report, filename, log_dir, template):
-        template_env = Environment(loader=FileSystemLoader(template_path.strpath))
-        data = template_env.get_template(template).render(**report)
-
-        with open(os.path.join(log_dir, "{}.html".format(filename)), "w") as f:
-            f.write(data)
-        try:
-            shutil.copytree(template_path.join("dist").strpath, os.path.join(log_dir, "dist"))
-        except OSError:
-            pass
+        # Stream the rendered report to a temporary file, so the readers of the report never see
+        # it half-written and the whole page never has to be held in memory.
+        report_path = os.path.join(log_dir, "{}.html".format(filename))
+        tmp_report_path = "{}.tmp".format(report_path)
+        self.template_env.get_template(template).stream(**report).dump(tmp_report_path)
+        os.rename(tmp_report_path, report_path)
+        dist_dir = os.path.join(log_dir, "dist")
+        if not os.path.exists(dist_dir):
+            try:
+                shutil.copytree(template_path.join("dist").strpath, dist_dir)
+            except OSError:
+                pass
+
+    def process_test(self, test_name, test, log_dir):
+        """Turn the artifacts of a single test into the data used by the report template"""
+        overall_status = test["statuses"]["overall"]
+        test_data = {
+            "name": test_name,
+            "outcomes": test["statuses"],
+            "slaveid": test.get("slaveid", "Unknown"),
+            "color": COLORS[overall_status],
+        }
+        if "composite" in test:
+            test_data["composite"] = test["composite"]
+
+        if "skipped" in test:
+            if test["skipped"].get("type") == "provider":
+                test_data["skip_provider"] = test["skipped"].get("reason")
+            if test["skipped"].get("type") == "blocker":
+                test_data["skip_blocker"] = test["skipped"].get("reason")
+
+        if "skip_blocker" in test_data:
+            # Fix the inconveniently long list of repeated blockers until we sort out sets
+            # in riggerlib somehow.
+            test_data["skip_blocker"] = sorted(set(test_data["skip_blocker"]))
+
+        if test.get("old", False):
+            test_data["old"] = True
+
+        if test.get("start_time"):
+            if test.get("finish_time"):
+                test_data["in_progress"] = False
+                test_data["duration"] = test["finish_time"] - test["start_time"]
+            else:
+                test_data["duration"] = time.time() - test["start_time"]
+                test_data["in_progress"] = True
+
+        # Set up destinations for the files
+        test_data["file_groups"] = []
+        test_data["qa_contact"] = []
+        processed_groups = {}
+        order = 0
+        for file_dict in test.get("files", []):
+            group = file_dict["group_id"]
+            if group not in processed_groups:
+                processed_groups[group] = (order, [])
+                order += 1
+            processed_groups[group][-1].append(file_dict)
+        # Current structure:
+        # {groupid: (group_order, [{filedict1}, {filedict2}])}
+        # Sorting by group_order
+        processed_groups = sorted(processed_groups.items(), key=lambda kv: kv[1][0])
+        # And now make it [(groupid, [{filedict1}, {filedict2}, ...])]
+        processed_groups = [(group_name, files) for group_name, (_, files) in processed_groups]
+        for group_name, file_dicts in processed_groups:
+            group_file_list = []
+            for file_dict in file_dicts:
+                if file_dict["file_type"] == "qa_contact":
+                    with open(file_dict["os_filename"], "rb") as qafile:
+                        qareader = csv.reader(qafile, delimiter=",", quotechar='"')
+                        for qacontact in qareader:
+                            test_data["qa_contact"].append(qacontact)
+                    continue  # Do not store, handled a different way :)
+                elif file_dict["file_type"] == "short_tb":
+                    with open(file_dict["os_filename"], "r") as short_tb:
+                        test_data["short_tb"] = short_tb.read()
+                    continue
+                file_dict["filename"] = file_dict["os_filename"].replace(log_dir, "")
+                group_file_list.append(file_dict)
+
+            test_data["file_groups"].append((group_name, group_file_list))
+        # Snd remove groups that are left empty because of eg. traceback or qa contact
+        test_data["file_groups"] = [
+            group for group in test_data["file_groups"] if len(group[1]) > 0]
+        if "short_tb" in test_data and test_data["short_tb"]:
+            urls = [url for url in URL.findall(test_data["short_tb"])]
+            if urls:
+                test_data["urls"] = urls
+        return test_data
+
+    def cached_process_test(self, test_name, test, log_dir):
+        """Return the report data of the test, finished tests are processed only once"""
+        if not test.get("finish_time"):
+            # The duration of running tests changes all the time
+            return self.process_test(test_name, test, log_dir)
+        fingerprint = _test_fingerprint(test)
+        cached = self.processed_tests.get(test_name)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, self.process_test(test_name, test, log_dir))
+            self.processed_tests[test_name] = cached
+        return cached[1]
 
     def process_data(self, artifacts, log_dir, version, fw_version, name_filter=None):
         tb_errors = []
@@ -107,14 +259,6 @@ class ReporterBase(object):
             "xfailed": 0,
             "xpassed": 0,
         }
-        colors = {
-            "passed": "success",
-            "failed": "warning",
-            "error": "danger",
-            "xpassed": "danger",
-            "xfailed": "success",
-            "skipped": "info",
-        }
         # Iterate through the tests and process the counts and durations
         for test_name, test in artifacts.items():
             if not test.get("statuses"):
@@ -123,87 +267,17 @@ class ReporterBase(object):
             counts[overall_status] += 1
             if not test.get("old", False):
                 current_counts[overall_status] += 1
-            color = colors[overall_status]
             # This was removed previously but is needed as the overall is not generated
             # until the test finishes. So this is here as a shim.
             test["statuses"]["overall"] = overall_status
-            test_data = {
-                "name": test_name,
-                "outcomes": test["statuses"],
-                "slaveid": test.get("slaveid", "Unknown"),
-                "color": color,
-            }
-            if "composite" in test:
-                test_data["composite"] = test["composite"]
-
-            if "skipped" in test:
-                if test["skipped"].get("type") == "provider":
-                    provider_skip_count += 1
-                    test_data["skip_provider"] = test["skipped"].get("reason")
-                if test["skipped"].get("type") == "blocker":
-                    blocker_skip_count += 1
-                    test_data["skip_blocker"] = test["skipped"].get("reason")
-
+            test_data = self.cached_process_test(test_name, test, log_dir)
+            if "skip_provider" in test_data:
+                provider_skip_count += 1
             if "skip_blocker" in test_data:
-                # Fix the inconveniently long list of repeated blockers until we sort out sets
-                # in riggerlib somehow.
-                test_data["skip_blocker"] = sorted(set(test_data["skip_blocker"]))
-
-            if test.get("old", False):
-                test_data["old"] = True
-
-            if test.get("start_time"):
-                if test.get("finish_time"):
-                    test_data["in_progress"] = False
-                    test_data["duration"] = test["finish_time"] - test["start_time"]
-                else:
-                    test_data["duration"] = time.time() - test["start_time"]
-                    test_data["in_progress"] = True
-
-            # Set up destinations for the files
-            test_data["file_groups"] = []
-            test_data["qa_contact"] = []
-            processed_groups = {}
-            order = 0
-            for file_dict in test.get("files", []):
-                group = file_dict["group_id"]
-                if group not in processed_groups:
-                    processed_groups[group] = (order, [])
-                    order += 1
-                processed_groups[group][-1].append(file_dict)
-            # Current structure:
-            # {groupid: (group_order, [{filedict1}, {filedict2}])}
-            # Sorting by group_order
-            processed_groups = sorted(processed_groups.items(), key=lambda kv: kv[1][0])
-            # And now make it [(groupid, [{filedict1}, {filedict2}, ...])]
-            processed_groups = [(group_name, files) for group_name, (_, files) in processed_groups]
-            for group_name, file_dicts in processed_groups:
-                group_file_list = []
-                for file_dict in file_dicts:
-                    if file_dict["file_type"] == "qa_contact":
-                        with open(file_dict["os_filename"], "rb") as qafile:
-                            qareader = csv.reader(qafile, delimiter=",", quotechar='"')
-                            for qacontact in qareader:
-                                test_data["qa_contact"].append(qacontact)
-                                if qacontact[0] not in template_data["qa"]:
-                                    template_data["qa"].append(qacontact[0])
-                        continue  # Do not store, handled a different way :)
-                    elif file_dict["file_type"] == "short_tb":
-                        with open(file_dict["os_filename"], "r") as short_tb:
-                            test_data["short_tb"] = short_tb.read()
-                        continue
-                    file_dict["filename"] = file_dict["os_filename"].replace(log_dir, "")
-                    group_file_list.append(file_dict)
-
-                test_data["file_groups"].append((group_name, group_file_list))
-            # Snd remove groups that are left empty because of eg. traceback or qa contact
-            test_data["file_groups"] = filter(
-                lambda group: len(group[1]) > 0, test_data["file_groups"]
-            )
-            if "short_tb" in test_data and test_data["short_tb"]:
-                urls = [url for url in URL.findall(test_data["short_tb"])]
-                if urls:
-                    test_data["urls"] = urls
+                blocker_skip_count += 1
+            for qacontact in test_data["qa_contact"]:
+                if qacontact[0] not in template_data["qa"]:
+                    template_data["qa"].append(qacontact[0])
             template_data["tests"].append(test_data)
         template_data["top10"] = self.top10(tb_errors)
         template_data["counts"] = counts
@@ -228,9 +302,12 @@ class ReporterBase(object):
 
         template_data["ndata"] = self.build_li(tests)
 
-        for test in template_data["tests"]:
-            if test.get("duration"):
-                test["duration"] = str(datetime.timedelta(seconds=math.ceil(test["duration"])))
+        # The cached test data keep the numeric duration, format it on copies
+        template_data["tests"] = [
+            dict(test, duration=str(datetime.timedelta(seconds=math.ceil(test["duration"]))))
+            if test.get("duration") else test
+            for test in template_data["tests"]
+        ]
 
         return template_data
 
@@ -358,6 +435,7 @@ class Reporter(ArtifactorBasePlugin, ReporterBase):
 
     def configure(self):
         self.only_failed = self.data.get("only_failed", False)
+        self.use_artifact_store = self.data.get("artifact_store", True)
         self.configured = True
 
     @ArtifactorBasePlugin.check_configured
@@ -402,21 +480,19 @@ class Reporter(ArtifactorBasePlugin, ReporterBase):
         )
 
     @ArtifactorBasePlugin.check_configured
-    def finish_test(self, artifacts, test_location, test_name, slaveid):
+    def finish_test(self, artifacts, test_location, test_name, slaveid, log_dir):
         test_ident = "{}/{}".format(test_location, test_name)
         overall_status = overall_test_status(artifacts[test_ident]["statuses"])
-        return (
-            None,
-            {
-                "artifacts": {
-                    test_ident: {
-                        "finish_time": time.time(),
-                        "slaveid": slaveid,
-                        "statuses": {"overall": overall_status},
-                    }
-                }
-            },
-        )
+        finish_data = {
+            "finish_time": time.time(),
+            "slaveid": slaveid,
+            "statuses": {"overall": overall_status},
+        }
+        if self.use_artifact_store:
+            stored = dict(artifacts[test_ident], **finish_data)
+            stored["statuses"] = dict(artifacts[test_ident]["statuses"], overall=overall_status)
+            ArtifactStore(os.path.join(log_dir, "artifacts.jsonl")).append(test_ident, stored)
+        return None, {"artifacts": {test_ident: finish_data}}
 
     @ArtifactorBasePlugin.check_configured
     def report_test(
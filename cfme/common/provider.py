@@ -1,7 +1,9 @@
 import datetime
-from collections import Iterable, defaultdict
+import time
+from collections import Iterable
 
 import attr
+import dateutil.parser
 from manageiq_client.api import APIException
 from widgetastic.widget import View, Text
 from widgetastic_patternfly import Button, Input
@@ -15,8 +17,10 @@ from cfme.modeling.base import BaseEntity
 from cfme.utils import ParamClassName, conf
 from cfme.utils.appliance import Navigatable
 from cfme.utils.appliance.implementations.ui import navigate_to, navigator
+from cfme.utils.entry_points import registry
 from cfme.utils.log import logger
 from cfme.utils.net import resolve_hostname
+from cfme.utils.rest import RestInventory
 from cfme.utils.stats import tol_check
 from cfme.utils.update import Updateable
 from cfme.utils.varmeth import variable
@@ -24,39 +28,21 @@ from cfme.utils.version import VersionPicker
 from cfme.utils.wait import wait_for, RefreshTimer
 
 
-_base_types_cache = {}
-_provider_types_cache = defaultdict(dict)
-_all_types_cache = {}
-
-
 # TODO: Move to collection when it happens
 def base_types():
-    from pkg_resources import iter_entry_points
-    if not _base_types_cache:
-        _base_types_cache.update({
-            ep.name: ep.resolve() for ep in iter_entry_points('manageiq.provider_categories')
-        })
-    return _base_types_cache
+    return registry('manageiq.provider_categories')
 
 
 # TODO: Move to collection when it happens
 def provider_types(category):
-    from pkg_resources import iter_entry_points
-    if category not in _provider_types_cache:
-        _provider_types_cache[category] = {
-            ep.name: ep.resolve() for ep in iter_entry_points(
-                'manageiq.provider_types.{}'.format(category))
-        }
-    return _provider_types_cache[category]
+    return registry('manageiq.provider_types.{}'.format(category))
 
 
 # TODO: Move to collection when it happens
 def all_types():
-    if not _all_types_cache:
-        _all_types_cache.update(base_types())
-        for category in list(_all_types_cache):
-            _all_types_cache.update(provider_types(category))
-    return _all_types_cache
+    # the category names come from the entry point metadata, nothing gets imported here
+    groups = ['manageiq.provider_types.{}'.format(category) for category in sorted(base_types())]
+    return registry('manageiq.provider_categories', *groups)
 
 
 # TODO: Move to collection when it happens
@@ -78,6 +64,99 @@ def prepare_endpoints(endpoints):
         raise ValueError("Endpoints should be either dict or endpoint class")
 
 
+class RefreshWatcher(object):
+    """Watches a refresh of the provider's relationships and tells when it is finished
+
+    The provider is looked up in the REST API only once, then just its refresh attributes are
+    queried. A refresh started by :py:meth:`refresh` is followed through its tasks, so the watcher
+    knows the refresh finished as soon as the appliance does. The time of the appliance is read
+    only once too, the local clock advances it.
+
+    Args:
+        provider: The provider to watch
+        refresh_delta: How old (in seconds) the last refresh can be to count as finished
+    """
+    REFRESH_ATTRIBUTES = ('last_refresh_date', 'last_refresh_error')
+
+    def __init__(self, provider, refresh_delta=600):
+        self.provider = provider
+        self.refresh_delta = refresh_delta
+        self.refreshes = 0
+        self.last_refresh_date = None
+        self.last_refresh_error = None
+        self._entity = None
+        self._tasks = []
+        self._clock = None
+
+    @property
+    def entity(self):
+        if self._entity is None:
+            self._entity = self.provider.appliance.rest_api.collections.providers.get(
+                name=self.provider.name)
+        return self._entity
+
+    def appliance_time(self):
+        if self._clock is None:
+            self._clock = self.provider.appliance.utc_time(), time.time()
+        appliance_time, local_time = self._clock
+        return appliance_time + datetime.timedelta(seconds=time.time() - local_time)
+
+    def refresh(self):
+        """Start a refresh, its tasks are followed when the appliance returns them"""
+        logger.debug('Refreshing provider relationships')
+        rest_api = self.provider.appliance.rest_api
+        self.entity.action.refresh()
+        # the action result links the provider, the ids of the tasks are only in the response
+        result = rest_api.response.json()
+        task_ids = result.get('task_ids') or filter(None, [result.get('task_id')])
+        self._tasks = [rest_api.get_entity('tasks', task_id) for task_id in task_ids]
+        self.refreshes += 1
+
+    @property
+    def task_finished(self):
+        """Whether the tasks of the last refresh are finished, ``None`` if there are no tasks"""
+        if not self._tasks:
+            return None
+        for task in self._tasks:
+            task.reload()
+        return all(getattr(task, 'state', '').lower() == 'finished' for task in self._tasks)
+
+    def is_refreshed(self):
+        if self.task_finished is False:
+            return False
+        data = self.provider.appliance.rest_api.get(
+            self.entity.href, attributes=','.join(self.REFRESH_ATTRIBUTES))
+        self.last_refresh_error = data.get('last_refresh_error')
+        if not data.get('last_refresh_date'):
+            # never refreshed yet, the first refresh is on its way
+            return False
+        self.last_refresh_date = dateutil.parser.parse(data['last_refresh_date'])
+        return (self.appliance_time() - self.last_refresh_date <=
+                datetime.timedelta(seconds=self.refresh_delta))
+
+    def wait(self, num_sec=1000, delay=5, refresh_every=300):
+        """Wait until the provider is refreshed, starting refreshes when needed
+
+        A new refresh is started when the last one is too old and either no refresh was started
+        yet or the task of the started one finished without refreshing the provider. It is also
+        started every ``refresh_every`` seconds while the provider is not refreshed.
+        """
+        refresh_timer = RefreshTimer(time_for_refresh=refresh_every)
+
+        def _refreshed():
+            if self.is_refreshed():
+                return True
+            stale = self.last_refresh_date is not None and (
+                not self.refreshes or self.task_finished)
+            if stale or refresh_timer.is_it_time():
+                self.refresh()
+                refresh_timer.reset()
+            return False
+
+        return wait_for(_refreshed, message="is_refreshed", num_sec=num_sec, delay=delay,
+                        handle_exception=True)
+
+
 @attr.s(hash=False)
 class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
     # List of constants that every non-abstract subclass must have defined
@@ -88,6 +167,11 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
     _param_name = ParamClassName('name')
     STATS_TO_MATCH = []
     db_types = ["Providers"]
+    # attributes loaded to the REST inventories, see rest_inventory
+    REST_INVENTORY_ATTRIBUTES = {
+        'vms': ('name', 'type', 'guid', 'ems_id'),
+        'templates': ('name', 'type', 'guid', 'ems_id'),
+    }
     ems_events = []
     settings_key = None
     vm_class = None  # Set on type specific provider classes for VM/instance class
@@ -603,22 +687,17 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
             return True
 
     def validate(self):
-        refresh_timer = RefreshTimer(time_for_refresh=300)
+        watcher = RefreshWatcher(self)
         try:
-            wait_for(self.is_refreshed,
-                     [refresh_timer],
-                     message="is_refreshed",
-                     num_sec=1000,
-                     delay=60,
-                     handle_exception=True)
+            watcher.wait(num_sec=1000)
         except Exception:
             # To see the possible error.
             self.load_details(refresh=True)
             raise
         else:
-            if self.last_refresh_error() is not None:
+            if watcher.last_refresh_error is not None:
                 raise AddProviderError("Cannot validate the provider. Error occured: {}".format(
-                                       self.last_refresh_error()))
+                                       watcher.last_refresh_error))
 
     def validate_stats(self, ui=False):
         """ Validates that the detail page matches the Providers information.
@@ -627,28 +706,39 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         a set of statistics to be matched against the UI. The details page is then refreshed
         continuously until the matching of all items is complete. A error will be raised
         if the match is not complete within a certain defined time period.
+
+        The provider's statistics are collected only once, only the appliance side is checked
+        again. The refresh is followed by :py:class:`RefreshWatcher` when it is started through
+        the REST API, so the statistics are compared as soon as it finishes.
         """
 
         # If we're not using db, make sure we are on the provider detail page
         if ui:
             self.load_details()
 
+        host_stats = self.mgmt.stats(*self.STATS_TO_MATCH)
         # Initial bullet check
-        if self._do_stats_match(self.mgmt, self.STATS_TO_MATCH, ui=ui):
+        if self._do_stats_match(self.mgmt, self.STATS_TO_MATCH, ui=ui, host_stats=host_stats):
             self.mgmt.disconnect()
             return
         else:
             # Set off a Refresh Relationships
-            method = 'ui' if ui else None
-            self.refresh_provider_relationships(method=method)
+            if ui:
+                self.refresh_provider_relationships(method='ui')
+            else:
+                watcher = RefreshWatcher(self, refresh_delta=0)
+                watcher.refresh()
+                if watcher.task_finished is not None:
+                    wait_for(lambda: watcher.task_finished, message="refresh task finished",
+                             num_sec=1000, delay=5)
 
             refresh_timer = RefreshTimer(time_for_refresh=300)
             wait_for(self._do_stats_match,
                      [self.mgmt, self.STATS_TO_MATCH, refresh_timer],
-                     {'ui': ui},
+                     {'ui': ui, 'host_stats': host_stats},
                      message="do_stats_match_db",
                      num_sec=1000,
-                     delay=60)
+                     delay=15)
 
         self.mgmt.disconnect()
 
@@ -704,7 +794,8 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
             "AND ext_management_systems.name='{1}'".format(table_str, self.name))
         return int(res.first()[0])
 
-    def _do_stats_match(self, client, stats_to_match=None, refresh_timer=None, ui=False):
+    def _do_stats_match(self, client, stats_to_match=None, refresh_timer=None, ui=False,
+                        host_stats=None):
         """ A private function to match a set of statistics, with a Provider.
 
         This function checks if the list of stats match, if not, the page is refreshed.
@@ -715,12 +806,15 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         Args:
             client: A provider mgmt_system instance.
             stats_to_match: A list of key/attribute names to match.
+            host_stats: Already collected statistics of the provider, collected by the client
+                when not given.
 
         Raises:
             KeyError: If the host stats does not contain the specified key.
             ProviderHasNoProperty: If the provider does not have the property defined.
         """
-        host_stats = client.stats(*stats_to_match)
+        if host_stats is None:
+            host_stats = client.stats(*stats_to_match)
         method = None
         if ui:
             self.browser.selenium.refresh()
@@ -993,15 +1087,30 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         template_details['guid'] = template.guid
         return template_details
 
+    def rest_inventory(self, collection_name, refresh=False):
+        """Returns the :py:class:`cfme.utils.rest.RestInventory` of a REST collection
+
+        The inventory is loaded once and kept with the provider object, use ``refresh`` to load
+        it again.
+        """
+        inventories = self.__dict__.setdefault('_rest_inventories', {})
+        if collection_name not in inventories:
+            inventories[collection_name] = RestInventory(
+                getattr(self.appliance.rest_api.collections, collection_name),
+                attributes=self.REST_INVENTORY_ATTRIBUTES.get(
+                    collection_name, RestInventory.INDEXED))
+        elif refresh:
+            inventories[collection_name].refresh()
+        return inventories[collection_name]
+
     def get_all_template_details(self):
         """
         Returns a dictionary mapping template ids to their name, type, and guid
         """
         # TODO: Move to TemplateCollection.all
-        all_details = {}
-        for id in self.get_all_template_ids():
-            all_details[id] = self.get_template_details(id)
-        return all_details
+        return {
+            template['id']: {key: template[key] for key in ('name', 'type', 'guid')}
+            for template in self.rest_inventory('templates', refresh=True).resources}
 
     def get_vm_id(self, vm_name):
         """
@@ -1009,26 +1118,21 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         """
         # TODO: Get Provider object from VMCollection.find, then use VM.id to get the id
         logger.debug('Retrieving the ID for VM: {}'.format(vm_name))
-        for vm_id in self.get_all_vm_ids():
-            details = self.get_vm_details(vm_id)
-            if details['name'] == vm_name:
-                return vm_id
+        return self.get_vm_ids([vm_name]).get(vm_name)
 
     def get_vm_ids(self, vm_names):
         """
         Returns a dictionary mapping each VM name to it's id
         """
         # TODO: Move to VMCollection.find or VMCollection.all
-        name_list = vm_names[:]
-        logger.debug('Retrieving the IDs for {} VM(s)'.format(len(name_list)))
+        logger.debug('Retrieving the IDs for {} VM(s)'.format(len(vm_names)))
+        # loaded again, VMs may have been added, removed or re-created since the last call
+        inventory = self.rest_inventory('vms', refresh=True)
         id_map = {}
-        for vm_id in self.get_all_vm_ids():
-            if not name_list:
-                break
-            vm_name = self.get_vm_details(vm_id)['name']
-            if vm_name in name_list:
-                id_map[vm_name] = vm_id
-                name_list.remove(vm_name)
+        for vm_name in vm_names:
+            vms = inventory.find(name=vm_name)
+            if vms:
+                id_map[vm_name] = vms[0]['id']
         return id_map
 
     def get_template_guids(self, template_dict):
@@ -1039,16 +1143,12 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
         """
         # TODO: Move to TemplateCollection
         result_list = []
-        all_template_details = self.get_all_template_details()
+        inventory = self.rest_inventory('templates', refresh=True)
         for provider, templates in template_dict.items():
             for template_name in templates:
-                inner_tuple = ()
-                for id in all_template_details:
-                    if ((all_template_details[id]['name'] == template_name) and
-                            (self.db_types[0] in all_template_details[id]['type'])):
-                        inner_tuple += (all_template_details[id]['guid'],)
-                        inner_tuple += (provider,)
-                        result_list.append(inner_tuple)
+                for template in inventory.find(name=template_name):
+                    if self.db_types[0] in (template['type'] or ''):
+                        result_list.append((template['guid'], provider))
         return result_list
 
 
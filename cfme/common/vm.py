@@ -17,6 +17,7 @@ from cfme.services.requests import RequestsView
 from cfme.utils import ParamClassName
 from cfme.utils.appliance.implementations.ui import navigate_to, navigator
 from cfme.utils.blockers import BZ
+from cfme.utils.entry_points import registry
 from cfme.utils.log import logger
 from cfme.utils.pretty import Pretty
 from cfme.utils.rest import assert_response
@@ -29,27 +30,21 @@ from . import PolicyProfileAssignable
 
 
 def base_types(template=False):
-    from pkg_resources import iter_entry_points
     search = "template" if template else "vm"
-    return {
-        ep.name: ep.resolve() for ep in iter_entry_points('manageiq.{}_categories'.format(search))
-    }
+    return registry('manageiq.{}_categories'.format(search))
 
 
 def instance_types(category, template=False):
-    from pkg_resources import iter_entry_points
     search = "template" if template else "vm"
-    return {
-        ep.name: ep.resolve() for ep in iter_entry_points(
-            'manageiq.{}_types.{}'.format(search, category))
-    }
+    return registry('manageiq.{}_types.{}'.format(search, category))
 
 
 def all_types(template=False):
-    all_types = base_types(template)
-    for category in all_types.keys():
-        all_types.update(instance_types(category, template))
-    return all_types
+    search = "template" if template else "vm"
+    groups = [
+        'manageiq.{}_types.{}'.format(search, category)
+        for category in sorted(base_types(template))]
+    return registry('manageiq.{}_categories'.format(search), *groups)
 
 
 class _TemplateMixin(object):
@@ -15,6 +15,7 @@ from contextlib import contextmanager
 import pytest
 
 from cfme.utils.version import get_stream
+from cfme.test_framework.appliance_police import stop_health_monitor
 from cfme.test_framework.sprout.client import SproutClient
 
 
@@ -60,6 +61,8 @@ def sprout_appliances(
     try:
         yield apps
     finally:
+        for app in apps:
+            stop_health_monitor(app)
         sprout_client.destroy_pool(request_id)
 
 
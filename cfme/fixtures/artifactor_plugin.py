@@ -9,6 +9,7 @@
         server_address: 127.0.0.1
         server_port: 21212
         server_enabled: True
+        report_interval: 30
         plugins:
 
 ``log_dir`` is the destination for all artifacts
@@ -18,11 +19,17 @@
 ``reuse_dir`` if this is False and Artifactor comes across a dir that has
 already been used, it will die
 
+``report_interval`` the minimal number of seconds between two report builds during the run,
+defaults to 30. The builds happen in the background and only merge the artifacts of the tests
+that changed since the previous build, the full report is always built at the end of the
+session. 0 builds the report after every test phase. Can be overridden with
+``--artifactor-report-interval``.
+
 
 """
 import atexit
 import subprocess
-from threading import RLock
+from threading import Event, Lock, RLock, Thread
 
 import diaper
 import os
@@ -34,7 +41,7 @@ from cfme.markers.polarion import extract_polarion_ids
 from cfme.utils.appliance import find_appliance
 from cfme.utils.blockers import BZ, Blocker
 from cfme.utils.conf import env, credentials
-from cfme.utils.log import logger
+from cfme.utils.log import artifactor_handler, logger
 from cfme.utils.net import random_port, net_check
 from cfme.utils.wait import wait_for
 
@@ -77,6 +84,45 @@ class DummyClient(object):
     __bool__ = __nonzero__
 
 
+class ReportBuilder(Thread):
+    """Fires ``build_report`` in the background, at most once every ``interval`` seconds.
+
+    The tests which reported since the last build are passed along as ``changed_tests``, so the
+    artifactor server only merges their artifacts. Nothing is fired while no test reports.
+
+    The zmq sockets of the artifactor client are thread local, so the builder uses its own
+    client connected to the same server.
+    """
+    def __init__(self, art_client, interval):
+        super(ReportBuilder, self).__init__(name='artifactor-report-builder')
+        self.daemon = True
+        self.interval = interval
+        self.client = ArtifactorClient(art_client.address, art_client.port)
+        self._changed_tests = set()
+        self._lock = Lock()
+        self._stopped = Event()
+
+    def mark_changed(self, test_location, test_name):
+        with self._lock:
+            self._changed_tests.add('{}/{}'.format(test_location, test_name))
+
+    def flush(self):
+        with self._lock:
+            changed_tests, self._changed_tests = self._changed_tests, set()
+        if changed_tests:
+            self.client.fire_hook('build_report', changed_tests=sorted(changed_tests))
+
+    def run(self):
+        self.client.ready = True
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        """Stop the builder, the final full build is left to ``finish_session``."""
+        self._stopped.set()
+        self.join()
+
+
 def get_client(art_config, pytest_config):
     if art_config and not UNDER_TEST:
         port = getattr(pytest_config.option, 'artifactor_port', None) or \
@@ -110,6 +156,10 @@ session_fw_version = None
 def pytest_addoption(parser):
     parser.addoption("--run-id", action="store", default=None,
                      help="A run id to assist in logging")
+    parser.addoption("--artifactor-report-interval", action="store", type=float, default=None,
+                     dest="artifactor_report_interval",
+                     help="Minimal number of seconds between two report builds during the run, "
+                          "0 builds the report after every test phase")
 
 
 @pytest.mark.tryfirst
@@ -133,7 +183,14 @@ def pytest_configure(config):
         art_client.ready = True
     else:
         config._art_proc = None
-    from cfme.utils.log import artifactor_handler
+    config._art_report_builder = None
+    if art_client and not store.slave_manager:
+        interval = config.getoption('artifactor_report_interval')
+        if interval is None:
+            interval = env.get('artifactor', {}).get('report_interval', 30)
+        if interval > 0:
+            config._art_report_builder = ReportBuilder(art_client, interval)
+            config._art_report_builder.start()
     artifactor_handler.artifactor = art_client
     if store.slave_manager:
         artifactor_handler.slaveid = store.slaveid
@@ -217,6 +274,8 @@ def pytest_runtest_protocol(item):
                 blockers.append(Blocker.parse(blocker).url)
     else:
         blockers = []
+    # the logs of the previous test must not end up in the log of this one
+    artifactor_handler.flush()
     fire_art_test_hook(
         item, 'pre_start_test',
         slaveid=store.slaveid, ip=ip)
@@ -231,6 +290,7 @@ def pytest_runtest_teardown(item, nextitem):
     name, location = get_test_idents(item)
     app = find_appliance(item)
     ip = app.hostname
+    artifactor_handler.flush()
     fire_art_test_hook(
         item, 'finish_test',
         slaveid=store.slaveid, ip=ip, wait_for_task=True)
@@ -282,7 +342,11 @@ def pytest_runtest_logreport(report):
         test_xfail=xfail, test_when=report.when,
         test_outcome=report.outcome,
         test_phase_duration=report.duration)
-    fire_art_hook(config, 'build_report')
+    report_builder = getattr(config, '_art_report_builder', None)
+    if report_builder is not None:
+        report_builder.mark_changed(location, name)
+    else:
+        fire_art_hook(config, 'build_report')
 
 
 @pytest.mark.hookwrapper
@@ -301,6 +365,11 @@ def shutdown(config):
             proc = config._art_proc
             if proc and proc.returncode is None:
                 if not store.slave_manager:
+                    report_builder = getattr(config, '_art_report_builder', None)
+                    if report_builder is not None:
+                        report_builder.stop()
+                        config._art_report_builder = None
+                    artifactor_handler.flush()
                     write_line('collecting artifacts')
                     fire_art_hook(config, 'finish_session')
                 fire_art_hook(config, 'teardown_merkyl',
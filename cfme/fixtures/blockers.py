@@ -61,10 +61,23 @@ def pytest_addoption(parser):
                     default=False,
                     dest='list_blockers',
                     help='Specify to list the blockers (takes some time though).')
+    group.addoption('--no-blocker-prefetch',
+                    action='store_false',
+                    default=True,
+                    dest='prefetch_blockers',
+                    help='Do not bulk-load all blockers of the collected tests upfront.')
 
 
 @pytest.mark.trylast
 def pytest_collection_modifyitems(session, config, items):
+    if config.getvalue("prefetch_blockers"):
+        all_blockers = set([])
+        for item in items:
+            all_blockers.update(item._metadata.get("blockers", []))
+        if all_blockers:
+            store.terminalreporter.write(
+                "Prefetching {} blockers ...\n".format(len(all_blockers)), bold=True)
+            Blocker.prefetch(all_blockers)
     if not config.getvalue("list_blockers"):
         return
     store.terminalreporter.write("Loading blockers ...\n", bold=True)
@@ -1,14 +1,133 @@
 # -*- coding: utf-8 -*-
-"""Preloads all templates on all providers that were selected for testing. Useful for test collect.
+"""Loads the templates on the providers selected for testing from trackerbot.
+
+The template lists are fetched per provider and only for the providers that are used:
+
+* the master (or a non-parallelized session) fetches the providers of the collected tests
+  concurrently once the collection is done
+* the lists are stored in the pytest cache, so the slaves read them from there instead of
+  asking trackerbot again
+* lists of providers picked at the test runtime are fetched when they are first needed
+
+Lists older than ``trackerbot.template_cache_ttl`` seconds (one hour by default) are still used,
+but the master fetches them again in the background. With ``--use-template-cache``, cached lists are
+used regardless of their age.
 """
+from concurrent import futures
+from threading import Lock, Thread
+from time import time
+
 import pytest
 
 from cfme.utils import trackerbot
 from cfme.utils.conf import env
-from cfme.utils.providers import list_provider_keys
+from cfme.utils.log import logger
 from cfme.fixtures.pytest_store import store
 
-TEMPLATES = {}
+CACHE_KEY = 'miq-trackerbot/{}'
+DEFAULT_TTL = 3600
+FETCH_WORKERS = 8
+
+
+class ProviderTemplates(object):
+    """Lazily loaded mapping of provider key to the list of template names on the provider
+
+    Evaluates to ``False`` until it is enabled, ie. when there is no trackerbot to load from.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._config = None
+        self._ttl = None
+        self._templates = {}
+        self._refreshing = set()
+        self._lock = Lock()
+
+    def enable(self, config, ttl=DEFAULT_TTL):
+        """Start loading the templates
+
+        Args:
+            config: The pytest config, its cache is shared by all processes of the run
+            ttl: Age in seconds after which a cached list is fetched again in the background,
+                ``None`` to never refresh cached lists
+        """
+        self.enabled = True
+        self._config = config
+        self._ttl = ttl
+
+    def __bool__(self):
+        return self.enabled
+
+    __nonzero__ = __bool__
+
+    def _fetch(self, provider_key):
+        templates = trackerbot.templates_on_provider(trackerbot.api(), provider_key)
+        self._config.cache.set(
+            CACHE_KEY.format(provider_key), {'templates': templates, 'fetched': time()})
+        with self._lock:
+            self._templates[provider_key] = templates
+        return templates
+
+    def _refresh(self, provider_key):
+        try:
+            self._fetch(provider_key)
+        except Exception:
+            logger.exception('Refreshing the templates of %s failed', provider_key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(provider_key)
+
+    def _refresh_in_background(self, provider_key):
+        with self._lock:
+            if provider_key in self._refreshing:
+                return
+            self._refreshing.add(provider_key)
+        thread = Thread(target=self._refresh, args=(provider_key,),
+                        name='templates-{}'.format(provider_key))
+        thread.daemon = True
+        thread.start()
+
+    def _cached(self, provider_key):
+        """Returns the cached list and whether it is stale, ``(None, True)`` if not cached"""
+        entry = self._config.cache.get(CACHE_KEY.format(provider_key), None)
+        if not isinstance(entry, dict):
+            # not cached, or cached in the old format without the timestamp
+            return None, True
+        stale = self._ttl is not None and time() - entry.get('fetched', 0) > self._ttl
+        return entry['templates'], stale
+
+    def load(self, provider_key):
+        """Returns the templates of the provider, fetches them when they are not cached"""
+        with self._lock:
+            if provider_key in self._templates:
+                return self._templates[provider_key]
+        templates, stale = self._cached(provider_key)
+        if templates is None:
+            return self._fetch(provider_key)
+        with self._lock:
+            self._templates.setdefault(provider_key, templates)
+        if stale:
+            self._refresh_in_background(provider_key)
+        return templates
+
+    def get(self, provider_key, default=None):
+        if not self.enabled:
+            return default
+        try:
+            return self.load(provider_key)
+        except Exception:
+            logger.exception('Loading the templates of %s failed', provider_key)
+            return default
+
+    def preload(self, provider_keys):
+        """Load the templates of the providers concurrently, returns the number of templates"""
+        provider_keys = sorted(set(provider_keys))
+        if not provider_keys:
+            return 0
+        with futures.ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(provider_keys))) as e:
+            return sum(len(templates or []) for templates in e.map(self.get, provider_keys))
+
+
+TEMPLATES = ProviderTemplates()
 
 
 @pytest.mark.tryfirst
@@ -27,36 +146,31 @@ def pytest_configure(config):
             if appliance.get('is_dev', False):
                 is_dev = True
     tb_url = trackerbot.conf.get('url')
-    if store.parallelizer_role == 'master' or tb_url is None or is_dev:
+    if tb_url is None or is_dev:
         return
+    if config.getoption('use_template_cache') or store.parallelizer_role == 'slave':
+        # slaves leave refreshing the lists to the master
+        ttl = None
+    else:
+        ttl = trackerbot.conf.get('template_cache_ttl', DEFAULT_TTL)
+    TEMPLATES.enable(config, ttl=ttl)
 
-    # A further optimization here is to make the calls to trackerbot per provider
-    # and perhaps only pull the providers that are needed, however that will need
-    # to ensure that the tests that just randomly use providers adhere to the filters
-    # which may be too tricky right now.
 
-    count = 0
+def _item_providers(items):
+    for item in items:
+        params = getattr(item, 'callspec', None)
+        provider = params.params.get('provider') if params is not None else None
+        if getattr(provider, 'key', None) is not None:
+            yield provider.key
 
-    if not config.getoption('use_template_cache'):
-        store.terminalreporter.line("Loading templates from trackerbot...", green=True)
-        provider_templates = trackerbot.provider_templates(trackerbot.api())
-        for provider in list_provider_keys():
-            TEMPLATES[provider] = provider_templates.get(provider, [])
-            config.cache.set('miq-trackerbot/{}'.format(provider), TEMPLATES[provider])
-            count += len(TEMPLATES[provider])
-    else:
-        store.terminalreporter.line("Using templates from cache...", green=True)
-        provider_templates = None
-        for provider in list_provider_keys():
-            templates = config.cache.get('miq-trackerbot/{}'.format(provider), None)
-            if templates is None:
-                store.terminalreporter.line(
-                    "Loading templates for {} from source as not in cache".format(
-                        provider), green=True)
-                if not provider_templates:
-                    provider_templates = trackerbot.provider_templates(trackerbot.api())
-                templates = provider_templates.get(provider, [])
-                config.cache.set('miq-trackerbot/{}'.format(provider), templates)
-            count += len(templates)
-            TEMPLATES[provider] = templates
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    # slaves read what the master loaded from the cache when they need it
+    if not TEMPLATES or store.parallelizer_role == 'slave':
+        return
+    provider_keys = set(_item_providers(items))
+    store.terminalreporter.line(
+        "Loading templates of {} providers...".format(len(provider_keys)), green=True)
+    count = TEMPLATES.preload(provider_keys)
     store.terminalreporter.line("  Loaded {} templates successfully!".format(count), green=True)
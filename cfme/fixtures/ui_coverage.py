@@ -29,9 +29,9 @@ Note the .resultset.json format is documented in the ruby Coverage libraries doc
 
     http://ruby-doc.org/stdlib-2.1.0/libdoc/coverage/rdoc/Coverage.html
 
-All of the individual process' results are then manually merged (coverage_merger) into one
-big json result, and handed back to simplecov which generates the compiled html
-(for humans) report.
+All of the individual process' results are then merged locally by
+:py:mod:`cfme.utils.coverage_merge` into one big json result that can be handed back to
+simplecov, which generates the compiled html (for humans) report.
 
 Workflow Overview
 -----------------
@@ -45,18 +45,24 @@ Pre-testing (``pytest_configure`` hook):
 3. Install coverage hook (copy ``coverage_hook`` to config/).
 4. Restart EVM to start running coverage on the appliance processes.
 
-Post-testing (``pytest_unconfigure`` hook):
+Post-testing (``pytest_sessionfinish`` hook):
 
 1. Stop EVM, but nicely this time so the coverage atexit hooks run:
    ``systemctl stop evmserverd``
-2. Pull the coverage dir back for parsing and archiving
+2. Every slave (or the standalone session) streams the raw result sets of its appliance over
+   sftp and merges them locally into ``log/coverage/$ip/.resultset.json``
+3. The master (or the standalone session) merges the per-appliance results into
+   ``log/coverage/merged/`` and archives them in ``log/coverage/coverage-results.tgz``
 
-Post-testing (e.g. ci environment): *** This is changing ***
+Post-testing (e.g. ci environment):
 
-1. Use the generated rcov report with the ruby stats plugin to get a coverage graph
-2. Zip up and archive the entire coverage dir for review
+1. Use the merged result set with the sonar scanner to get a coverage graph
+   (``scripts/coverage_report_jenkins.py``)
+2. Archive ``coverage-results.tgz`` for review and aggregation
 """
-import subprocess
+import json
+import tarfile
+from functools import partial
 
 import pytest
 from py.error import ENOENT
@@ -64,11 +70,10 @@ from py.path import local
 
 from cfme.fixtures.pytest_store import store
 from cfme.exceptions import ApplianceVersionException
-from cfme.utils import conf
 from cfme.utils.conf import cfme_data
+from cfme.utils.coverage_merge import CoverageMerger
 from cfme.utils.log import create_sublogger
 from cfme.utils.path import conf_path, log_path, scripts_data_path
-from cfme.utils.quote import quote
 from cfme.utils.version import LATEST, LOWEST, VersionPicker
 
 # paths to all of the coverage-related files
@@ -85,8 +90,8 @@ gemfile = coverage_data.join('coverage_gem.rb')
 bundler_d = rails_root.join('bundler.d')
 coverage_hook_file_name = 'coverage_hook.rb'
 coverage_hook = coverage_data.join(coverage_hook_file_name)
-coverage_merger = coverage_data.join('coverage_merger.rb')
 coverage_output_dir = log_path.join('coverage')
+coverage_merged_dir = coverage_output_dir.join('merged')
 coverage_results_archive = coverage_output_dir.join('coverage-results.tgz')
 coverage_appliance_conf = conf_path.join('.ui-coverage')
 
@@ -126,16 +131,6 @@ class CoverageManager(object):
                 msg='Coverage statistics collection is only supported in appliances >= 5.8',
                 version=self.ipapp.version)
 
-    @property
-    def collection_appliance(self):
-        # if parallelized, this is decided in sessionstart and written to the conf
-        if store.parallelizer_role == 'slave':
-            from cfme.utils.appliance import IPAppliance
-            return IPAppliance.from_url(conf['.ui-coverage']['collection_appliance'])
-        else:
-            # otherwise, coverage only happens on one appliance
-            return store.current_appliance
-
     def print_message(self, message):
         self.log.info(message)
         message = 'coverage: {}'.format(message)
@@ -161,15 +156,8 @@ class CoverageManager(object):
     def merge(self):
         self.print_message('merging reports')
         try:
-            self._retrieve_coverage_reports()
-            # If the appliance runs out of memory, these can take *days* to complete,
-            # so for now we'll just collect the raw coverage data and figure the merging
-            # out later
-            # Edit, 10-Feb-2016:
-            # Currently, the reports are merged using the {stream}-reports job
-            # which utilizes the 'jjb/scripts/stream_reporter.sh' script instead
-            # self._merge_coverage_reports()
-            # self._retrieve_merged_reports()
+            self._merge_coverage_reports()
+            self._archive_coverage_reports()
         except Exception as exc:
             self.log.error('Error merging coverage reports')
             self.log.exception(exc)
@@ -254,46 +242,51 @@ gpgcheck={gpgcheck}
     def _collect_reports(self):
         # restart evm to stop the proccesses and let the simplecov exit hook run
         self.ipapp.ssh_client.run_command('systemctl stop evmserverd')
-        # collect back to the collection appliance if parallelized
-        if store.current_appliance != self.collection_appliance:
-            self.print_message('sending reports to {}'.format(self.collection_appliance.hostname))
-            result = self.ipapp.ssh_client.run_command(
-                'sshpass -p {passwd} '
-                'scp -o StrictHostKeyChecking=no '
-                '-r /var/www/miq/vmdb/coverage/* '
-                '{addr}:/var/www/miq/vmdb/coverage/'.format(
-                    addr=self.collection_appliance.hostname,
-                    passwd=quote(self.ipapp.ssh_client._connect_kwargs['password'])),
-                timeout=1800)
-            if not result:
-                self.print_message('There was an error sending reports: ' + str(result))
-
-    def _retrieve_coverage_reports(self):
-        # Before merging, archive and collect all the raw coverage results
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.run_command('cd /var/www/miq/vmdb/;'
-            'tar czf /tmp/ui-coverage-raw.tgz coverage/')
-        ssh_client.get_file('/tmp/ui-coverage-raw.tgz', coverage_results_archive.strpath)
-
-    def _upload_coverage_merger(self):
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.put_file(coverage_merger.strpath, rails_root.strpath)
+        result = self.ipapp.ssh_client.run_command(
+            'find {} -name .resultset.json'.format(appliance_coverage_root.strpath))
+        remote_resultsets = [path.strip() for path in str(result).splitlines() if path.strip()]
+        if not result or not remote_resultsets:
+            self.print_message('no coverage reports found on {}'.format(self.ipapp.hostname))
+            return
+        # Stream the raw result sets straight into the merger, every worker has its own sftp
+        # channel over the same ssh transport
+        merger = CoverageMerger(logger=self.log)
+        merger.merge_concurrently(
+            [partial(self._load_remote_resultset, path) for path in remote_resultsets],
+            workers=store.config.getoption('ui_coverage_workers'))
+        merger.write(coverage_output_dir.join(self.ipapp.hostname).strpath)
+        self.print_message('merged {} reports from {}'.format(
+            merger.merged_count, self.ipapp.hostname))
+
+    def _load_remote_resultset(self, path):
+        sftp = self.ipapp.ssh_client.open_sftp()
+        try:
+            with sftp.open(path, 'r') as f:
+                f.prefetch()
+                return json.loads(f.read().decode('utf-8'))
+        finally:
+            sftp.close()
 
     def _merge_coverage_reports(self):
-        # run the merger on the appliance to generate the simplecov report
-        # This has been failing, presumably due to oom errors :(
-        self._upload_coverage_merger()
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.run_rails_command(coverage_merger.basename)
-
-    def _retrieve_merged_reports(self):
-        # Now bring the report back (tar it, get it, untar it)
-        ssh_client = self.collection_appliance.ssh_client
-        ssh_client.run_command('cd /var/www/miq/vmdb/coverage;'
-            'tar czf /tmp/ui-coverage-results.tgz merged/')
-        ssh_client.get_file('/tmp/ui-coverage-results.tgz', coverage_results_archive.strpath)
-        subprocess.Popen(['/usr/bin/env', 'tar', '-xaf', coverage_results_archive.strpath,
-            '-C', coverage_output_dir.strpath]).wait()
+        # merge the per-appliance results collected by the slaves (or by ourselves)
+        resultsets = [
+            path.strpath for path in coverage_output_dir.visit('.resultset.json')
+            if coverage_merged_dir not in path.parts()]
+        merger = CoverageMerger(logger=self.log)
+        merger.merge_paths(resultsets, workers=store.config.getoption('ui_coverage_workers'))
+        merger.write(coverage_merged_dir.strpath)
+        global ui_coverage_percent
+        ui_coverage_percent = merger.covered_percent
+        self.print_message('UI coverage result: {}%'.format(ui_coverage_percent))
+
+    def _archive_coverage_reports(self):
+        # Keep the layout of the raw coverage dir, coverage/$ip/.resultset.json,
+        # so the archive can be aggregated with other runs' results later
+        with tarfile.open(coverage_results_archive.strpath, 'w:gz') as archive:
+            for path in coverage_output_dir.visit('.resultset.json'):
+                archive.add(
+                    path.strpath,
+                    arcname=path.relto(coverage_output_dir.dirpath()))
 
 
 class UiCoveragePlugin(object):
@@ -303,15 +296,6 @@ class UiCoveragePlugin(object):
             clean_coverage_dir()
         coverage_appliance_conf.check() and coverage_appliance_conf.remove()
 
-    def pytest_sessionstart(self, session):
-        # master knows all the appliance URLs now, so name the first one as our
-        # report recipient for merging at the end. Need to to write this out to a conf file
-        # since all the slaves are going to use to to know where to ship their reports
-        if store.parallelizer_role == 'master':
-            collection_appliance_address = manager().collection_appliance.hostname
-            conf.runtime['.ui-coverage']['collection_appliance'] = collection_appliance_address
-            conf.save('.ui-coverage')
-
     @pytest.mark.hookwrapper
     def pytest_collection_finish(self):
         yield
@@ -320,7 +304,7 @@ class UiCoveragePlugin(object):
             manager().install()
 
     def pytest_sessionfinish(self, exitstatus):
-        # Now master/standalone needs to move all the reports to an appliance for the source report
+        # Slaves and standalone sessions merge the reports of their own appliance
         if store.parallelizer_role != 'master':
             manager().collect()
 
@@ -328,32 +312,16 @@ class UiCoveragePlugin(object):
         if store.parallelizer_role == 'slave':
             return
 
-        # on master/standalone, merge all the collected reports and bring them back
+        # on master/standalone, merge all the per-appliance reports
         manager().merge()
 
-# TODO
-# When the coverage reporting breaks out, we'll want to have this handy,
-# so I'm commenting it out instead of outright deleting it :)
-#         try:
-#             global ui_coverage_percent
-#             last_run = json.load(log_path.join('coverage', 'merged', '.last_run.json').open())
-#             ui_coverage_percent = last_run['result']['covered_percent']
-#             style = {'bold': True}
-#             if ui_coverage_percent > 40:
-#                 style['green'] = True
-#             else:
-#                 style['red'] = True
-#             store.write_line('UI Coverage Result: {}%'.format(ui_coverage_percent),
-#                 **style)
-#         except Exception as ex:
-#             logger.error('Error printing coverage report to terminal')
-#             logger.exception(ex)
-
 
 def pytest_addoption(parser):
     group = parser.getgroup('cfme')
     group.addoption('--ui-coverage', dest='ui_coverage', action='store_true', default=False,
         help="Enable setup and collection of ui coverage on an appliance")
+    group.addoption('--ui-coverage-workers', dest='ui_coverage_workers', type=int, default=4,
+        help="Number of coverage reports downloaded and merged at the same time")
 
 
 def pytest_cmdline_main(config):
@@ -3,14 +3,16 @@
 import re
 import datetime
 
-from lxml import etree
-
 import pytest
 
 # pylint: disable=no-name-in-module
 from cfme.utils.conf import xunit, cfme_data
+from cfme.utils.deferred_import import deferred_import
 from cfme.utils.pytest_shortcuts import extract_fixtures_values
 
+# only needed with --generate-xmls
+etree = deferred_import('lxml.etree')
+
 
 whitelist = [
     r'cfme/tests/infrastructure/test_quota_tagging.py::test_.*\[.*rhe?v',
@@ -155,7 +155,7 @@ class ReportDetailsView(CloudIntelReportsView):
 
 class SavedReportDetailsView(CloudIntelReportsView):
     title = Text("#explorer_title_text")
-    table = VanillaTable(".//div[@id='report_html_div']/table")
+    table = Table(".//div[@id='report_html_div']/table")
     # PaginationPane() is not working on Report Details page
     # TODO: double check and raise GH to devs
     paginator = PaginationPane()
@@ -470,15 +470,12 @@ class SavedReport(Updateable, BaseEntity):
             headers = tuple([hdr.encode("utf-8") for hdr in view.table.headers])
             body = []
             for _ in view.paginator.pages():
-                for row in view.table.rows():
-                    if not all([c[1].is_displayed for c in row]):
-                        # This is a temporary workaround for cases we have row span
-                        # greater that 1 column (e.g. in case of "Totals: ddd" column).
-                        # TODO: Support this functionality in widgetastic. Issue:
-                        # https://github.com/RedHatQE/widgetastic.core/issues/26
+                for row in view.table.parse():
+                    if len(row) != len(headers):
+                        # Skip the rows with cells spanning several columns
+                        # (e.g. in case of "Totals: ddd" column).
                         continue
-                    row_data = tuple([row[header].text.encode("utf-8") for header in headers])
-                    body.append(row_data)
+                    body.append(tuple([cell.encode("utf-8") for cell in row.cells]))
         except NoSuchElementException:
             # No data found
             return SavedReportData([], [])
@@ -525,17 +522,15 @@ class SavedReportsCollection(BaseCollection):
         results = []
         try:
             for _ in view.saved_reports.paginator.pages():
-                for row in view.saved_reports.table.rows():
-                    if not all([c[1].is_displayed for c in row]):
-                        # This is a temporary workaround for cases we have row span
-                        # greater that 1 column (e.g. in case of "Totals: ddd" column).
-                        # TODO: Support this functionality in widgetastic. Issue:
-                        # https://github.com/RedHatQE/widgetastic.core/issues/26
+                for row in view.saved_reports.table.parse():
+                    if len(row) != len(row.headers):
+                        # Skip the rows with cells spanning several columns
+                        # (e.g. in case of "Totals: ddd" column).
                         continue
                     results.append(
                         self.instantiate(
-                            row.run_at.text.encode("utf-8"),
-                            row.queued_at.text.encode("utf-8"),
+                            row.run_at.encode("utf-8"),
+                            row.queued_at.encode("utf-8"),
                             self.parent.is_candu
                         )
                     )
@@ -5,14 +5,13 @@ from cached_property import cached_property
 from widgetastic.utils import VersionPick
 
 from cfme.utils.appliance import NavigatableMixin
+from cfme.utils.entry_points import registry
 from cfme.utils.log import logger
 
 
 def load_appliance_collections():
-    from pkg_resources import iter_entry_points
-    return {
-        ep.name: ep.resolve() for ep in iter_entry_points('manageiq.appliance_collections')
-    }
+    """Return the collections registry, the collection modules are imported on first access"""
+    return registry('manageiq.appliance_collections')
 
 
 @attr.s
@@ -3,6 +3,7 @@ from artifactor.__main__ import main as art_main
 from cfme.scripting.appliance import main as app_main
 from cfme.scripting.conf import main as conf_main
 from cfme.scripting.ipyshell import main as shell_main
+from cfme.scripting.nav_graph import main as nav_graph_main
 from cfme.scripting.setup_env import main as setup_main
 from cfme.scripting.sprout import main as sprout_main
 
@@ -23,6 +24,7 @@ cli.add_command(shell_main, name="shell")
 cli.add_command(conf_main, name="conf")
 cli.add_command(sprout_main, name="sprout")
 cli.add_command(setup_main, name="setup-env")
+cli.add_command(nav_graph_main, name="nav-graph")
 
 if __name__ == '__main__':
     cli()
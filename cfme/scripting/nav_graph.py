@@ -0,0 +1,57 @@
+"""Compiles and checks the graph of the navigation destinations, see :py:mod:`cfme.utils.nav_graph`
+
+Usage:
+
+   miq nav-graph
+   miq nav-graph --timings log/nav_timings-master.json --timings log/nav_timings-gw0.json
+"""
+import json
+import sys
+from collections import Counter
+
+import click
+
+from cfme.utils.nav_graph import compile_graph, import_modules
+from cfme.utils.nav_timing import NavigationTimings
+from cfme.utils.path import log_path
+
+
+@click.command(help='Compiles and checks the graph of the navigation destinations')
+@click.option('--output', default=log_path.join('nav_graph.json').strpath,
+              help='File to write the compiled graph to')
+@click.option('--timings', 'timings_files', multiple=True,
+              help='Navigation timings to rank the chains by their mean time')
+@click.option('--deepest', default=20, help='Number of the deepest chains to show')
+def main(output, timings_files, deepest):
+    errors = import_modules()
+    for module, error in sorted(errors.items()):
+        click.echo('Failed to import {}: {}'.format(module, error), err=True)
+
+    from cfme.utils.appliance.implementations import ssui, ui
+    graph = compile_graph([(ui.navigator, ''), (ssui.navigator, 'SSUI/')])
+    with open(output, 'w') as f:
+        json.dump(graph.to_dict(), f, indent=2, sort_keys=True)
+    ends = Counter(entry['end'] for entry in graph.destinations.values())
+    click.echo('{} destinations written to {} ({})'.format(
+        len(graph.destinations), output,
+        ', '.join('{} {}'.format(count, end) for end, count in sorted(ends.items()))))
+
+    timings = None
+    if timings_files:
+        timings = NavigationTimings()
+        for timings_file in timings_files:
+            with open(timings_file) as f:
+                timings.merge(NavigationTimings.from_dict(json.load(f)))
+    click.echo('{:>5}  {:>8}  {}'.format('depth', 'mean ms', 'destination'))
+    for destination, depth, chain_time in graph.deepest(timings)[:deepest]:
+        click.echo('{:>5}  {:>8}  {}'.format(
+            depth, '-' if chain_time is None else int(chain_time), destination))
+
+    problems = graph.problems()
+    for destination, message in problems:
+        click.echo('{}: {}'.format(destination, message), err=True)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,14 +9,26 @@ Options in env.yaml will define what files to collect, will default to the set b
             - /var/www/miq/vmdb/log/evm.log
             - /var/www/miq/vmdb/log/production.log
             - /var/www/miq/vmdb/log/automation.log
+        workers: 8  # number of appliances collected at once
+        since_session_start: False  # True to only collect what was logged during the session
+        max_size: 524288000  # uncompressed bytes per appliance, split between the files
 
-Log files will be tarred and written to log_path
+Each log file is compressed on the appliance and streamed over ssh straight into
+``<local_dir>/<appliance hostname>/<log file path>.gz``, nothing is written on the appliance.
+
+With ``since_session_start``, the sizes of the log files are recorded when the session starts and
+only the data appended after that are collected (the whole file when it was rotated meanwhile).
+With ``max_size``, only the last ``max_size / number of files`` bytes of each file are collected.
 """
+from concurrent import futures
+
 import pytest
 
+from cfme.fixtures.pytest_store import store
 from cfme.utils.path import log_path
 from cfme.utils.conf import env
 from cfme.utils.log import logger
+from cfme.utils.quote import quote
 
 
 DEFAULT_FILES = ['/var/www/miq/vmdb/log/evm.log',
@@ -25,6 +37,11 @@ DEFAULT_FILES = ['/var/www/miq/vmdb/log/evm.log',
 
 DEFAULT_LOCAL = log_path
 
+DEFAULT_WORKERS = 8
+
+# hostname: {log file: size at the session start}
+_session_start_sizes = {}
+
 
 def pytest_addoption(parser):
     parser.addoption('--collect-logs', action='store_true',
@@ -32,50 +49,144 @@ def pytest_addoption(parser):
                            'shutdown.  Configured via log_collector in env.yaml'))
 
 
+def _collector_conf():
+    return env.get('log_collector', {}) or {}
+
+
+def _log_files():
+    log_files = _collector_conf().get('log_files')
+    if not log_files:
+        logger.info('No log_collector.log_files in env, use default files: %s', DEFAULT_FILES)
+        return DEFAULT_FILES
+    return log_files
+
+
+def _appliances(config):
+    from cfme.test_framework.appliance import PLUGIN_KEY
+    holder = config.pluginmanager.get_plugin(PLUGIN_KEY)
+    return holder.appliances if holder is not None else []
+
+
+def _run_on_appliances(func, appliances):
+    """Run ``func(appliance)`` for all appliances at once, returns ``{appliance: result}``
+
+    Failures are logged and left out of the results.
+    """
+    workers = _collector_conf().get('workers', DEFAULT_WORKERS)
+    results = {}
+    with futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(appliances)))) as pool:
+        tasks = {pool.submit(func, app): app for app in appliances}
+        for task in futures.as_completed(tasks):
+            app = tasks[task]
+            try:
+                results[app] = task.result()
+            except Exception:
+                logger.exception('Log collection failed on %s', app)
+    return results
+
+
+def log_sizes(app, log_files):
+    """Returns ``{log file: size}`` of the existing log files on the appliance"""
+    with app.ssh_client as ssh_client:
+        result = ssh_client.run_command(
+            'stat -c "%s %n" {} 2>/dev/null'.format(' '.join(map(quote, log_files))))
+    sizes = {}
+    for line in result.output.splitlines():
+        size, _, name = line.strip().partition(' ')
+        if size.isdigit():
+            sizes[name] = int(size)
+    return sizes
+
+
+def stream_log_command(log_file, start=0, max_size=None):
+    """Shell command writing the gzipped part of the log file to the standard output
+
+    Args:
+        log_file: Path to the log file on the appliance
+        start: Offset to start at, ignored when the file is smaller (it was rotated)
+        max_size: Maximal number of bytes to take from the end of the file
+    """
+    lines = [
+        'f={}'.format(quote(log_file)),
+        'size=$(stat -c %s "$f") || exit 1',
+        'start={}'.format(int(start)),
+        '[ "$size" -lt "$start" ] && start=0',
+    ]
+    if max_size:
+        lines.append('[ $((size - {0})) -gt "$start" ] && start=$((size - {0}))'.format(
+            int(max_size)))
+    lines.append('tail -c +$((start + 1)) "$f" | gzip -c')
+    return '; '.join(lines)
+
+
+def collect_appliance_logs(app, log_files, local_dir, start_sizes=None, max_size=None):
+    """Stream the log files of the appliance into ``local_dir/<hostname>/<file path>.gz``
+
+    Returns:
+        List of the written local files
+    """
+    start_sizes = start_sizes or {}
+    app_dir = local_dir.join(app.hostname)
+    app_dir.ensure(dir=True)
+    file_max_size = max_size // len(log_files) if max_size else None
+    written_files = []
+    with app.ssh_client as ssh_client:
+        for log_file in log_files:
+            # the whole remote path, files of the same name in different directories don't clash
+            local_file = app_dir.join('{}.gz'.format(log_file.strip('/')))
+            local_file.dirpath().ensure(dir=True)
+            command = stream_log_command(
+                log_file, start=start_sizes.get(log_file, 0), max_size=file_max_size)
+            with local_file.open('wb') as f:
+                result = ssh_client.stream_command(command, f)
+            if result.success:
+                written_files.append(local_file.strpath)
+            else:
+                # most likely a file that does not exist on this appliance
+                logger.info('Not collecting %s from %s: %s', log_file, app, result.output)
+                local_file.remove()
+    return written_files
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    if (not config.getoption('--collect-logs') or store.parallelizer_role == 'slave' or
+            not _collector_conf().get('since_session_start', False)):
+        return
+    log_files = _log_files()
+    _session_start_sizes.update({
+        app.hostname: sizes
+        for app, sizes in _run_on_appliances(
+            lambda app: log_sizes(app, log_files), _appliances(config)).items()})
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_unconfigure(config):
     yield  # since hookwrapper, let hookimpl run
-    if config.getoption('--collect-logs'):
-        logger.info('Starting log collection on appliances')
-        log_files = DEFAULT_FILES
-        local_dir = DEFAULT_LOCAL
-        try:
-            log_files = env.log_collector.log_files
-        except (AttributeError, KeyError):
-            logger.info('No log_collector.log_files in env, use default files: %s', log_files)
-            pass
-        try:
-            local_dir = log_path.join(env.log_collector.local_dir)
-        except (AttributeError, KeyError):
-            logger.info('No log_collector.local_dir in env, use default local_dir: %s', local_dir)
-            pass
-
-        # Handle local dir existing
-        local_dir.ensure(dir=True)
-        from cfme.test_framework.appliance import PLUGIN_KEY
-        holder = config.pluginmanager.get_plugin(PLUGIN_KEY)
-        if holder is None:
-            # No appliances to fetch logs from
-            logger.warning('No logs collected, appliance holder is empty')
-            return
-
-        written_files = []
-        for app in holder.appliances:
-            with app.ssh_client as ssh_client:
-                tar_file = 'log-collector-{}.tar.gz'.format(
-                    app.hostname)
-                logger.debug('Creating tar file on app %s:%s with log files %s',
-                             app, tar_file, ' '.join(log_files))
-                # wrap the files in ls, redirecting stderr, to ignore files that don't exist
-                tar_result = ssh_client.run_command(
-                    'tar -czvf {tar} $(ls {files} 2>/dev/null)'
-                    .format(tar=tar_file, files=' '.join(log_files)))
-                try:
-                    assert tar_result.success
-                except AssertionError:
-                    logger.exception('Tar command non-zero RC when collecting logs on %s: %s',
-                                     app, tar_result.output)
-                    continue
-                ssh_client.get_file(tar_file, local_dir.strpath)
-            written_files.append(tar_file)
-        logger.info('Wrote the following files to local log path: %s', written_files)
+    # the master collects the logs of all the appliances, including those of the slaves
+    if not config.getoption('--collect-logs') or store.parallelizer_role == 'slave':
+        return
+    logger.info('Starting log collection on appliances')
+    log_files = _log_files()
+    local_dir = DEFAULT_LOCAL
+    if _collector_conf().get('local_dir'):
+        local_dir = log_path.join(_collector_conf()['local_dir'])
+    else:
+        logger.info('No log_collector.local_dir in env, use default local_dir: %s', local_dir)
+
+    # Handle local dir existing
+    local_dir.ensure(dir=True)
+    appliances = _appliances(config)
+    if not appliances:
+        # No appliances to fetch logs from
+        logger.warning('No logs collected, appliance holder is empty')
+        return
+
+    max_size = _collector_conf().get('max_size')
+    results = _run_on_appliances(
+        lambda app: collect_appliance_logs(
+            app, log_files, local_dir, start_sizes=_session_start_sizes.get(app.hostname),
+            max_size=max_size),
+        appliances)
+    written_files = sorted(name for files in results.values() for name in files)
+    logger.info('Wrote the following files to local log path: %s', written_files)
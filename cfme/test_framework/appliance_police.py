@@ -1,3 +1,6 @@
+import threading
+import time
+
 import attr
 import pytest
 
@@ -7,12 +10,16 @@ import requests
 from cfme.utils import ports
 from cfme.utils.net import net_check
 from cfme.utils.wait import TimedOutError
-from cfme.utils.conf import rdb
+from cfme.utils.conf import env, rdb
+from cfme.utils.log import logger
 
 from cfme.fixtures.pytest_store import store
 
 from cfme.fixtures.rdb import Rdb
 
+# seconds between two background health checks of an appliance
+HEALTH_CHECK_INTERVAL = 30
+
 
 @attr.s
 class AppliancePoliceException(Exception):
@@ -23,35 +30,142 @@ class AppliancePoliceException(Exception):
         return "{} (port {})".format(self.message, self.port)
 
 
+def check_appliance(appliance):
+    """Probes the ports and the web UI of the appliance
+
+    Raises:
+        AppliancePoliceException: When a probe failed
+    """
+    available_ports = {
+        'ssh': (appliance.hostname, appliance.ssh_port),
+        'https': (appliance.hostname, appliance.ui_port),
+        'postgres': (appliance.db_host or appliance.hostname, appliance.db_port)}
+    port_results = {pn: net_check(addr=p_addr, port=p_port, force=True)
+                    for pn, (p_addr, p_port) in available_ports.items()}
+    for port, result in port_results.items():
+        if port == 'ssh' and appliance.is_pod:
+            # ssh is not available for podified appliance
+            continue
+        if not result:
+            raise AppliancePoliceException('Unable to connect', available_ports[port][1])
+
+    try:
+        status_code = requests.get(appliance.url, verify=False,
+                                   timeout=120).status_code
+    except Exception:
+        raise AppliancePoliceException('Getting status code failed',
+                                       available_ports['https'][1])
+
+    if status_code != 200:
+        raise AppliancePoliceException('Status code was {}, should be 200'.format(
+            status_code), available_ports['https'][1])
+
+
+@attr.s
+class HealthState(object):
+    """Result of the last health check of an appliance"""
+    healthy = attr.ib(default=None)
+    error = attr.ib(default=None)
+    # when the last check finished
+    checked = attr.ib(default=None)
+    # when the health changed the last time
+    changed = attr.ib(default=None)
+
+
+class ApplianceHealthMonitor(threading.Thread):
+    """Checks the health of an appliance in the background every ``interval`` seconds
+
+    The state of the last check is in :py:attr:`state`, :py:meth:`check` runs a check right
+    away, eg. when the last known state is bad or too old.
+    """
+    def __init__(self, appliance, interval=HEALTH_CHECK_INTERVAL):
+        super(ApplianceHealthMonitor, self).__init__(
+            name='appliance-health-{}'.format(appliance.hostname))
+        self.daemon = True
+        self.appliance = appliance
+        self.interval = interval
+        self.state = HealthState()
+        self._check_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def check(self):
+        """Check the appliance now, returns the new :py:class:`HealthState`"""
+        with self._check_lock:
+            try:
+                check_appliance(self.appliance)
+            except Exception as e:
+                healthy, error = False, e
+            else:
+                healthy, error = True, None
+            now = time.time()
+            if healthy == self.state.healthy:
+                changed = self.state.changed
+            else:
+                changed = now
+                logger.info('Appliance %s health changed to %s%s', self.appliance.url,
+                            'healthy' if healthy else 'unhealthy',
+                            ': {}'.format(error) if error else '')
+            self.state = HealthState(healthy=healthy, error=error, checked=now, changed=changed)
+            return self.state
+
+    @property
+    def fresh(self):
+        """Whether the state is recent enough to be trusted without checking again"""
+        checked = self.state.checked
+        return checked is not None and time.time() - checked < 2 * self.interval
+
+    def run(self):
+        # the first check is done by whoever started the monitor
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_monitors = {}
+
+
+def health_monitor(appliance):
+    """Returns the running health monitor of the appliance, starts it if needed"""
+    monitor = _monitors.get(appliance.url)
+    if monitor is None:
+        interval = env.get('appliance_police', {}).get('interval', HEALTH_CHECK_INTERVAL)
+        monitor = _monitors[appliance.url] = ApplianceHealthMonitor(appliance, interval)
+        # the first check is done in the foreground, the fixture needs its result anyway
+        monitor.check()
+        monitor.start()
+    return monitor
+
+
+def stop_health_monitor(appliance):
+    """Stops and forgets the health monitor of the appliance, eg. when the appliance is destroyed"""
+    monitor = _monitors.pop(appliance.url, None)
+    if monitor is not None:
+        monitor.stop()
+
+
+def pytest_unconfigure(config):
+    for monitor in _monitors.values():
+        monitor.stop()
+    _monitors.clear()
+
+
 @pytest.fixture(autouse=True, scope="function")
 def appliance_police(appliance):
     if not store.slave_manager:
         return
     try:
-        available_ports = {
-            'ssh': (appliance.hostname, appliance.ssh_port),
-            'https': (appliance.hostname, appliance.ui_port),
-            'postgres': (appliance.db_host or appliance.hostname, appliance.db_port)}
-        port_results = {pn: net_check(addr=p_addr, port=p_port, force=True)
-                        for pn, (p_addr, p_port) in available_ports.items()}
-        for port, result in port_results.items():
-            if port == 'ssh' and appliance.is_pod:
-                # ssh is not available for podified appliance
-                continue
-            if not result:
-                raise AppliancePoliceException('Unable to connect', available_ports[port][1])
-
-        try:
-            status_code = requests.get(appliance.url, verify=False,
-                                       timeout=120).status_code
-        except Exception:
-            raise AppliancePoliceException('Getting status code failed',
-                                           available_ports['https'][1])
-
-        if status_code != 200:
-            raise AppliancePoliceException('Status code was {}, should be 200'.format(
-                status_code), available_ports['https'][1])
-        return
+        monitor = health_monitor(appliance)
+        state = monitor.state
+        if not (state.healthy and monitor.fresh):
+            # only trust a bad or an old result after checking again
+            state = monitor.check()
+        if state.healthy:
+            return
+        if isinstance(state.error, AppliancePoliceException):
+            raise state.error
+        e_message = str(state.error)
     except AppliancePoliceException as e:
         # special handling for known failure conditions
         if e.port == 443:
@@ -61,6 +175,7 @@ def appliance_police(appliance):
             try:
                 appliance.wait_for_web_ui(900)
                 store.write_line('EVM was frozen and had to be restarted.', purple=True)
+                health_monitor(appliance).check()
                 return
             except TimedOutError:
                 pass
@@ -3,9 +3,152 @@ classes to manage the cfme test framework configuration
 """
 
 import os
+import pickle
 import warnings
+from collections import Mapping, OrderedDict
+
 import yaycl
 import attr
+from lya import AttrDict
+
+# readable by both python 2 and 3
+SNAPSHOT_PICKLE_PROTOCOL = 2
+
+
+def _plain(data):
+    # AttrDicts carry bound methods, which can't be pickled
+    if isinstance(data, Mapping):
+        return OrderedDict((key, _plain(value)) for key, value in data.items())
+    if isinstance(data, (list, tuple)):
+        return type(data)(_plain(value) for value in data)
+    return data
+
+
+class ConfigSnapshot(object):
+    """
+    compiled snapshot of the parsed configuration files, shared by all processes of a run
+
+    the parsed files are pickled into a single file along with the modification times and sizes
+    of their sources, entries with changed sources are parsed again. when a crypt key is used
+    the snapshot is encrypted with it, so decrypted secrets are never written in plain text
+
+    the snapshot is only a cache, any problem with reading or writing it is ignored
+
+    :param path: path to the snapshot file
+    :param crypt_key_file: optional file holding the key used for the encryption
+    """
+    def __init__(self, path, crypt_key_file=None):
+        self.path = path
+        self.crypt_key_file = crypt_key_file
+        self._entries = None
+
+    def _cipher(self):
+        import yaycl_crypt
+        return yaycl_crypt.crypt_cipher(crypt_key_file=self.crypt_key_file)
+
+    def _encrypt(self, data):
+        from cryptography.hazmat.primitives import padding
+        padder = padding.PKCS7(128).padder()
+        data = padder.update(data) + padder.finalize()
+        encryptor = self._cipher().encryptor()
+        return encryptor.update(data) + encryptor.finalize()
+
+    def _decrypt(self, data):
+        from cryptography.hazmat.primitives import padding
+        decryptor = self._cipher().decryptor()
+        data = decryptor.update(data) + decryptor.finalize()
+        unpadder = padding.PKCS7(128).unpadder()
+        return unpadder.update(data) + unpadder.finalize()
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as snapshot_file:
+                data = snapshot_file.read()
+            if self.crypt_key_file:
+                data = self._decrypt(data)
+            entries = pickle.loads(data)
+        except Exception:
+            # missing, corrupted or written with a different key
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self):
+        data = pickle.dumps(self._entries, SNAPSHOT_PICKLE_PROTOCOL)
+        if self.crypt_key_file:
+            data = self._encrypt(data)
+        tmp_path = '{}.{}'.format(self.path, os.getpid())
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as snapshot_file:
+                snapshot_file.write(data)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError):
+            pass
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def get(self, name, signature):
+        """returns a fresh copy of the parsed file or None if missing or stale
+
+        :param name: name of the configuration file
+        :param signature: signature of the sources the data must have been parsed from
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != signature:
+            return None
+        return AttrDict(pickle.loads(entry[1]))
+
+    def set(self, name, signature, data):
+        """stores the parsed file and writes the snapshot
+
+        entries written by other processes in the meantime are kept
+        """
+        self.entries.update(self._read())
+        self._entries[name] = (
+            signature, pickle.dumps(_plain(data), SNAPSHOT_PICKLE_PROTOCOL))
+        self._write()
+
+
+class SnapshotConfig(yaycl.Config):
+    """
+    yaycl config which takes the parsed files from a :py:class:`ConfigSnapshot` if possible
+
+    yaycl parses the files again whenever the runtime overrides change, in every process
+    """
+    def __init__(self, config_dir, snapshot, **kwargs):
+        super(SnapshotConfig, self).__init__(config_dir, **kwargs)
+        self._snapshot = snapshot
+
+    def _source_signature(self, conf_key):
+        yaml_path = self.file_path(conf_key)
+        base, extension = os.path.splitext(yaml_path)
+        paths = [yaml_path, base + extension.replace('.', '.e', 1)]
+        if 'crypt_key_file' in self._yaycl:
+            paths.append(self._yaycl['crypt_key_file'])
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                signature.append((path, None, None))
+            else:
+                signature.append((path, stat.st_mtime, stat.st_size))
+        return tuple(signature)
+
+    def _load_yaml(self, conf_key, warn_on_fail=True):
+        signature = self._source_signature(conf_key)
+        if all(mtime is None for _, mtime, _ in signature[:2]):
+            # no source, leave the warnings to yaycl
+            return super(SnapshotConfig, self)._load_yaml(conf_key, warn_on_fail=warn_on_fail)
+        data = self._snapshot.get(conf_key, signature)
+        if data is None:
+            data = super(SnapshotConfig, self)._load_yaml(conf_key, warn_on_fail=warn_on_fail)
+            self._snapshot.set(conf_key, signature, data)
+        return data
 
 
 class Configuration(object):
@@ -15,13 +158,15 @@ class Configuration(object):
     def __init__(self):
         self.yaycl_config = None
 
-    def configure(self, config_dir, crypt_key_file=None):
+    def configure(self, config_dir, crypt_key_file=None, snapshot_file=None):
         """
         do the defered initial loading of the configuration
 
         :param config_dir: path to the folder with configuration files
         :param crypt_key_file: optional name of a file holding the key for encrypted
             configuration files
+        :param snapshot_file: optional path to a :py:class:`ConfigSnapshot` file shared by
+            all processes using the same configuration
 
         :raises: AssertionError if called more than once
 
@@ -29,12 +174,14 @@ class Configuration(object):
         """
 
         assert self.yaycl_config is None
+        kwargs = {}
         if crypt_key_file and os.path.exists(crypt_key_file):
-            self.yaycl_config = yaycl.Config(
-                config_dir=config_dir,
-                crypt_key_file=crypt_key_file)
+            kwargs['crypt_key_file'] = crypt_key_file
+        if snapshot_file:
+            snapshot = ConfigSnapshot(snapshot_file, kwargs.get('crypt_key_file'))
+            self.yaycl_config = SnapshotConfig(config_dir, snapshot, **kwargs)
         else:
-            self.yaycl_config = yaycl.Config(config_dir=config_dir)
+            self.yaycl_config = yaycl.Config(config_dir=config_dir, **kwargs)
 
     def get_config(self, name):
         """returns a yaycl config object
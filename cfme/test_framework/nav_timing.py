@@ -0,0 +1,53 @@
+"""Report of the UI navigation timings
+
+The timings of the navigation steps (see :py:mod:`cfme.utils.nav_timing`) of each test process are:
+
+* written to ``log/nav_timings-master.json`` (``log/nav_timings-<slaveid>.json`` on slaves) when
+  its session finishes
+* sent to the artifactor, its ``nav-timing`` plugin writes the timings of all processes to
+  ``nav_timings.json`` and ``nav_timings.csv`` in the artifactor ``log_dir``
+
+The master merges the timings of all processes and shows the slowest destinations in the terminal
+summary.
+"""
+import json
+
+import pytest
+
+from cfme.fixtures.artifactor_plugin import fire_art_hook
+from cfme.fixtures.pytest_store import store
+from cfme.utils.nav_timing import NavigationTimings, timings
+from cfme.utils.path import log_path
+
+REPORT_PATTERN = 'nav_timings-*.json'
+# number of destinations in the terminal summary
+SUMMARY_ENTRIES = 15
+
+
+def pytest_sessionstart(session):
+    # the master cleans up the reports of the previous runs before the slaves start
+    if store.parallelizer_role != 'slave':
+        for report_path in log_path.listdir(REPORT_PATTERN):
+            report_path.remove()
+
+
+def pytest_sessionfinish(session):
+    if not timings.destinations:
+        return
+    data = timings.to_dict()
+    log_path.join(REPORT_PATTERN.replace('*', store.slaveid or 'master')).write(json.dumps(data))
+    fire_art_hook(session.config, 'nav_timings', slaveid=store.slaveid, timings=data)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_terminal_summary(terminalreporter):
+    if store.parallelizer_role == 'slave':
+        return
+    merged = NavigationTimings()
+    for report_path in log_path.listdir(REPORT_PATTERN):
+        merged.merge(NavigationTimings.from_dict(json.loads(report_path.read())))
+    if not merged.destinations:
+        return
+    terminalreporter.write_sep('-', 'slowest navigation destinations')
+    for line in merged.summary(SUMMARY_ENTRIES):
+        terminalreporter.write_line(line)
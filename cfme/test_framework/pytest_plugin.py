@@ -6,6 +6,11 @@ this loads all of the elemental cfme plugins and prepares configuration
 
 import pytest
 
+from cfme.test_framework import startup_profile
+
+# has to happen before pytest imports the plugins below
+startup_profile.install_import_timer()
+
 
 @pytest.mark.tryfirst
 def pytest_addoption(parser):
@@ -35,6 +40,7 @@ def pytest_collection_finish(session):
 
 
 pytest_plugins = (
+    'cfme.test_framework.startup_profile',
     'cfme.markers',
     'cfme.fixtures.pytest_store',
     'cfme.test_framework.sprout.plugin',
@@ -48,6 +54,7 @@ pytest_plugins = (
     'cfme.markers.polarion',  # before artifactor
     'cfme.markers.env',
     'cfme.fixtures.artifactor_plugin',
+    'cfme.test_framework.nav_timing',
     'cfme.fixtures.parallelizer',
 
     'cfme.fixtures.prov_filter',
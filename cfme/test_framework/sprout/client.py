@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+import time
+
 import requests
 
 import attr
@@ -10,7 +12,13 @@ from cfme.utils.appliance import current_appliance, IPAppliance
 from cfme.utils.conf import credentials, env
 # TODO: use custom wait_for logger fitting sprout
 from cfme.utils.log import logger
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import wait_for, TimedOutError
+
+
+#: How long a single ``request_wait`` call may block on the Sprout side, in seconds
+LONG_POLL_TIMEOUT = 50
+#: Time on top of the ``request_wait`` timeout to wait for the response, in seconds
+LONG_POLL_GRACE = 30
 
 
 class SproutException(Exception):
@@ -38,24 +46,27 @@ class SproutClient(object):
     _entry = attr.ib(default="appliances/api")
     _auth = attr.ib(default=None)
 
+    _session = attr.ib(init=False, default=attr.Factory(requests.Session), repr=False)
+
     @property
     def api_entry(self):
         return "{}://{}:{}/{}".format(self._proto, self._host, self._port, self._entry)
 
-    def _post(self, **data):
-        return requests.post(self.api_entry, data=json.dumps(data))
+    def _post(self, data, timeout=None):
+        # The session keeps the connection to Sprout open between the calls
+        return self._session.post(self.api_entry, data=json.dumps(data), timeout=timeout)
 
-    def _call_post(self, **data):
+    def _call_post(self, data, timeout=None):
         """Protect from the Sprout being updated (error 502,503)"""
         result = wait_for(
-            lambda: self._post(**data),
+            lambda: self._post(data, timeout=timeout),
             num_sec=60,
             fail_condition=lambda r: r.status_code in {502, 503},
             delay=2,
         )
         return result.out.json()
 
-    def call_method(self, name, *args, **kwargs):
+    def _request_data(self, name, args, kwargs):
         req_data = {
             "method": name,
             "args": args,
@@ -64,7 +75,10 @@ class SproutClient(object):
         logger.info("SPROUT: Called {} with {} {}".format(name, args, kwargs))
         if self._auth is not None:
             req_data["auth"] = self._auth
-        result = self._call_post(**req_data)
+        return req_data
+
+    @staticmethod
+    def _process_result(result):
         try:
             if result["status"] == "exception":
                 raise SproutException(
@@ -78,6 +92,67 @@ class SproutClient(object):
         except KeyError:
             raise Exception("Malformed response from Sprout!")
 
+    def call_method(self, name, *args, **kwargs):
+        return self._process_result(self._call_post(self._request_data(name, args, kwargs)))
+
+    def call_batch(self, calls):
+        """Call several methods in a single request.
+
+        Sprout versions that don't accept a batch answer with a single result, the calls are then
+        made one by one.
+
+        Args:
+            calls: Iterable of ``(method name, args, kwargs)`` tuples.
+
+        Returns:
+            List of the results, in the order of the calls. The first failed call raises.
+        """
+        req_data = [self._request_data(name, args, kwargs) for name, args, kwargs in calls]
+        if not req_data:
+            return []
+        results = self._call_post(req_data)
+        if not isinstance(results, list):
+            logger.info("SPROUT: batch calls not available, calling the methods one by one")
+            return [self._process_result(self._call_post(data)) for data in req_data]
+        return [self._process_result(result) for result in results]
+
+    def wait_for_pool(self, request_id, timeout=900):
+        """Wait until the appliance pool is finished and return its status.
+
+        Sprout holds each ``request_wait`` call until the pool finishes or its progress changes,
+        so the result comes as soon as the pool is ready without frequent polling. Sprout
+        versions without ``request_wait`` are polled with ``request_check``.
+
+        Raises:
+            TimedOutError: When the pool is not finished in ``timeout`` seconds.
+        """
+        deadline = time.time() + timeout
+        progress = None
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimedOutError(
+                    "Sprout pool {} was not finished in {} seconds".format(request_id, timeout))
+            wait = min(remaining, LONG_POLL_TIMEOUT)
+            req_data = self._request_data(
+                'request_wait', (str(request_id), ), {'timeout': wait, 'progress': progress})
+            try:
+                data = self._process_result(
+                    self._call_post(req_data, timeout=wait + LONG_POLL_GRACE))
+            except SproutException as e:
+                if 'request_wait not found' not in str(e):
+                    raise
+                logger.info("SPROUT: request_wait not available, polling the pool")
+                return wait_for(
+                    lambda: self.call_method('request_check', str(request_id)),
+                    fail_condition=lambda data: not data['finished'],
+                    num_sec=remaining, delay=10,
+                    message='sprout pool {} finished'.format(request_id)).out
+            if data['finished']:
+                return data
+            progress = data['progress']
+            logger.debug("SPROUT: pool %s at %s %%", request_id, progress)
+
     def __getattr__(self, attr):
         return APIMethodCall(self, attr)
 
@@ -125,11 +200,7 @@ class SproutClient(object):
             count=count,
             **kwargs
         )
-        wait_for(
-            lambda: self.call_method('request_check', str(request_id))['finished'],
-            num_sec=wait_time,
-            message='provision {} appliance(s) from sprout'.format(count))
-        data = self.call_method('request_check', str(request_id))
+        data = self.wait_for_pool(request_id, timeout=wait_time)
         logger.debug(data)
         appliances = []
         for appliance in data['appliances']:
@@ -1,4 +1,5 @@
 import re
+import time
 from threading import Timer
 
 import pytest
@@ -12,7 +13,6 @@ from cfme.utils import at_exit, conf
 from cfme.utils.log import logger as log
 from cfme.utils.path import project_path
 from .client import SproutClient, SproutException, AuthException
-from cfme.utils.wait import wait_for
 
 
 _appliance_help = '''specify appliance URLs to use for distributed testing.
@@ -175,15 +175,12 @@ class SproutManager(object):
         return SproutClient.from_config(sprout_user_key=self.sprout_user_key)
 
     def request_appliances(self, provision_request):
+        start = time.time()
         self.request_pool(provision_request)
 
         try:
-            result = wait_for(
-                self.check_fullfilled,
-                num_sec=provision_request.provision_timeout * 60,
-                delay=5,
-                message="requesting appliances was fulfilled"
-            )
+            pool = self.client.wait_for_pool(
+                self.pool, timeout=provision_request.provision_timeout * 60)
         except Exception:
             pool = self.request_check()
             dump_pool_info(log, pool)
@@ -192,10 +189,9 @@ class SproutManager(object):
             raise
         else:
             at_exit(self.destroy_pool)
-            pool = self.request_check()
             dump_pool_info(log, pool)
 
-        log.info("Provisioning took %.1f seconds", result.duration)
+        log.info("Provisioning took %.1f seconds", time.time() - start)
         return pool["appliances"]
 
     def request_pool(self, provision_request):
@@ -256,12 +252,14 @@ class SproutManager(object):
             log.info(
                 "Check if pool already exists for this %r Jenkins job", jenkins_job[0])
             jenkins_job_pools = self.client.find_pools_by_description(jenkins_job[0], partial=True)
-            for pool in jenkins_job_pools:
+            descriptions = self.client.call_batch(
+                ('get_pool_description', (pool, ), {}) for pool in jenkins_job_pools)
+            for pool, description in zip(jenkins_job_pools, descriptions):
                 # Some jobs have overlapping descriptions, sprout API doesn't support regex
                 # job-name-12345 vs job-name-master-12345
                 # the partial match alone will catch both of these, use regex to confirm pool
                 # description is an accurate match
-                if self.client.get_pool_description(pool) == '{}{}'.format(jenkins_job[0], pool):
+                if description == '{}{}'.format(jenkins_job[0], pool):
                     log.info("Destroying the old pool %s for %r job.", pool, jenkins_job[0])
                     self.client.destroy_pool(pool)
                 else:
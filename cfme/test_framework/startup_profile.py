@@ -0,0 +1,209 @@
+"""Startup profiling of the pytest plugin stack
+
+Running with ``--startup-profile`` records:
+
+* how long the import of each module took, both including (inclusive) and excluding (own) the
+  time spent importing other modules
+* how long each ``pytest_configure`` and ``pytest_sessionstart`` implementation took
+
+When the collection starts, the report is written to ``log/startup_profile.txt``
+(``log/startup_profile-<slaveid>.txt`` on slaves) and the slowest plugins and hooks are shown in
+the terminal.
+
+The plugins are imported before the command line is parsed, so the import timer is installed by
+:py:func:`install_import_timer` when the option is present in ``sys.argv`` or ``PYTEST_ADDOPTS``.
+The time spent in an import is attributed to the module which imported it first.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+from time import time
+
+import pytest
+from six.moves import builtins
+
+OPTION = '--startup-profile'
+PROFILED_HOOKS = ('pytest_configure', 'pytest_sessionstart')
+# number of entries in each terminal summary table
+SUMMARY_ENTRIES = 10
+
+
+def _resolve_name(name, globals_, level):
+    # full name of a relative import, done the same way the import machinery does it
+    if level <= 0 or not globals_:
+        return name
+    package = globals_.get('__package__') or globals_.get('__name__', '')
+    if '__path__' not in globals_ and not globals_.get('__package__'):
+        package = package.rpartition('.')[0]
+    base = package.rsplit('.', level - 1)[0]
+    return '{}.{}'.format(base, name) if name else base
+
+
+class ImportTimer(object):
+    """Times the first import of every module by wrapping ``__import__``"""
+    def __init__(self):
+        # module name: (inclusive seconds, own seconds)
+        self.timings = OrderedDict()
+        # other threads (f.e. the log shipper) import modules meanwhile, each has its own stack
+        self._local = threading.local()
+        self._original_import = None
+
+    @property
+    def _children(self):
+        try:
+            return self._local.children
+        except AttributeError:
+            self._local.children = []
+            return self._local.children
+
+    @property
+    def installed(self):
+        return self._original_import is not None
+
+    def install(self):
+        if not self.installed:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self.installed:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        full_name = _resolve_name(name, globals, level)
+        if full_name not in sys.modules:
+            pending = [full_name]
+        else:
+            # submodules in ``from package import module`` are imported without __import__
+            pending = [
+                '{}.{}'.format(full_name, item) for item in fromlist or () if item != '*']
+            pending = [module for module in pending if module not in sys.modules]
+        if not pending:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        start = time()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            imported = [module for module in pending if module in sys.modules]
+            if imported:
+                self.timings.setdefault(', '.join(imported), (elapsed, elapsed - children))
+
+
+class HookTimer(object):
+    """Times the implementations of the given hooks by wrapping their functions"""
+    def __init__(self, hook_names=PROFILED_HOOKS):
+        self.hook_names = hook_names
+        # (hook name, plugin name): seconds
+        self.timings = OrderedDict()
+
+    def _wrap(self, hook_name, impl):
+        function = impl.function
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.timings[(hook_name, impl.plugin_name)] = time() - start
+        return timed
+
+    def install(self, pluginmanager):
+        for hook_name in self.hook_names:
+            for impl in getattr(pluginmanager.hook, hook_name).get_hookimpls():
+                # wrapping the generator of a hookwrapper would only time its creation
+                if not impl.hookwrapper:
+                    impl.function = self._wrap(hook_name, impl)
+
+
+import_timer = ImportTimer()
+hook_timer = HookTimer()
+
+
+def requested(argv=None):
+    argv = sys.argv if argv is None else argv
+    return OPTION in argv or OPTION in os.environ.get('PYTEST_ADDOPTS', '').split()
+
+
+def install_import_timer():
+    """Start timing imports when the startup profile was requested"""
+    if requested():
+        import_timer.install()
+
+
+def _table(rows, header):
+    lines = ['{:>10}  {:>10}  {}'.format(*header)]
+    lines.extend('{:>10.3f}  {:>10}  {}'.format(*row) for row in rows)
+    return lines
+
+
+def format_report(plugin_names):
+    """Build the report lines from the collected timings"""
+    lines = ['Plugin imports (including their dependencies, in load order)']
+    lines.extend(_table(
+        [(import_timer.timings[name][0], '', name)
+         for name in plugin_names if name in import_timer.timings],
+        ('seconds', '', 'plugin')))
+    lines.extend(['', 'Module imports (slowest own time first)'])
+    lines.extend(_table(
+        [(own, '{:.3f}'.format(inclusive), name)
+         for name, (inclusive, own) in sorted(
+            import_timer.timings.items(), key=lambda item: item[1][1], reverse=True)],
+        ('own', 'inclusive', 'module')))
+    lines.extend(['', 'Hooks (slowest first)'])
+    lines.extend(_table(
+        [(seconds, hook_name, plugin_name)
+         for (hook_name, plugin_name), seconds in sorted(
+            hook_timer.timings.items(), key=lambda item: item[1], reverse=True)],
+        ('seconds', 'hook', 'plugin')))
+    return lines
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('cfme')
+    group.addoption(OPTION, action='store_true', default=False, dest='startup_profile',
+                    help='Profile the plugin imports and configure hooks, the report is '
+                         'written to log/startup_profile.txt')
+
+
+@pytest.mark.tryfirst
+def pytest_cmdline_main(config):
+    if config.getoption('startup_profile'):
+        hook_timer.install(config.pluginmanager)
+
+
+@pytest.mark.tryfirst
+def pytest_collection(session):
+    if not session.config.getoption('startup_profile'):
+        return
+    import_timer.uninstall()
+    from cfme.fixtures.pytest_store import store, write_line
+    from cfme.test_framework.pytest_plugin import pytest_plugins
+    from cfme.utils.path import log_path
+
+    lines = format_report(pytest_plugins)
+    filename = 'startup_profile-{}.txt'.format(store.slaveid) if store.slaveid else \
+        'startup_profile.txt'
+    report_path = log_path.join(filename)
+    report_path.write('\n'.join(lines) + '\n')
+
+    write_line('Startup profile, slowest plugin imports:', bold=True)
+    for seconds, name in sorted(
+            ((import_timer.timings[name][0], name)
+             for name in pytest_plugins if name in import_timer.timings),
+            reverse=True)[:SUMMARY_ENTRIES]:
+        write_line('  {:8.3f}s  {}'.format(seconds, name))
+    write_line('Startup profile, slowest hooks:', bold=True)
+    for (hook_name, plugin_name), seconds in sorted(
+            hook_timer.timings.items(), key=lambda item: item[1],
+            reverse=True)[:SUMMARY_ENTRIES]:
+        write_line('  {:8.3f}s  {} ({})'.format(seconds, hook_name, plugin_name))
+    write_line('Full startup profile written to {}'.format(report_path.strpath))
@@ -11,6 +11,7 @@ from widgetastic.browser import Browser, DefaultPlugin
 from cfme import exceptions
 from cfme.utils.browser import manager
 from cfme.utils.log import logger, create_sublogger
+from cfme.utils.nav_timing import timings as nav_timings
 from cfme.utils.wait import wait_for
 from cfme.fixtures.pytest_store import store
 from . import Implementation
@@ -118,9 +119,13 @@ class SSUINavigateStep(NavigateStep):
             raise
             self.go(_tries, *args, **kwargs)
 
-    def log_message(self, msg, level="debug"):
+    @property
+    def destination(self):
         class_name = self.obj.__name__ if isclass(self.obj) else self.obj.__class__.__name__
-        str_msg = "[SUI-NAV/{}/{}]: {}".format(class_name, self._name, msg)
+        return "{}/{}".format(class_name, self._name)
+
+    def log_message(self, msg, level="debug"):
+        str_msg = "[SUI-NAV/{}]: {}".format(self.destination, msg)
         getattr(logger, level)(str_msg)
 
     def construct_message(self, here, resetter, view, duration, waited):
@@ -133,6 +138,10 @@ class SSUINavigateStep(NavigateStep):
         )
 
     def go(self, _tries=0, *args, **kwargs):
+        with nav_timings.step("SSUI/{}".format(self.destination), tries=_tries + 1) as timing:
+            return self._go(timing, _tries, *args, **kwargs)
+
+    def _go(self, timing, _tries, *args, **kwargs):
         nav_args = {'use_resetter': True, 'wait_for_view': 10}
 
         self.log_message("Beginning SUI Navigation...", level="info")
@@ -168,17 +177,19 @@ class SSUINavigateStep(NavigateStep):
             self.do_nav(_tries, *args, **kwargs)
         if nav_args['use_resetter']:
             resetter_used = True
-            self.resetter()
+            with timing.measure('resetter'):
+                self.resetter()
         self.post_navigate(_tries)
         view = self.view if self.VIEW is not None else None
         duration = int((time.time() - start_time) * 1000)
         if view and nav_args['wait_for_view'] and not os.environ.get(
                 'DISABLE_NAVIGATE_ASSERT', False):
             waited = True
-            wait_for(
-                lambda: view.is_displayed, num_sec=nav_args['wait_for_view'],
-                message="Waiting for view [{}] to display".format(view.__class__.__name__)
-            )
+            with timing.measure('wait_for_view'):
+                wait_for(
+                    lambda: view.is_displayed, num_sec=nav_args['wait_for_view'],
+                    message="Waiting for view [{}] to display".format(view.__class__.__name__)
+                )
         self.log_message(
             self.construct_message(here, resetter_used, view, duration, waited), level="info"
         )
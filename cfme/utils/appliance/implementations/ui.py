@@ -21,6 +21,7 @@ from cfme import exceptions
 from cfme.fixtures.pytest_store import store
 from cfme.utils.browser import manager
 from cfme.utils.log import logger, create_sublogger
+from cfme.utils.nav_timing import timings as nav_timings
 from cfme.utils.version import Version
 from cfme.utils.wait import wait_for
 from . import Implementation
@@ -496,9 +497,13 @@ class CFMENavigateStep(NavigateStep):
     def post_navigate(self, *args, **kwargs):
         pass
 
-    def log_message(self, msg, level="debug"):
+    @property
+    def destination(self):
         class_name = self.obj.__name__ if isclass(self.obj) else self.obj.__class__.__name__
-        str_msg = "[UI-NAV/{}/{}]: {}".format(class_name, self._name, msg)
+        return "{}/{}".format(class_name, self._name)
+
+    def log_message(self, msg, level="debug"):
+        str_msg = "[UI-NAV/{}]: {}".format(self.destination, msg)
         getattr(logger, level)(str_msg)
 
     def construct_message(self, here, resetter, view, duration, waited):
@@ -511,6 +516,10 @@ class CFMENavigateStep(NavigateStep):
         )
 
     def go(self, _tries=0, *args, **kwargs):
+        with nav_timings.step(self.destination, tries=_tries + 1) as timing:
+            return self._go(timing, _tries, *args, **kwargs)
+
+    def _go(self, timing, _tries, *args, **kwargs):
         nav_args = {'use_resetter': True, 'wait_for_view': 10}
         self.log_message("Beginning Navigation...", level="info")
         start_time = time.time()
@@ -551,17 +560,19 @@ class CFMENavigateStep(NavigateStep):
                 self.check_for_badness(self.step, _tries, nav_args, *args, **kwargs)
         if nav_args['use_resetter']:
             resetter_used = True
-            self.check_for_badness(self.resetter, _tries, nav_args, *args, **kwargs)
+            with timing.measure('resetter'):
+                self.check_for_badness(self.resetter, _tries, nav_args, *args, **kwargs)
         self.check_for_badness(self.post_navigate, _tries, nav_args, *args, **kwargs)
         view = self.view if self.VIEW is not None else None
         duration = int((time.time() - start_time) * 1000)
         if view and nav_args['wait_for_view'] and not os.environ.get(
                 'DISABLE_NAVIGATE_ASSERT', False):
             waited = True
-            wait_for(
-                lambda: view.is_displayed, num_sec=nav_args['wait_for_view'],
-                message="Waiting for view [{}] to display".format(view.__class__.__name__)
-            )
+            with timing.measure('wait_for_view'):
+                wait_for(
+                    lambda: view.is_displayed, num_sec=nav_args['wait_for_view'],
+                    message="Waiting for view [{}] to display".format(view.__class__.__name__)
+                )
         self.log_message(
             self.construct_message(here, resetter_used, view, duration, waited), level="info"
         )
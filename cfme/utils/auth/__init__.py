@@ -9,6 +9,7 @@ from cfme.configure.configuration.server_settings import (
 )
 from cfme.exceptions import UnknownProviderType
 from cfme.utils.conf import credentials, auth_data
+from cfme.utils.entry_points import registry
 from cfme.utils.log import logger
 
 auth_prov_data = auth_data.get("auth_providers", {})  # setup on module import
@@ -19,11 +20,7 @@ LDAPS_PORT = 636
 
 def auth_provider_types():
     """Fetch the registered classes from entry_points manageiq.auth_provider_categories"""
-    from pkg_resources import iter_entry_points
-    return {
-        ep.name: ep.resolve()
-        for ep in iter_entry_points('manageiq.auth_provider_types')
-    }
+    return registry('manageiq.auth_provider_types')
 
 
 def auth_class_from_type(auth_prov_type):
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""Persistent cache for blocker data shared between test processes.
+
+Resolving blockers means talking to Bugzilla, GitHub and JIRA. Every process of a parallelized
+run (the master and all the slaves) resolves the same blockers, so the raw data fetched from the
+remote services is stored in a small sqlite database that all of them share. Entries expire after
+a configurable time.
+
+The cache can be tuned in ``env.yaml``:
+
+.. code-block:: yaml
+
+    blocker_cache:
+        enabled: true
+        path: /tmp/blockers.sqlite  # defaults to log/blocker_cache.sqlite
+        ttl: 3600                   # in seconds
+"""
+import json
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+from six.moves.xmlrpc_client import DateTime
+
+DEFAULT_TTL = 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blockers (
+    engine TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    PRIMARY KEY (engine, key)
+)
+"""
+
+# Keep the number of bound parameters well under the sqlite limit
+_CHUNK_SIZE = 500
+
+
+_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+_DATE_FORMAT = '%Y-%m-%d'
+
+
+def _encode(value):
+    """Dates (f.e. XML-RPC dates of the bugs) are stored tagged, so they are loaded as dates"""
+    if isinstance(value, DateTime):
+        return {'__xmlrpc_datetime__': value.value}
+    elif isinstance(value, datetime):
+        return {'__datetime__': value.strftime(_DATETIME_FORMAT)}
+    elif isinstance(value, date):
+        return {'__date__': value.strftime(_DATE_FORMAT)}
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def _decode(obj):
+    if len(obj) == 1:
+        if '__xmlrpc_datetime__' in obj:
+            return DateTime(obj['__xmlrpc_datetime__'])
+        elif '__datetime__' in obj:
+            return datetime.strptime(obj['__datetime__'], _DATETIME_FORMAT)
+        elif '__date__' in obj:
+            return datetime.strptime(obj['__date__'], _DATE_FORMAT).date()
+    return obj
+
+
+def _chunks(items, size=_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BlockerCache(object):
+    """Key-value store of JSON-serializable blocker data, namespaced by the blocker engine.
+
+    Dates and XML-RPC dates are stored as well and loaded back as the same types.
+
+    Args:
+        path: Path to the sqlite database file, ``None`` disables the persistent storage.
+        ttl: Number of seconds after which the cached entries are considered stale.
+    """
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = str(path) if path is not None else None
+        self.ttl = ttl
+        self._initialized = False
+
+    @classmethod
+    def from_config(cls):
+        from cfme.utils.conf import env
+        from cfme.utils.path import log_path
+        cache_conf = env.get('blocker_cache', {})
+        if not cache_conf.get('enabled', True):
+            return cls(None)
+        path = cache_conf.get('path') or log_path.join('blocker_cache.sqlite').strpath
+        return cls(path, ttl=cache_conf.get('ttl', DEFAULT_TTL))
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _connect(self):
+        # The timeout is generous because the slaves hit the database at the same time
+        connection = sqlite3.connect(self.path, timeout=60)
+        if not self._initialized:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(_SCHEMA)
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def get(self, engine, key):
+        """Return cached data for a single key or ``None`` if not present or stale."""
+        return self.get_many(engine, [key]).get(str(key))
+
+    def get_many(self, engine, keys):
+        """Return a dictionary of ``key: data`` for all fresh keys that are in the cache.
+
+        The keys are always converted to strings.
+        """
+        if not self.enabled:
+            return {}
+        result = {}
+        threshold = time.time() - self.ttl
+        with closing(self._connect()) as connection:
+            for chunk in _chunks(set(str(key) for key in keys)):
+                rows = connection.execute(
+                    'SELECT key, data FROM blockers WHERE engine = ? AND fetched >= ? '
+                    'AND key IN ({})'.format(', '.join('?' * len(chunk))),
+                    [engine, threshold] + chunk)
+                for key, data in rows:
+                    result[key] = json.loads(data, object_hook=_decode)
+        return result
+
+    def missing(self, engine, keys):
+        """Return the set of keys (as strings) that have to be fetched from the remote service."""
+        keys = set(str(key) for key in keys)
+        return keys - set(self.get_many(engine, keys))
+
+    def set(self, engine, key, data):
+        self.set_many(engine, {key: data})
+
+    def set_many(self, engine, mapping):
+        """Store all ``key: data`` pairs from the mapping."""
+        if not self.enabled or not mapping:
+            return
+        now = time.time()
+        rows = [
+            (engine, str(key), json.dumps(data, default=_encode), now)
+            for key, data in mapping.items()]
+        with closing(self._connect()) as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO blockers (engine, key, data, fetched) '
+                'VALUES (?, ?, ?, ?)', rows)
+            connection.commit()
+
+    def clear(self, engine=None):
+        if not self.enabled:
+            return
+        with closing(self._connect()) as connection:
+            if engine is None:
+                connection.execute('DELETE FROM blockers')
+            else:
+                connection.execute('DELETE FROM blockers WHERE engine = ?', (engine, ))
+            connection.commit()
+
+
+_cache = None
+
+
+def get_cache():
+    """Return the process-wide :py:class:`BlockerCache` configured from ``env.yaml``."""
+    global _cache
+    if _cache is None:
+        _cache = BlockerCache.from_config()
+    return _cache
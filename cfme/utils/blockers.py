@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 import re
+from collections import defaultdict
+
 import six
 import six.moves.xmlrpc_client
 from github import Github
+from github.Issue import Issue
 from six.moves.urllib.parse import urlparse
 
 from cfme.fixtures.pytest_store import store
 from cfme.utils import classproperty, conf, version
+from cfme.utils.blocker_cache import get_cache
 from cfme.utils.bz import Bugzilla
 from cfme.utils.log import logger
 
@@ -67,6 +71,36 @@ class Blocker(object):
         else:
             raise ValueError("Wrong specification of the blockers!")
 
+    @classmethod
+    def prefetch(cls, blockers):
+        """Load the data of all passed blockers in as few remote calls as possible.
+
+        The results end up in the persistent blocker cache, so every process of the test run can
+        resolve the blockers without talking to the remote services again. Plain integers are
+        treated as Bugzilla bugs like in the ``blockers`` meta mark.
+        """
+        by_engine = defaultdict(list)
+        for blocker in blockers:
+            if isinstance(blocker, int):
+                blocker = "BZ#{}".format(blocker)
+            try:
+                blocker = cls.parse(blocker)
+            except ValueError as e:
+                logger.warning("Not prefetching blocker %r: %s", blocker, e)
+                continue
+            by_engine[type(blocker)].append(blocker)
+        for engine, engine_blockers in by_engine.items():
+            try:
+                engine._prefetch(engine_blockers)
+            except Exception as e:
+                # Prefetching is only an optimization, the blockers get resolved one by one later
+                logger.exception("Could not prefetch %s blockers: %s", engine.__name__, e)
+
+    @classmethod
+    def _prefetch(cls, blockers):
+        """Bulk-load data for blockers of this engine. Engines override this if they can."""
+        pass
+
 
 class GH(Blocker):
     DEFAULT_REPOSITORY = conf.env.get("github", {}).get("default_repo")
@@ -113,13 +147,33 @@ class GH(Blocker):
         else:
             raise ValueError("GH issue specified wrong")
 
+    @property
+    def identifier(self):
+        return "{}:{}".format(self.repo, self.issue)
+
     @property
     def data(self):
-        identifier = "{}:{}".format(self.repo, self.issue)
+        identifier = self.identifier
         if identifier not in self._issue_cache:
-            self._issue_cache[identifier] = self.github.get_repo(self.repo).get_issue(self.issue)
+            cache = get_cache()
+            raw_data = cache.get("GH", identifier)
+            if raw_data is not None:
+                issue = self.github.create_from_raw_data(Issue, raw_data)
+            else:
+                issue = self.github.get_repo(self.repo).get_issue(self.issue)
+                cache.set("GH", identifier, issue.raw_data)
+            self._issue_cache[identifier] = issue
         return self._issue_cache[identifier]
 
+    @classmethod
+    def _prefetch(cls, blockers):
+        # GitHub has no cheap multi-issue lookup, but the results get shared through the cache
+        missing = get_cache().missing("GH", [blocker.identifier for blocker in blockers])
+        for blocker in blockers:
+            if blocker.identifier in missing:
+                missing.discard(blocker.identifier)
+                blocker.data
+
     @property
     def blocks(self):
         if self.upstream_only and version.appliance_is_downstream():
@@ -168,6 +222,12 @@ class BZ(Blocker):
         super(BZ, self).__init__(**kwargs)
         self.bug_id = int(bug_id)
 
+    @classmethod
+    def _prefetch(cls, blockers):
+        if cls.bugzilla is None:
+            return
+        cls.bugzilla.prefetch(blocker.bug_id for blocker in blockers)
+
     @property
     def data(self):
         return self.bugzilla.resolve_blocker(
@@ -239,14 +299,34 @@ class JIRA(Blocker):
             return None
         return '{}/browse/{}'.format(jira_url.rstrip('/'), self.jira_id)
 
+    @classmethod
+    def _prefetch(cls, blockers):
+        jira = cls.jira
+        if jira is None:
+            return
+        cache = get_cache()
+        missing = sorted(cache.missing("JIRA", [blocker.jira_id for blocker in blockers]))
+        if not missing:
+            return
+        issues = jira.search_issues(
+            'key in ({})'.format(', '.join(missing)), fields='status', maxResults=len(missing))
+        cache.set_many("JIRA", {issue.key: issue.fields.status.name for issue in issues})
+
+    @property
+    def status(self):
+        cache = get_cache()
+        status = cache.get("JIRA", self.jira_id)
+        if status is None:
+            status = self.jira.issue(self.jira_id, fields='status').fields.status.name
+            cache.set("JIRA", self.jira_id, status)
+        return status
+
     @property
     def blocks(self):
-        jira = self.jira
-        if jira is None:
+        if self.jira is None:
             # JIRA unspecified, shut up and don't block
             return False
-        issue = jira.issue(self.jira_id, fields='status')
-        return issue.fields.status.name.lower() != 'done'
+        return self.status.lower() != 'done'
 
     def __str__(self):
         return 'Jira card {}'.format(self.url)
@@ -4,9 +4,11 @@ from collections import Sequence
 
 import six
 from bugzilla import Bugzilla as _Bugzilla
+from bugzilla.bug import Bug as _Bug
 from miq_version import Version, LATEST
 
 from cached_property import cached_property
+from cfme.utils.blocker_cache import get_cache
 from cfme.utils.conf import credentials, env
 from cfme.utils.log import logger
 from cfme.utils.version import current_version, appliance_build_datetime, appliance_is_downstream
@@ -52,6 +54,7 @@ class Bugzilla(object):
         # __kwargs passed to _Bugzilla instantiation, pop our args out
         self.__product = kwargs.pop("product", None)
         self.__config_options = kwargs.pop('config_options', {})
+        self.__disk_cache = kwargs.pop("cache", None)
         self.__kwargs = kwargs
         self.__bug_cache = {}
         self.__product_cache = {}
@@ -93,7 +96,8 @@ class Bugzilla(object):
                    cookiefile=None,
                    tokenfile=None,
                    product=bz_conf.get("bugzilla", {}).get("product"),
-                   config_options=bz_conf)
+                   config_options=bz_conf,
+                   cache=get_cache())
 
     @cached_property
     def bugzilla(self):
@@ -114,12 +118,82 @@ class Bugzilla(object):
         else:
             return Version(self.__config_options.get("upstream_version", Version.latest().vstring))
 
+    @staticmethod
+    def _raw_data(bug):
+        # the fields fetched from Bugzilla, the same as the bug is pickled with
+        return bug.__getstate__()
+
+    def _wrap_raw(self, data):
+        return BugWrapper(self, _Bug(self.bugzilla, dict=data))
+
     def get_bug(self, id):
         id = int(id)
         if id not in self.__bug_cache:
-            self.__bug_cache[id] = BugWrapper(self, self.bugzilla.getbug(id))
+            data = None
+            if self.__disk_cache is not None:
+                data = self.__disk_cache.get("BZ", id)
+            if data is not None:
+                self.__bug_cache[id] = self._wrap_raw(data)
+            else:
+                bug = self.bugzilla.getbug(id)
+                if self.__disk_cache is not None:
+                    self.__disk_cache.set("BZ", id, self._raw_data(bug))
+                self.__bug_cache[id] = BugWrapper(self, bug)
         return self.__bug_cache[id]
 
+    def get_bugs(self, ids):
+        """Load multiple bugs at once, only the missing ones are queried in a single call.
+
+        Returns:
+            A dictionary of ``id: BugWrapper``, bugs that do not exist are left out.
+        """
+        requested = set(map(int, ids))
+        missing = requested - set(self.__bug_cache)
+        if missing and self.__disk_cache is not None:
+            for bug_id, data in self.__disk_cache.get_many("BZ", missing).items():
+                self.__bug_cache[int(bug_id)] = self._wrap_raw(data)
+            missing -= set(self.__bug_cache)
+        if missing:
+            fetched = {}
+            for bug in self.bugzilla.getbugs(sorted(missing), permissive=True):
+                if bug is None:
+                    continue
+                self.__bug_cache[bug.id] = BugWrapper(self, bug)
+                fetched[bug.id] = self._raw_data(bug)
+            if self.__disk_cache is not None:
+                self.__disk_cache.set_many("BZ", fetched)
+        return {
+            bug_id: self.__bug_cache[bug_id] for bug_id in requested
+            if bug_id in self.__bug_cache}
+
+    def prefetch(self, ids):
+        """Load the bugs and all their duplicates, copies and blocked bugs in bulk.
+
+        :py:meth:`get_bug_variants` walks these relations one bug at a time, so loading the whole
+        neighbourhood beforehand in a few multi-id queries keeps the later resolution local.
+        """
+        seen = set([])
+        variants = set(map(int, ids))
+        wave = set(variants)
+        while wave:
+            seen |= wave
+            self.get_bugs(wave)
+            next_wave = set([])
+            for bug_id in wave:
+                bug = self.__bug_cache.get(bug_id)
+                if bug is None:
+                    continue
+                if bug_id not in variants:
+                    # Only a blocked bug, expand it further only if it is a copy
+                    if bug.copy_of not in variants:
+                        continue
+                    variants.add(bug_id)
+                related = [bug.dupe_of, bug.copy_of]
+                variants.update(int(related_id) for related_id in related if related_id)
+                next_wave.update(int(related_id) for related_id in related if related_id)
+                next_wave.update(int(blocked) for blocked in bug._bug.blocks)
+            wave = next_wave - seen
+
     def get_bug_variants(self, id):
         if isinstance(id, BugWrapper):
             bug = id
@@ -11,6 +11,7 @@ from cfme.utils import path
 global_configuration.configure(
     config_dir=path.conf_path.strpath,
     crypt_key_file=path.project_path.join('.yaml_key').strpath,
+    snapshot_file=path.conf_path.join('.snapshot').strpath,
 )
 
 sys.modules[__name__] = DeprecatedConfigWrapper(global_configuration)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Local merger of simplecov ``.resultset.json`` files.
+
+This is the python counterpart of ``scripts/data/coverage/coverage_merger.rb``. The line hit
+arrays are merged the same way, but the merge runs locally instead of on an appliance, and the
+result sets are consumed one at a time, so only the merged data and the result sets currently
+being parsed are kept in memory.
+
+The format of the result sets is:
+
+.. code-block:: text
+
+    {
+        "$ip-$pid": {
+            "coverage": {
+                "$file": [$line_1, ..., $line_N],
+            },
+            "timestamp": 1518751298
+        }
+    }
+
+where the line data are either ``null`` (not coverable), ``0`` (not covered) or the number of
+hits of the line.
+
+Usage:
+
+.. code-block:: python
+
+    merger = CoverageMerger()
+    merger.merge_paths(glob.glob('log/coverage/*/.resultset.json'), workers=4)
+    merger.write('log/coverage/merged')
+"""
+import json
+import os
+from concurrent import futures
+
+import six
+
+#: Key under which the merged data are stored, matches the ruby merger
+MERGED_DATA_KEY = 'merged_data'
+
+
+def merge_line_coverage(target, source):
+    """Add the hits of ``source`` to ``target`` in place.
+
+    Both lists describe the same source file, so they must have the same length and ``None``
+    must be on the same positions.
+
+    Raises:
+        ValueError: When the coverage data do not describe the same file
+    """
+    if len(target) != len(source):
+        raise ValueError('Both files are not the same length!')
+    for line_number, (hits1, hits2) in enumerate(zip(target, source)):
+        if hits1 is None and hits2 is None:
+            continue
+        elif hits1 is None or hits2 is None:
+            raise ValueError(
+                'Coverage data should be either null or a number on both sides! '
+                'Line {}: {!r} vs. {!r}'.format(line_number, hits1, hits2))
+        target[line_number] = hits1 + hits2
+    return target
+
+
+class CoverageMerger(object):
+    """Incremental merger of simplecov result sets.
+
+    Args:
+        logger: Optional logger to report the progress to.
+    """
+    def __init__(self, logger=None):
+        self.coverage = {}
+        self.timestamp = 0
+        self.merged_count = 0
+        self.log = logger
+
+    def _info(self, message, *args):
+        if self.log is not None:
+            self.log.info(message, *args)
+
+    def add_resultset(self, resultset):
+        """Merge a parsed result set (a dictionary) into the merged data."""
+        for name, data in resultset.items():
+            self._info('Merging coverage data of %s', name)
+            self.timestamp = max(self.timestamp, data.get('timestamp', 0))
+            for source_file, lines in six.iteritems(data.get('coverage', {})):
+                # newer simplecov versions nest the line data
+                if isinstance(lines, dict):
+                    lines = lines['lines']
+                if source_file not in self.coverage:
+                    self.coverage[source_file] = lines
+                else:
+                    merge_line_coverage(self.coverage[source_file], lines)
+        self.merged_count += 1
+
+    def add_file(self, fileobj):
+        """Parse a result set from a file-like object (eg. an sftp file) and merge it."""
+        self.add_resultset(json.load(fileobj))
+
+    def add_path(self, path):
+        with open(path, 'rb') as f:
+            self.add_file(f)
+
+    def merge_concurrently(self, loaders, workers=4):
+        """Run the callables in a pool and merge the result sets they return.
+
+        The callables are expected to do the IO heavy part (downloading, reading, parsing),
+        merging into the shared data happens in the calling thread. The loaders run in chunks
+        of ``workers``, so at most that many parsed result sets are held in memory at once.
+        """
+        workers = max(1, workers)
+        loaders = list(loaders)
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for i in range(0, len(loaders), workers):
+                for resultset in executor.map(lambda loader: loader(), loaders[i:i + workers]):
+                    self.add_resultset(resultset)
+
+    def merge_paths(self, paths, workers=4):
+        """Merge all local result set files using a pool of ``workers`` threads."""
+        def _loader(path):
+            def _load():
+                with open(path, 'rb') as f:
+                    return json.load(f)
+            return _load
+        self.merge_concurrently([_loader(path) for path in paths], workers=workers)
+
+    @property
+    def resultset(self):
+        return {
+            MERGED_DATA_KEY: {
+                'coverage': self.coverage,
+                'timestamp': self.timestamp,
+            }
+        }
+
+    @property
+    def covered_percent(self):
+        relevant = covered = 0
+        for lines in self.coverage.values():
+            for hits in lines:
+                if hits is None:
+                    continue
+                relevant += 1
+                if hits:
+                    covered += 1
+        if not relevant:
+            return 0.0
+        return round(100.0 * covered / relevant, 2)
+
+    def write(self, directory):
+        """Write ``.resultset.json`` and ``.last_run.json`` to the directory.
+
+        Returns:
+            Path to the written ``.resultset.json``
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        resultset_path = os.path.join(directory, '.resultset.json')
+        with open(resultset_path, 'w') as f:
+            json.dump(self.resultset, f)
+        with open(os.path.join(directory, '.last_run.json'), 'w') as f:
+            json.dump({'result': {'covered_percent': self.covered_percent}}, f)
+        return resultset_path
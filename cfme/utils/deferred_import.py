@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Deferred imports of heavy dependencies
+
+Some pytest plugins need a heavy library (wrapanapi, lxml, ...) only in a few hooks or only when
+an option is enabled. Importing it on the module level makes every run and every slave pay for
+it during startup. :py:func:`deferred_import` returns a stand-in for the module which imports it
+on the first attribute access.
+
+Usage:
+
+.. code-block:: python
+
+    from cfme.utils.deferred_import import deferred_import
+    etree = deferred_import('lxml.etree')
+
+    def make_element():
+        return etree.Element('testcase')  # lxml.etree is imported here
+"""
+from importlib import import_module
+
+
+class DeferredModule(object):
+    """Stand-in for a module that is imported on the first attribute access."""
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return '<deferred module {!r} ({})>'.format(self._name, state)
+
+
+def deferred_import(name):
+    """Return a :py:class:`DeferredModule` for the module ``name``"""
+    return DeferredModule(name)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Lazy, cached access to the setuptools entry points of the framework.
+
+Collections, provider types and VM types are registered as entry points in ``setup.py``.
+Resolving all of them imports most of the framework, so :py:class:`EntryPointRegistry` only reads
+the entry point metadata (once per process) and imports the target of an entry point the first
+time it is looked up.
+
+Usage:
+
+.. code-block:: python
+
+    collections = registry('manageiq.appliance_collections')
+    'hosts' in collections  # no import
+    collections.targets['hosts']  # 'cfme.infrastructure.host:HostsCollection', no import
+    collections['hosts']  # imports cfme.infrastructure.host
+"""
+from collections import Mapping
+from threading import RLock
+
+from cached_property import cached_property
+
+_group_cache = {}
+_registry_cache = {}
+_lock = RLock()
+
+
+def entry_points(group):
+    """Return a dictionary of ``name: EntryPoint`` of the group, read only once per process."""
+    with _lock:
+        if group not in _group_cache:
+            from pkg_resources import iter_entry_points
+            _group_cache[group] = {ep.name: ep for ep in iter_entry_points(group)}
+        return _group_cache[group]
+
+
+class EntryPointRegistry(Mapping):
+    """Read-only mapping of entry point names to their targets, resolved on first access.
+
+    Args:
+        groups: Entry point groups, on name clashes the later groups win.
+    """
+    def __init__(self, *groups):
+        self.groups = groups
+        self._resolved = {}
+
+    @cached_property
+    def _entry_points(self):
+        result = {}
+        for group in self.groups:
+            result.update(entry_points(group))
+        return result
+
+    @cached_property
+    def targets(self):
+        """Dictionary of ``name: 'module:attr'`` strings, does not import anything."""
+        return {
+            name: '{}:{}'.format(ep.module_name, '.'.join(ep.attrs))
+            for name, ep in self._entry_points.items()}
+
+    def __getitem__(self, name):
+        try:
+            return self._resolved[name]
+        except KeyError:
+            entry_point = self._entry_points[name]
+            with _lock:
+                if name not in self._resolved:
+                    self._resolved[name] = entry_point.resolve()
+            return self._resolved[name]
+
+    def __contains__(self, name):
+        # Mapping.__contains__ would resolve the entry point
+        return name in self._entry_points
+
+    def __iter__(self):
+        return iter(self._entry_points)
+
+    def __len__(self):
+        return len(self._entry_points)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(map(repr, self.groups)))
+
+
+def registry(*groups):
+    """Return the shared :py:class:`EntryPointRegistry` for the groups."""
+    with _lock:
+        if groups not in _registry_cache:
+            _registry_cache[groups] = EntryPointRegistry(*groups)
+        return _registry_cache[groups]
@@ -130,13 +130,18 @@ Members
 ^^^^^^^
 
 """
+import base64
 import inspect
 import logging
 import sys
+import threading
 import warnings
 from time import time
 from traceback import extract_tb, format_tb
 
+import msgpack
+from six.moves import queue
+
 from cfme.utils import conf, safe_string
 from cfme.utils.path import get_rel_path, log_path, project_path
 
@@ -447,28 +452,138 @@ def nth_frame_info(n):
     return inspect.getframeinfo(inspect.stack(1)[n][0])
 
 
+#: Log record attributes shipped to the artifactor, the message is shipped already formatted
+ARTIFACTOR_RECORD_FIELDS = (
+    'name', 'levelno', 'levelname', 'pathname', 'lineno', 'funcName', 'created', 'msecs',
+    'relativeCreated', 'thread', 'threadName', 'process', 'msg', 'exc_text')
+
+
+def pack_log_records(records):
+    """Pack compact log records (as made by :py:meth:`ArtifactorHandler.compact_record`)
+
+    The hooks are transported as JSON, so the msgpack payload is base64 encoded.
+    """
+    return base64.b64encode(msgpack.packb(records, use_bin_type=True)).decode('ascii')
+
+
+def unpack_log_records(payload):
+    """Turn a payload made by :py:func:`pack_log_records` back into a list of log records"""
+    records = msgpack.unpackb(base64.b64decode(payload), raw=False)
+    return [
+        logging.makeLogRecord(dict(zip(ARTIFACTOR_RECORD_FIELDS, record), args=None))
+        for record in records]
+
+
+def _artifactor_log_level():
+    # records under the level of the artifactor logger plugin would be thrown away by it anyway
+    plugins = conf.env.get('artifactor', {}).get('plugins', {})
+    return plugins.get('logger', {}).get('level', 'DEBUG')
+
+
 class ArtifactorHandler(logging.Handler):
-    """Logger handler that hands messages off to the artifactor"""
+    """Logger handler that hands messages off to the artifactor in batches
+
+    The records are reduced to the fields in :py:data:`ARTIFACTOR_RECORD_FIELDS` and put on a
+    bounded queue. A background thread packs them into batches of up to ``batch_size`` records
+    and fires one ``log_batch`` hook per batch. When the queue is full, logging blocks for up to
+    ``put_timeout`` seconds to let the shipper catch up, after that the record is dropped.
+
+    :py:meth:`flush` has to be called before firing hooks that depend on all the logs of the
+    test being shipped, like ``finish_test``.
+    """
 
-    slaveid = artifactor = None
+    slaveid = None
+    batch_size = 500
+    # seconds to wait for more records before shipping an incomplete batch
+    batch_interval = 0.2
+    queue_size = 10000
+    put_timeout = 10
+
+    def __init__(self, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+        self._artifactor = None
+        self._queue = queue.Queue(self.queue_size)
+        self._shipper = None
+        self._shipper_lock = threading.Lock()
+        self.dropped = 0
 
     def createLock(self):  # NOQA: false positive, base class override
-        # opt out of locking since artifactor hook calling is threadsave
+        # opt out of locking since the queue is threadsafe
         self.lock = None
 
+    @property
+    def artifactor(self):
+        return self._artifactor
+
+    @artifactor.setter
+    def artifactor(self, client):
+        self.flush()
+        self._artifactor = client
+
+    @staticmethod
+    def compact_record(record):
+        # the record is shared with the other handlers, so it must not be modified
+        values = {field: getattr(record, field, None) for field in ARTIFACTOR_RECORD_FIELDS}
+        values['msg'] = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            values['exc_text'] = logging.Formatter().formatException(record.exc_info)
+        return [values[field] for field in ARTIFACTOR_RECORD_FIELDS]
+
+    def _ensure_shipper(self):
+        if self._shipper is not None and self._shipper.is_alive():
+            return
+        with self._shipper_lock:
+            if self._shipper is None or not self._shipper.is_alive():
+                self._shipper = threading.Thread(
+                    target=self._ship, name='artifactor-log-shipper')
+                self._shipper.daemon = True
+                self._shipper.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0, deadline - time())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _ship(self):
+        # the zmq sockets of the client are thread local, so the shipper needs its own client
+        client = type(self.artifactor)(self.artifactor.address, self.artifactor.port)
+        client.ready = True
+        while True:
+            batch = self._next_batch()
+            try:
+                client.fire_hook(
+                    'log_batch', records=pack_log_records(batch), slaveid=self.slaveid)
+            finally:
+                for __ in batch:
+                    self._queue.task_done()
+
     def emit(self, record):
-        if self.artifactor:
-            self.artifactor.fire_hook(
-                'log_message',
-                log_record=record.__dict__,
-                slaveid=self.slaveid,
-            )
+        if not self.artifactor:
+            return
+        try:
+            compact = self.compact_record(record)
+            self._ensure_shipper()
+            self._queue.put(compact, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """Block until all the queued records were handed to the artifactor"""
+        if self._shipper is not None and self._shipper.is_alive():
+            self._queue.join()
 
 
 logger, cfme_file_handler = setup_logger(logging.getLogger('cfme'))
 # Have wrapanapi log to the same FileHandler as cfme
 wrapanapi_logger, _ = setup_logger(logging.getLogger('wrapanapi'), cfme_file_handler)
-artifactor_handler = ArtifactorHandler()
+artifactor_handler = ArtifactorHandler(level=_artifactor_log_level())
 logger.addHandler(artifactor_handler)
 # Also have wrapanapi use the ArtifactorHandler to combine cfme+wrapanapi logging there
 wrapanapi_logger.addHandler(artifactor_handler)
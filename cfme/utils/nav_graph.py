@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Offline graph of the navigation destinations
+
+The destinations are registered with ``navigator.register`` when their modules are imported and
+their prerequisites are only resolved when a test navigates. :py:func:`compile_graph` goes over
+the destinations of the navigators instead and resolves the prerequisites which do not depend on
+the navigated object:
+
+* ``NavigateToSibling`` and ``NavigateToObject`` lead to a known destination, which must exist
+* ``NavigateToSibling`` of a class without the destination, like a mixin, leads to the destinations
+  of its subclasses, the chain ends there as ``dynamic``
+* ``NavigateToAttribute`` and custom ``prerequisite`` methods depend on the object, the chain ends
+  there as ``dynamic``
+* the default ``prerequisite`` is the root of the chain
+
+The destinations are named like in the navigation timings (:py:mod:`cfme.utils.nav_timing`),
+``<class name>/<destination>``, so the chains can be ranked by the measured times. Classes of the
+same name are named with their module.
+"""
+import importlib
+import pkgutil
+from inspect import isclass
+
+from navmazing import NavigateStep, NavigateToAttribute, NavigateToObject, NavigateToSibling
+
+# the packages with tests and pytest plugins do not register any destinations
+SKIPPED_PACKAGES = ('cfme.tests', 'cfme.fixtures', 'cfme.test_framework', 'cfme.scripting')
+
+# kinds of the prerequisites
+ROOT = 'root'
+STATIC = 'static'
+DYNAMIC = 'dynamic'
+BROKEN = 'broken'
+CYCLE = 'cycle'
+
+
+def _prerequisite(kind, target=None, detail=None):
+    return {'kind': kind, 'target': target, 'detail': detail}
+
+
+def import_modules(package_name='cfme', skipped=SKIPPED_PACKAGES):
+    """Imports all modules of the package so all their destinations get registered
+
+    Returns:
+        ``{module name: exception}`` of the modules which failed to import
+    """
+    package = importlib.import_module(package_name)
+    errors = {}
+
+    def onerror(name):
+        if not name.startswith(skipped):
+            errors[name] = 'failed to import the package'
+
+    for _, name, _ in pkgutil.walk_packages(package.__path__, package_name + '.', onerror):
+        if name.startswith(skipped) or '.tests.' in name or name.endswith('.tests'):
+            continue
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            errors[name] = e
+    return errors
+
+
+def _class_path(cls):
+    return '{}.{}'.format(cls.__module__, cls.__name__)
+
+
+def _subclasses(cls):
+    """All subclasses of the class, the class included"""
+    classes = [cls]
+    for klass in classes:
+        classes.extend(sub for sub in type.__subclasses__(klass) if sub not in classes)
+    return classes
+
+
+def _static_attribute(cls, name):
+    """The attribute as defined on the class, descriptors are not bound"""
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass, vars(klass)[name]
+    return None, None
+
+
+class NavigationGraph(object):
+    """Destinations of the navigators and their prerequisites, see :py:func:`compile_graph`"""
+    def __init__(self):
+        self.destinations = {}
+
+    def add_navigator(self, navigator, prefix=''):
+        """Adds all destinations of the navigator, named with the ``prefix``"""
+        keys = {}
+        classes = {}
+        for cls, name in navigator.dest_dict:
+            classes.setdefault(cls.__name__, set()).add(cls)
+        for cls, name in navigator.dest_dict:
+            # classes of the same name in different modules are told apart by the module
+            class_name = cls.__name__ if len(classes[cls.__name__]) == 1 else _class_path(cls)
+            keys[cls, name] = '{}{}/{}'.format(prefix, class_name, name)
+        for (cls, name), step in navigator.dest_dict.items():
+            self.destinations[keys[cls, name]] = {
+                'class': _class_path(cls),
+                'destination': name,
+                'step': _class_path(step),
+                'view': _class_path(step.VIEW) if isclass(getattr(step, 'VIEW', None)) else None,
+                'prerequisite': self._prerequisite_of(keys, cls, name, step),
+            }
+
+    @staticmethod
+    def _destination_key(keys, cls, name):
+        # the same lookup as the navigator does, destinations are inherited
+        for klass in cls.__mro__:
+            if (klass, name) in keys:
+                return keys[klass, name]
+        return None
+
+    def _prerequisite_of(self, keys, cls, name, step):
+        owner, prerequisite = _static_attribute(step, 'prerequisite')
+        if isinstance(prerequisite, (NavigateToSibling, NavigateToObject)):
+            if isinstance(prerequisite, NavigateToObject):
+                other = prerequisite.other_obj
+                cls = other if isclass(other) else type(other)
+            target = self._destination_key(keys, cls, prerequisite.target)
+            detail = '{}/{}'.format(cls.__name__, prerequisite.target)
+            if target is not None:
+                return _prerequisite(STATIC, target, detail)
+            if (isinstance(prerequisite, NavigateToSibling) and
+                    self._subclass_targets(keys, cls, name, prerequisite.target)):
+                # the sibling is looked up on the class of the navigated object
+                return _prerequisite(DYNAMIC, detail=detail)
+            return _prerequisite(BROKEN, detail=detail)
+        elif isinstance(prerequisite, NavigateToAttribute):
+            return _prerequisite(
+                DYNAMIC, detail='{}/{}'.format(prerequisite.attr_name, prerequisite.target))
+        elif owner is None or owner is NavigateStep:
+            return _prerequisite(ROOT)
+        else:
+            return _prerequisite(DYNAMIC, detail='{}.prerequisite'.format(_class_path(owner)))
+
+    def _subclass_targets(self, keys, cls, name, target):
+        """Destinations ``target`` of the subclasses which inherit the destination ``name``"""
+        targets = set()
+        for klass in _subclasses(cls):
+            if self._destination_key(keys, klass, name) == keys[cls, name]:
+                targets.add(self._destination_key(keys, klass, target))
+        targets.discard(None)
+        return targets
+
+    def chain(self, destination):
+        """The destinations navigated through, from the destination to the end of the chain
+
+        Returns:
+            ``(destinations, end)``, where end is the kind of the prerequisite the chain ends with,
+            :py:data:`CYCLE` when the chain comes back to one of its destinations
+        """
+        chain = [destination]
+        while True:
+            prerequisite = self.destinations[chain[-1]]['prerequisite']
+            if prerequisite['kind'] != STATIC:
+                return chain, prerequisite['kind']
+            if prerequisite['target'] in chain:
+                return chain + [prerequisite['target']], CYCLE
+            chain.append(prerequisite['target'])
+
+    def compile(self):
+        """Adds the chains to the destinations, returns the destinations"""
+        for destination, entry in self.destinations.items():
+            chain, end = self.chain(destination)
+            entry['chain'] = chain
+            entry['depth'] = len(chain) - 1
+            entry['end'] = end
+        return self.destinations
+
+    def problems(self):
+        """Destinations with broken prerequisites and cyclic chains, ``[(destination, message)]``"""
+        problems = []
+        for destination, entry in sorted(self.destinations.items()):
+            if entry['prerequisite']['kind'] == BROKEN:
+                problems.append((destination, 'prerequisite {} is not registered'.format(
+                    entry['prerequisite']['detail'])))
+            elif entry['end'] == CYCLE and entry['chain'][0] == entry['chain'][-1]:
+                problems.append((destination, 'cycle {}'.format(' -> '.join(entry['chain']))))
+        return problems
+
+    def deepest(self, timings=None):
+        """Destinations ordered by the depth of their chains, deepest first
+
+        Args:
+            timings: :py:class:`cfme.utils.nav_timing.NavigationTimings`, when given the chains are
+                ordered by the sum of the mean own times of their destinations instead
+
+        Returns:
+            List of ``(destination, depth, mean chain time in ms or None)``
+        """
+        result = []
+        for destination, entry in self.destinations.items():
+            chain_time = None
+            if timings is not None:
+                chain_time = sum(
+                    timings.destinations[step].mean('own')
+                    for step in set(entry['chain']) if step in timings.destinations)
+            result.append((destination, entry['depth'], chain_time))
+        return sorted(result, key=lambda item: (-(item[2] or 0), -item[1], item[0]))
+
+    def to_dict(self):
+        return {destination: dict(entry) for destination, entry in self.destinations.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls()
+        graph.destinations = {destination: dict(entry) for destination, entry in data.items()}
+        return graph
+
+
+def compile_graph(navigators):
+    """Compiles the graph of the destinations
+
+    Args:
+        navigators: List of ``(navigator, prefix)``, the prefix is put before the destination names
+    """
+    graph = NavigationGraph()
+    for navigator, prefix in navigators:
+        graph.add_navigator(navigator, prefix)
+    graph.compile()
+    return graph
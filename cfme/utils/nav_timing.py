@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Timings of the UI navigation steps
+
+Every ``go`` of a navigation step is recorded into :py:data:`timings` and aggregated per
+destination (``<class name>/<step name>``):
+
+* number of navigations, of retries (``go`` repeated after a badness check) and the maximal depth
+  of the nested navigations (prerequisites and retries)
+* total time and own time, ie. the total time without the nested navigations
+* time spent in the resetter and waiting for the view to be displayed
+* histogram of the total times, see :py:data:`BUCKETS`
+
+All the times are in milliseconds. The timings of several processes are combined with
+:py:meth:`NavigationTimings.merge`.
+"""
+import csv
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets in milliseconds, the last bucket is unbounded
+BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TIMES = ('total', 'own', 'resetter', 'wait_for_view')
+
+
+class StepTiming(object):
+    """Timing of one ``go`` of a navigation step, in seconds"""
+    def __init__(self, destination, depth=0, tries=1):
+        self.destination = destination
+        self.depth = depth
+        self.tries = tries
+        self.total = 0.0
+        self.nested = 0.0
+        self.resetter = 0.0
+        self.wait_for_view = 0.0
+
+    @property
+    def own(self):
+        return max(self.total - self.nested, 0.0)
+
+    @contextmanager
+    def measure(self, name):
+        """Adds the time spent in the block to the attribute ``name``"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            setattr(self, name, getattr(self, name) + time.time() - start)
+
+
+class DestinationStats(object):
+    """Aggregated timings of a destination"""
+    def __init__(self):
+        self.count = 0
+        self.retries = 0
+        self.max_depth = 0
+        self.max = 0
+        self.times = {name: 0 for name in TIMES}
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, timing):
+        total = int(timing.total * 1000)
+        self.count += 1
+        if timing.tries > 1:
+            self.retries += 1
+        self.max_depth = max(self.max_depth, timing.depth)
+        self.max = max(self.max, total)
+        for name in TIMES:
+            self.times[name] += int(getattr(timing, name) * 1000)
+        self.histogram[bisect_left(BUCKETS, total)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.retries += other.retries
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.max = max(self.max, other.max)
+        for name in TIMES:
+            self.times[name] += other.times[name]
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    def mean(self, name='total'):
+        return float(self.times[name]) / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Upper bound of the histogram bucket the percentile falls in, capped by the maximum"""
+        needed = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.histogram):
+            seen += count
+            if count and seen >= needed:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'retries': self.retries,
+            'max_depth': self.max_depth,
+            'max': self.max,
+            'times': dict(self.times),
+            'histogram': list(self.histogram),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.retries = data['retries']
+        stats.max_depth = data['max_depth']
+        stats.max = data['max']
+        stats.times.update(data['times'])
+        stats.histogram = list(data['histogram'])
+        return stats
+
+
+class NavigationTimings(object):
+    """Timings of the navigations, see :py:meth:`step`"""
+    def __init__(self):
+        self.destinations = {}
+        self._stack = []
+
+    @contextmanager
+    def step(self, destination, tries=1):
+        """Times the navigation to ``destination`` done in the block
+
+        Navigations started inside the block are nested, their time is not part of the own time.
+
+        Yields:
+            The :py:class:`StepTiming`, for measuring the parts of the navigation
+        """
+        timing = StepTiming(destination, depth=len(self._stack), tries=tries)
+        self._stack.append(timing)
+        start = time.time()
+        try:
+            yield timing
+        finally:
+            timing.total = time.time() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].nested += timing.total
+            self.destinations.setdefault(destination, DestinationStats()).add(timing)
+
+    def clear(self):
+        self.destinations.clear()
+
+    def merge(self, other):
+        for destination, stats in other.destinations.items():
+            self.destinations.setdefault(destination, DestinationStats()).merge(stats)
+
+    def to_dict(self):
+        return {
+            destination: stats.to_dict() for destination, stats in self.destinations.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        timings = cls()
+        timings.destinations = {
+            destination: DestinationStats.from_dict(stats) for destination, stats in data.items()}
+        return timings
+
+    def slowest(self, key='total'):
+        """Destinations and their stats ordered by the sum of the ``key`` times, slowest first"""
+        return sorted(
+            self.destinations.items(), key=lambda item: (-item[1].times[key], item[0]))
+
+    def rows(self):
+        """Header and the rows of a table of all destinations, slowest first"""
+        yield (
+            ['destination', 'count', 'retries', 'max_depth'] +
+            ['{}_ms'.format(name) for name in TIMES] +
+            ['mean_ms', 'p50_ms', 'p95_ms', 'max_ms'] +
+            ['le_{}_ms'.format(bound) for bound in BUCKETS] + ['gt_{}_ms'.format(BUCKETS[-1])])
+        for destination, stats in self.slowest():
+            yield (
+                [destination, stats.count, stats.retries, stats.max_depth] +
+                [stats.times[name] for name in TIMES] +
+                [int(stats.mean()), stats.percentile(0.5), stats.percentile(0.95), stats.max] +
+                stats.histogram)
+
+    def write_csv(self, stream):
+        writer = csv.writer(stream)
+        for row in self.rows():
+            writer.writerow(row)
+
+    def summary(self, entries=10):
+        """Lines of a table of the ``entries`` slowest destinations"""
+        lines = ['{:>10}  {:>10}  {:>6}  {:>8}  {:>8}  {:>8}  {:>8}  {}'.format(
+            'total s', 'own s', 'count', 'mean ms', 'p95 ms', 'wait ms', 'retries', 'destination')]
+        for destination, stats in self.slowest()[:entries]:
+            lines.append('{:>10.1f}  {:>10.1f}  {:>6}  {:>8}  {:>8}  {:>8}  {:>8}  {}'.format(
+                stats.times['total'] / 1000.0, stats.times['own'] / 1000.0, stats.count,
+                int(stats.mean()), stats.percentile(0.95), int(stats.mean('wait_for_view')),
+                stats.retries, destination))
+        return lines
+
+
+timings = NavigationTimings()
@@ -241,3 +241,69 @@ def query_resource_attributes(resource, soft_assert=None):
                 failure.type, failure.name, failure.response.status_code, failure.error))
 
     return outcome
+
+
+class RestInventory(object):
+    """Index of the resources of a REST collection, loaded with a single request.
+
+    All the resources are fetched in one expanded query, limited to the ``attributes``, and
+    indexed, so looking resources up by id, name, guid or ``ems_id`` needs no more requests.
+
+    Args:
+        collection: REST API collection, eg. ``appliance.rest_api.collections.vms``.
+        attributes: Attributes of the resources to load, ``id`` is always loaded.
+    """
+    INDEXED = ('name', 'guid', 'ems_id')
+
+    def __init__(self, collection, attributes=('name', 'type', 'guid', 'ems_id')):
+        self.collection = collection
+        self.attributes = ('id', ) + tuple(attr for attr in attributes if attr != 'id')
+        self._resources = None
+        self._by_id = None
+        self._indexes = None
+
+    def refresh(self):
+        """Load the resources again, eg. when some were added since the last load."""
+        # the raw data, a missing attribute of an entity would reload the entity with a request
+        result = self.collection._api.get(
+            self.collection._href, expand='resources', attributes=','.join(self.attributes))
+        self._resources = [
+            {attr: resource.get(attr) for attr in self.attributes}
+            for resource in result.get('resources', [])]
+        self._by_id = {resource['id']: resource for resource in self._resources}
+        self._indexes = {attr: {} for attr in self.INDEXED if attr in self.attributes}
+        for resource in self._resources:
+            for attr, index in self._indexes.items():
+                index.setdefault(resource[attr], []).append(resource)
+        return self
+
+    @property
+    def loaded(self):
+        return self._resources is not None
+
+    @property
+    def resources(self):
+        """List of all resources as dictionaries of their attributes."""
+        if self._resources is None:
+            self.refresh()
+        return self._resources
+
+    def get(self, resource_id, default=None):
+        if not self.loaded:
+            self.refresh()
+        return self._by_id.get(resource_id, default)
+
+    def find(self, **attributes):
+        """Resources with the given values of the attributes, in the collection order.
+
+        Example:
+            ``inventory.find(name='my-vm', ems_id=provider_id)``
+        """
+        resources = self.resources
+        for attr, value in attributes.items():
+            if attr in self._indexes:
+                resources = self._indexes[attr].get(value, [])
+                break
+        return [
+            resource for resource in resources
+            if all(resource.get(attr) == value for attr, value in attributes.items())]
@@ -27,6 +27,8 @@ import six
 # Default blocking time before giving up on an ssh command execution,
 # in seconds (float)
 RUNCMD_TIMEOUT = 1200.0
+# bytes read from the channel at once by SSHClient.stream_command
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 @attr.s(frozen=True)
@@ -286,13 +288,14 @@ class SSHClient(paramiko.SSHClient):
             logger.error("command %s couldn't finish in given timeout %s", command, timeout)
             raise
 
-    def _run_command(self, command, timeout=RUNCMD_TIMEOUT, reraise=False, ensure_host=False,
-                     ensure_user=False, container=None):
-        if isinstance(command, dict):
-            command = VersionPicker(command).pick(self.vmdb_version)
-        original_command = command
+    def _wrap_command(self, command, ensure_host=False, ensure_user=False, container=None,
+                      sudo='sudo -i'):
+        """Wraps the command to run in the container/pod and with sudo where needed.
+
+        Returns:
+            A tuple of the wrapped command and whether it uses sudo.
+        """
         uses_sudo = False
-        logger.info("Running command %r", command)
         container = container or self._container
         if self.is_pod and not ensure_host:
             # This command will be executed in the context of the host provider
@@ -307,8 +310,17 @@ class SSHClient(paramiko.SSHClient):
 
         if self.username != 'root' and not ensure_user:
             # We need sudo
-            command = 'sudo -i bash -c {command}'.format(command=quote(command))
+            command = '{sudo} bash -c {command}'.format(sudo=sudo, command=quote(command))
             uses_sudo = True
+        return command, uses_sudo
+
+    def _run_command(self, command, timeout=RUNCMD_TIMEOUT, reraise=False, ensure_host=False,
+                     ensure_user=False, container=None):
+        if isinstance(command, dict):
+            command = VersionPicker(command).pick(self.vmdb_version)
+        original_command = command
+        logger.info("Running command %r", command)
+        command, uses_sudo = self._wrap_command(command, ensure_host, ensure_user, container)
 
         if command != original_command:
             logger.info("> Actually running command %r", command)
@@ -394,6 +406,48 @@ class SSHClient(paramiko.SSHClient):
         # Return whatever we have in the output
         return SSHResult(rc=1, output=''.join(output), command=command)
 
+    def stream_command(self, command, fileobj, timeout=RUNCMD_TIMEOUT, ensure_host=False,
+                       chunk_size=STREAM_CHUNK_SIZE):
+        """Run a command over SSH and write its standard output to a file as it arrives.
+
+        Unlike :py:meth:`run_command`, the output is neither decoded nor kept in memory, so it
+        suits big and binary outputs like ``tar -cz`` or ``gzip -c``. There is no pseudo-tty, so
+        non-root users run the command through ``sudo -n``.
+
+        Args:
+            command: The command.
+            fileobj: File-like object opened for writing in binary mode.
+            timeout: Timeout for a single read from the channel.
+            ensure_host: See :py:meth:`run_command`.
+        Returns:
+            A :py:class:`SSHResult` instance with the standard error output.
+        """
+        original_command = command
+        command, _ = self._wrap_command(command, ensure_host=ensure_host, sudo='sudo -n')
+        logger.info("Streaming output of command %r", original_command)
+        session = self.get_transport().open_session()
+        errors = []
+        try:
+            session.settimeout(float(timeout))
+            session.exec_command(command)
+            while True:
+                data = session.recv(chunk_size)
+                if not data:
+                    break
+                fileobj.write(data)
+                # keep the stderr window open so the command can't block on it
+                while session.recv_stderr_ready():
+                    errors.append(session.recv_stderr(chunk_size))
+            exit_status = session.recv_exit_status()
+            while session.recv_stderr_ready():
+                errors.append(session.recv_stderr(chunk_size))
+        finally:
+            session.close()
+        output = b''.join(errors).decode('utf-8', 'replace')
+        if exit_status != 0:
+            logger.warning('Exit code %d!', exit_status)
+        return SSHResult(rc=exit_status, output=output, command=original_command)
+
     def cpu_spike(self, seconds=60, cpus=2, **kwargs):
         """Creates a CPU spike of specific length and processes.
 
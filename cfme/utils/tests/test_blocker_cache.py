@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from datetime import date, datetime
+
+import pytest
+from six.moves.xmlrpc_client import DateTime
+
+from cfme.utils.blocker_cache import BlockerCache
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return BlockerCache(tmpdir.join('blockers.sqlite').strpath)
+
+
+def test_roundtrip(cache):
+    cache.set('BZ', 123, {'id': 123, 'status': 'NEW'})
+    assert cache.get('BZ', 123) == {'id': 123, 'status': 'NEW'}
+    assert cache.get('BZ', '123') == {'id': 123, 'status': 'NEW'}
+    assert cache.get('GH', 123) is None
+
+
+def test_many_and_missing(cache):
+    cache.set_many('JIRA', {'FOO-1': 'Done', 'FOO-2': 'Open'})
+    assert cache.get_many('JIRA', ['FOO-1', 'FOO-2', 'FOO-3']) == {
+        'FOO-1': 'Done', 'FOO-2': 'Open'}
+    assert cache.missing('JIRA', ['FOO-1', 'FOO-3']) == {'FOO-3'}
+
+
+def test_shared_between_instances(cache):
+    cache.set('BZ', 1, {'id': 1})
+    assert BlockerCache(cache.path).get('BZ', 1) == {'id': 1}
+
+
+def test_ttl(cache):
+    cache.set('BZ', 1, {'id': 1})
+    assert BlockerCache(cache.path, ttl=-1).get('BZ', 1) is None
+
+
+def test_disabled():
+    cache = BlockerCache(None)
+    cache.set('BZ', 1, {'id': 1})
+    assert cache.get('BZ', 1) is None
+
+
+def test_dates(cache):
+    data = {
+        'last_change_time': DateTime('20180102T03:04:05'),
+        'created': datetime(2018, 1, 2, 3, 4, 5, 6),
+        'deadline': date(2018, 1, 2),
+    }
+    cache.set('BZ', 1, data)
+    loaded = cache.get('BZ', 1)
+    assert isinstance(loaded['last_change_time'], DateTime)
+    assert loaded['last_change_time'].value == '20180102T03:04:05'
+    assert loaded['created'] == data['created']
+    assert loaded['deadline'] == data['deadline']
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import pytest
+from bugzilla.bug import Bug
+
+from cfme.utils.blocker_cache import BlockerCache
+from cfme.utils.bz import Bugzilla
+
+
+class FakeBugzillaApi(object):
+    url = 'https://bugzilla.example.com/xmlrpc.cgi'
+
+    def __init__(self, bugs):
+        self.bugs = bugs
+        self.queries = []
+
+    def post_translation(self, query, bug):
+        pass
+
+    def _get_bug_aliases(self):
+        return [('id', 'bug_id')]
+
+    def getbugs(self, ids, permissive=False):
+        self.queries.append(list(ids))
+        return [
+            Bug(self, dict=dict(self.bugs[bug_id])) if bug_id in self.bugs else None
+            for bug_id in ids]
+
+
+def bug_data(bug_id, dupe_of=None, blocks=()):
+    return {
+        'id': bug_id,
+        'status': 'CLOSED' if dupe_of else 'NEW',
+        'resolution': 'DUPLICATE' if dupe_of else '',
+        'dupe_of': dupe_of,
+        'blocks': list(blocks),
+        'comments': [{'text': 'Description of bug {}'.format(bug_id)}],
+    }
+
+
+@pytest.fixture
+def api():
+    return FakeBugzillaApi({
+        1: bug_data(1),
+        2: bug_data(2, dupe_of=3),
+        3: bug_data(3, blocks=[4]),
+        4: bug_data(4),
+    })
+
+
+def bugzilla(api, cache=None):
+    bz = Bugzilla(url=api.url, cache=cache)
+    bz.bugzilla = api
+    return bz
+
+
+def test_get_bugs(api):
+    bz = bugzilla(api)
+    assert sorted(bz.get_bugs([1, 2, 99])) == [1, 2]
+    # the bugs already loaded are returned as well, only the others are queried
+    bugs = bz.get_bugs(['1', 3])
+    assert sorted(bugs) == [1, 3]
+    assert bugs[3].id == 3
+    assert api.queries == [[1, 2, 99], [3]]
+
+
+def test_get_bugs_disk_cache(api, tmpdir):
+    cache = BlockerCache(tmpdir.join('blockers.sqlite').strpath)
+    bugzilla(api, cache).get_bugs([1, 2])
+    api.queries = []
+
+    bugs = bugzilla(api, cache).get_bugs([1, 2, 3])
+    assert sorted(bugs) == [1, 2, 3]
+    assert bugs[2].dupe_of == 3
+    assert api.queries == [[3]]
+
+
+def test_prefetch(api):
+    bz = bugzilla(api)
+    bz.prefetch([2])
+    # the duplicate first, then the bug it blocks
+    assert api.queries == [[2], [3], [4]]
+    assert bz.bug_count == 3
+    assert {bug.id for bug in bz.get_bug_variants(2)} == {3}
+    assert len(api.queries) == 3
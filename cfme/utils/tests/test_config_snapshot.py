@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import os
+
+from cfme.test_framework.config import Configuration, ConfigSnapshot
+
+
+def configure(tmpdir):
+    configuration = Configuration()
+    configuration.configure(
+        config_dir=tmpdir.strpath, snapshot_file=tmpdir.join('.snapshot').strpath)
+    return configuration
+
+
+def test_snapshot_shared(tmpdir):
+    tmpdir.join('env.yaml').write('a:\n  b: 1\n  c: [1, {x: 2}]\n')
+    assert configure(tmpdir).get_config('env').a.c[1].x == 2
+    assert oct(os.stat(tmpdir.join('.snapshot').strpath).st_mode & 0o777) == oct(0o600)
+
+    # another process gets the parsed data from the snapshot
+    snapshot = ConfigSnapshot(tmpdir.join('.snapshot').strpath)
+    assert list(snapshot.entries) == ['env']
+    env = configure(tmpdir).get_config('env')
+    assert env.a.b == 1
+    assert env.a.c[1].x == 2
+
+
+def test_snapshot_invalidated(tmpdir):
+    tmpdir.join('env.yaml').write('a: 1\n')
+    assert configure(tmpdir).get_config('env').a == 1
+    tmpdir.join('env.yaml').write('a: 22\n')
+    assert configure(tmpdir).get_config('env').a == 22
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from cfme.utils.coverage_merge import CoverageMerger, merge_line_coverage
+
+
+def test_merge_line_coverage():
+    assert merge_line_coverage([None, 0, 1], [None, 2, 0]) == [None, 2, 1]
+
+
+@pytest.mark.parametrize('source', [[None, 0], [0, 0, 0]], ids=['length', 'null-mismatch'])
+def test_merge_line_coverage_mismatch(source):
+    with pytest.raises(ValueError):
+        merge_line_coverage([None, None, 0], source)
+
+
+def test_merger_paths(tmpdir):
+    paths = []
+    for i, lines in enumerate([[None, 1, 0], [None, 0, 0], [None, 2, 0]]):
+        path = tmpdir.join('{}.json'.format(i))
+        path.write(json.dumps({
+            '10.0.0.{}-1'.format(i): {
+                'coverage': {'/a.rb': lines, '/b{}.rb'.format(i): [1]},
+                'timestamp': i}}))
+        paths.append(path.strpath)
+    merger = CoverageMerger()
+    merger.merge_paths(paths, workers=2)
+    assert merger.merged_count == 3
+    assert merger.coverage['/a.rb'] == [None, 3, 0]
+    assert merger.timestamp == 2
+    # 4 of the 5 relevant lines are covered
+    assert merger.covered_percent == 80.0
+    merger.write(tmpdir.join('merged').strpath)
+    written = json.loads(tmpdir.join('merged', '.resultset.json').read())
+    assert written['merged_data']['coverage']['/a.rb'] == [None, 3, 0]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+from pkg_resources import EntryPoint
+
+from cfme.utils import entry_points
+
+
+@pytest.fixture
+def groups(monkeypatch):
+    monkeypatch.setattr(entry_points, '_group_cache', {
+        'test.first': {
+            'dumps': EntryPoint.parse('dumps = json:dumps'),
+            'missing': EntryPoint.parse('missing = cfme_no_such_module:thing'),
+        },
+        'test.second': {
+            'dumps': EntryPoint.parse('dumps = json:loads'),
+        },
+    })
+    monkeypatch.setattr(entry_points, '_registry_cache', {})
+
+
+def test_registry_is_lazy(groups):
+    registry = entry_points.registry('test.first')
+    assert set(registry) == {'dumps', 'missing'}
+    assert 'missing' in registry
+    assert registry.targets['missing'] == 'cfme_no_such_module:thing'
+    assert registry['dumps'] is json.dumps
+    with pytest.raises(ImportError):
+        registry['missing']
+    with pytest.raises(KeyError):
+        registry['unknown']
+
+
+def test_registry_groups(groups):
+    assert entry_points.registry('test.first', 'test.second')['dumps'] is json.loads
+    assert entry_points.registry('test.first') is entry_points.registry('test.first')
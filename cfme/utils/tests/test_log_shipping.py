@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from cfme.utils.log import ArtifactorHandler, pack_log_records, unpack_log_records
+
+
+def make_record(msg, *args):
+    return logging.LogRecord(
+        'cfme', logging.INFO, 'cfme/utils/log.py', 42, msg, args, None, func='test')
+
+
+def test_compact_record_keeps_original():
+    record = make_record('%s of %d', u'ěšč', 3)
+    compact = ArtifactorHandler.compact_record(record)
+    assert u'ěšč of 3' in compact
+    assert record.msg == '%s of %d'
+    assert record.args == (u'ěšč', 3)
+
+
+def test_pack_unpack_roundtrip():
+    records = [
+        ArtifactorHandler.compact_record(make_record('message %d', i)) for i in range(3)]
+    unpacked = unpack_log_records(pack_log_records(records))
+    assert [record.getMessage() for record in unpacked] == [
+        'message 0', 'message 1', 'message 2']
+    assert all(record.levelno == logging.INFO for record in unpacked)
+    assert unpacked[0].pathname == 'cfme/utils/log.py'
+    assert unpacked[0].lineno == 42
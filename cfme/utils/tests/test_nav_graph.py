@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from navmazing import Navigate, NavigateStep, NavigateToAttribute, NavigateToSibling
+
+from cfme.utils.nav_graph import BROKEN, CYCLE, DYNAMIC, ROOT, compile_graph
+from cfme.utils.nav_timing import NavigationTimings
+
+navigator = Navigate()
+
+
+class Provider(object):
+    pass
+
+
+class Taggable(object):
+    pass
+
+
+class Unused(object):
+    pass
+
+
+class Vm(Taggable):
+    pass
+
+
+class Template(Vm):
+    pass
+
+
+class Looping(object):
+    pass
+
+
+@navigator.register(Provider, 'All')
+class ProviderAll(NavigateStep):
+    pass
+
+
+@navigator.register(Provider, 'Details')
+class ProviderDetails(NavigateStep):
+    prerequisite = NavigateToSibling('All')
+
+
+@navigator.register(Vm, 'All')
+class VmAll(NavigateStep):
+    prerequisite = NavigateToAttribute('provider', 'Details')
+
+
+@navigator.register(Vm, 'Details')
+class VmDetails(NavigateStep):
+    prerequisite = NavigateToSibling('All')
+
+
+@navigator.register(Template, 'Edit')
+class TemplateEdit(NavigateStep):
+    prerequisite = NavigateToSibling('Details')
+
+
+@navigator.register(Vm, 'Missing')
+class VmMissing(NavigateStep):
+    prerequisite = NavigateToSibling('Nowhere')
+
+
+@navigator.register(Taggable, 'EditTags')
+class TaggableEditTags(NavigateStep):
+    prerequisite = NavigateToSibling('Details')
+
+
+@navigator.register(Unused, 'Edit')
+class UnusedEdit(NavigateStep):
+    prerequisite = NavigateToSibling('Details')
+
+
+@navigator.register(Looping, 'A')
+class LoopingA(NavigateStep):
+    prerequisite = NavigateToSibling('B')
+
+
+@navigator.register(Looping, 'B')
+class LoopingB(NavigateStep):
+    prerequisite = NavigateToSibling('A')
+
+
+def test_chains():
+    graph = compile_graph([(navigator, '')])
+    destinations = graph.destinations
+    assert destinations['Provider/Details']['chain'] == ['Provider/Details', 'Provider/All']
+    assert destinations['Provider/Details']['end'] == ROOT
+    assert destinations['Provider/Details']['step'].endswith('.ProviderDetails')
+    # the sibling of a subclass is inherited from the parent class
+    assert destinations['Template/Edit']['chain'] == ['Template/Edit', 'Vm/Details', 'Vm/All']
+    assert destinations['Template/Edit']['depth'] == 2
+    assert destinations['Template/Edit']['end'] == DYNAMIC
+    assert destinations['Vm/All']['prerequisite']['detail'] == 'provider/Details'
+    assert destinations['Vm/Missing']['end'] == BROKEN
+    assert destinations['Looping/A']['end'] == CYCLE
+    # the sibling of a mixin is looked up on the classes using it
+    assert destinations['Taggable/EditTags']['end'] == DYNAMIC
+    assert destinations['Taggable/EditTags']['prerequisite']['detail'] == 'Taggable/Details'
+    assert destinations['Unused/Edit']['end'] == BROKEN
+
+    assert graph.problems() == [
+        ('Looping/A', 'cycle Looping/A -> Looping/B -> Looping/A'),
+        ('Looping/B', 'cycle Looping/B -> Looping/A -> Looping/B'),
+        ('Unused/Edit', 'prerequisite Unused/Details is not registered'),
+        ('Vm/Missing', 'prerequisite Vm/Nowhere is not registered'),
+    ]
+
+
+def test_deepest():
+    graph = compile_graph([(navigator, '')])
+    assert graph.deepest()[:3] == [
+        ('Looping/A', 2, None), ('Looping/B', 2, None), ('Template/Edit', 2, None)]
+
+    timings = NavigationTimings()
+    with timings.step('Provider/All'):
+        pass
+    timings.destinations['Provider/All'].times['own'] = 5000
+    assert graph.deepest(timings)[0] == ('Provider/Details', 1, 5000.0)
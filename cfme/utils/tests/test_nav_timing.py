@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from six.moves import StringIO
+
+from cfme.utils import nav_timing
+from cfme.utils.nav_timing import NavigationTimings
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_nested_steps(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(nav_timing.time, 'time', clock)
+    timings = NavigationTimings()
+    with timings.step('Vm/Details') as timing:
+        clock.now += 0.2
+        with timings.step('Vm/All'):
+            clock.now += 1.5
+        with timing.measure('wait_for_view'):
+            clock.now += 0.3
+    with timings.step('Vm/All', tries=2):
+        clock.now += 0.05
+
+    details = timings.destinations['Vm/Details']
+    assert details.count == 1
+    assert details.times == {'total': 2000, 'own': 500, 'resetter': 0, 'wait_for_view': 300}
+    all_stats = timings.destinations['Vm/All']
+    assert all_stats.count == 2
+    assert all_stats.retries == 1
+    assert all_stats.max_depth == 1
+    assert all_stats.max == 1500
+    assert all_stats.histogram[0] == 1  # 50ms
+    assert all_stats.histogram[4] == 1  # 1500ms
+    assert all_stats.percentile(0.5) == 100
+    assert all_stats.percentile(1) == 1500
+    assert [destination for destination, _ in timings.slowest()] == ['Vm/Details', 'Vm/All']
+
+
+def test_merge_and_export():
+    timings = NavigationTimings()
+    with timings.step('Vm/All'):
+        pass
+    merged = NavigationTimings.from_dict(timings.to_dict())
+    merged.merge(timings)
+    assert merged.destinations['Vm/All'].count == 2
+
+    stream = StringIO()
+    merged.write_csv(stream)
+    header, row = stream.getvalue().splitlines()
+    assert header.startswith('destination,count,retries')
+    assert row.startswith('Vm/All,2,0,0')
+    assert len(merged.summary()) == 2
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import pytest
+from dateutil.tz import tzutc
+
+from cfme.common.provider import RefreshWatcher
+
+NOW = datetime.datetime(2018, 5, 1, 12, 0, 0, tzinfo=tzutc())
+OLD = NOW - datetime.timedelta(hours=2)
+
+
+class FakeTask(object):
+    def __init__(self, api, task_id):
+        self.api = api
+        self.id = task_id
+        self.state = 'Queued'
+
+    def reload(self):
+        self.state = self.api.task_states.get(self.id, self.state)
+
+
+class FakeResponse(object):
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeRestApi(object):
+    """Provider refreshes, each refresh creates a task and runs ``on_refresh``"""
+    def __init__(self, last_refresh_date, on_refresh=None):
+        self.last_refresh_date = last_refresh_date
+        self.on_refresh = on_refresh
+        self.task_states = {}
+        self.tasks = []
+        self.response = None
+        api = self
+
+        class Action(object):
+            def refresh(self):
+                task_id = str(len(api.tasks) + 1)
+                api.tasks.append(task_id)
+                # the result of the action links the provider, not the task
+                api.response = FakeResponse({
+                    'success': True, 'href': Provider.href, 'task_id': task_id,
+                    'task_href': 'https://appliance/api/tasks/{}'.format(task_id)})
+                if api.on_refresh is not None:
+                    api.on_refresh(api, task_id)
+                return Provider
+
+        class Provider(object):
+            href = 'https://appliance/api/providers/1'
+            action = Action()
+
+        self.provider = Provider
+        self.collections = type(
+            'Collections', (object, ),
+            {'providers': type('Providers', (object, ), {'get': lambda self, name: Provider})()})
+
+    def get(self, href, attributes=None):
+        assert href == self.provider.href
+        date = self.last_refresh_date
+        return {'last_refresh_date': date.isoformat() if date else None}
+
+    def get_entity(self, collection, entity_id):
+        assert collection == 'tasks'
+        return FakeTask(self, entity_id)
+
+
+class FakeProvider(object):
+    name = 'provider'
+
+    def __init__(self, rest_api):
+        self.appliance = type('Appliance', (object, ), {
+            'rest_api': rest_api, 'utc_time': staticmethod(lambda: NOW)})()
+
+
+def test_task_finished():
+    rest_api = FakeRestApi(OLD)
+    watcher = RefreshWatcher(FakeProvider(rest_api))
+    assert watcher.task_finished is None
+    assert not watcher.is_refreshed()
+
+    watcher.refresh()
+    assert watcher.task_finished is False
+    # the provider is not even queried while the task runs
+    rest_api.last_refresh_date = None
+    assert not watcher.is_refreshed()
+
+    rest_api.task_states['1'] = 'Finished'
+    rest_api.last_refresh_date = NOW
+    assert watcher.task_finished is True
+    assert watcher.is_refreshed()
+
+
+def test_stale_refresh_restarted():
+    def on_refresh(api, task_id):
+        # the tasks finish right away, only the second one refreshes the provider
+        api.task_states[task_id] = 'Finished'
+        if task_id == '2':
+            api.last_refresh_date = NOW
+
+    rest_api = FakeRestApi(OLD, on_refresh)
+    watcher = RefreshWatcher(FakeProvider(rest_api))
+    watcher.wait(num_sec=10, delay=0.01)
+    assert watcher.refreshes == 2
+    assert rest_api.tasks == ['1', '2']
+    assert watcher.last_refresh_date == NOW
+
+
+@pytest.mark.parametrize('result', [
+    {'task_ids': ['7', '8']},
+    {'success': True},
+], ids=['task-ids', 'no-task'])
+def test_refresh_tasks(result):
+    rest_api = FakeRestApi(OLD, lambda api, task_id: setattr(api, 'response', FakeResponse(result)))
+    watcher = RefreshWatcher(FakeProvider(rest_api))
+    watcher.refresh()
+    assert [task.id for task in watcher._tasks] == result.get('task_ids', [])
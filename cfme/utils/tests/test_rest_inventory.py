@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from cfme.utils.rest import RestInventory
+
+
+class FakeApi(object):
+    def __init__(self, resources):
+        self.resources = resources
+        self.requests = []
+
+    def get(self, url, **params):
+        self.requests.append((url, params))
+        # like the REST API, attributes with None values are left out
+        return {'resources': [
+            {key: value for key, value in resource.items() if value is not None}
+            for resource in self.resources]}
+
+
+class FakeEntity(object):
+    def __init__(self, api, href, **data):
+        self._api = api
+        self._href = href
+        for key, value in data.items():
+            if value is not None:
+                setattr(self, key, value)
+
+    def __getattr__(self, attr):
+        # like the REST client entities, a missing attribute reloads the entity
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        self._api.requests.append((self._href, {}))
+        raise AttributeError(attr)
+
+
+class FakeCollection(object):
+    _href = 'https://appliance/api/vms'
+
+    def __init__(self, resources):
+        self._api = FakeApi(resources)
+
+    def query_string(self, **params):
+        self._api.requests.append((self._href, params))
+        return type('SearchResult', (object, ), {'resources': [
+            FakeEntity(self._api, '{}/{}'.format(self._href, resource['id']), **resource)
+            for resource in self._api.resources]})
+
+
+def test_inventory_single_query():
+    collection = FakeCollection([
+        dict(id=1, name='vm1', guid='a', ems_id=1, type=None),
+        dict(id=2, name='vm2', guid='b', ems_id=2, type='Vm'),
+        dict(id=3, name='vm1', guid='c', ems_id=2, type='Vm'),
+    ])
+    inventory = RestInventory(collection)
+    assert not inventory.loaded
+    assert [vm['id'] for vm in inventory.find(name='vm1')] == [1, 3]
+    assert [vm['id'] for vm in inventory.find(name='vm1', ems_id=2)] == [3]
+    assert inventory.find(guid='x') == []
+    assert inventory.get(2)['name'] == 'vm2'
+    assert inventory.get(1)['type'] is None
+    # the null attributes cost no more requests
+    assert collection._api.requests == [
+        (collection._href, {'expand': 'resources', 'attributes': 'id,name,type,guid,ems_id'})]
+
+    collection._api.resources.append(dict(id=4, name='vm4'))
+    assert inventory.find(name='vm4') == []
+    assert inventory.refresh().find(name='vm4')[0]['id'] == 4
+    assert len(collection._api.requests) == 2
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from widgetastic_manageiq import parse_snapshot, snapshot_normalized_text, snapshot_text
+
+
+@pytest.mark.parametrize('html, text, normalized_text', [
+    ('<td>  vm1 </td>', 'vm1', 'vm1'),
+    ('<td>\n  Power\t\t State \n</td>', 'Power State', 'Power State'),
+    ('<td><span>Name</span> <a href="#">vm <b>one</b></a></td>', 'Name vm one', 'Name vm one'),
+    ('<td><span>Power</span><span>On</span></td>', 'PowerOn', 'PowerOn'),
+    ('<td>first<br>second</td>', 'first\nsecond', 'first second'),
+    ('<td>a<div>b <p> c </p></div>d</td>', 'a\nb\nc\nd', 'a b c d'),
+    ('<td><ul><li> one </li><li><i>two</i></li></ul></td>', 'one\ntwo', 'one two'),
+    ('<td><div>  </div>text<br><br></td>', 'text', 'text'),
+    ('<td>   </td>', '', ''),
+], ids=['strip', 'inner_whitespace', 'nested_inline', 'adjacent_inline', 'br',
+        'nested_blocks', 'list', 'empty_lines', 'blank'])
+def test_snapshot_text(html, text, normalized_text):
+    element = parse_snapshot(html)
+    assert snapshot_text(element) == text
+    assert snapshot_normalized_text(element) == normalized_text
+
+
+def test_snapshot_text_of_nested_element():
+    tree = parse_snapshot(
+        '<table><tbody>'
+        '<tr><td> Name </td><td><div>vm1</div><div> on  host </div></td></tr>'
+        '<tr><td>IP<br>Addresses</td><td>10.0.0.1<br>10.0.0.2</td></tr>'
+        '</tbody></table>')
+    rows = tree.xpath('.//tr')
+    assert snapshot_text(rows[0]) == 'Name\nvm1\non host'
+    assert snapshot_text(rows[0].xpath('./td[2]')[0]) == 'vm1\non host'
+    assert snapshot_normalized_text(rows[1].xpath('./td[1]')[0]) == 'IP Addresses'
+    assert snapshot_text(rows[1].xpath('./td[2]')[0]) == '10.0.0.1\n10.0.0.2'
+
+
+def test_snapshot_normalized_text_like_normalize_space():
+    element = parse_snapshot('<td>\n <span> Running </span>\t<a>  since  <b>today</b> </a>\n</td>')
+    assert snapshot_normalized_text(element) == element.xpath('normalize-space(.)')
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import lxml.html
+import pytest
+import six
+from smartloc import Locator
+from widgetastic.browser import Browser
+
+from widgetastic_manageiq import Table
+
+HEADER_IN_HEAD = """
+<table>
+  <thead><tr><th>Name</th><th> Power  State </th><th></th></tr></thead>
+  <tbody>
+    <tr><td>vm1</td><td>on</td><td><input type="checkbox"></td></tr>
+    <tr><td>vm2</td><td>
+      off
+    </td><td><input type="checkbox"></td></tr>
+    <tr><td>vm3</td><td>suspended</td><td><input type="checkbox"></td></tr>
+  </tbody>
+</table>
+"""
+
+HEADER_IN_BODY = """
+<table>
+  <tbody>
+    <tr><th>Name</th><th> Power  State </th><th></th></tr>
+    <tr><td>vm1</td><td>on</td><td><input type="checkbox"></td></tr>
+    <tr><td>vm2</td><td>
+      off
+    </td><td><input type="checkbox"></td></tr>
+    <tr><td>vm3</td><td>suspended</td><td><input type="checkbox"></td></tr>
+  </tbody>
+</table>
+"""
+
+
+class FakeBrowser(Browser):
+    """Looks the elements up in a static HTML page instead of a live browser"""
+    def __init__(self, html):
+        Browser.__init__(self, selenium=None)
+        self.tree = lxml.html.fromstring('<div>{}</div>'.format(html))
+
+    def elements(self, locator, parent=None, *args, **kwargs):
+        if hasattr(locator, '__locator__'):
+            locator = locator.__locator__()
+        if isinstance(locator, Locator):
+            _, locator = locator
+        if not isinstance(locator, six.string_types):
+            return [locator]
+        root = self.tree if parent is None else self.elements(parent)[0]
+        return root.xpath(locator)
+
+    def element(self, locator, *args, **kwargs):
+        return self.elements(locator, *args, **kwargs)[0]
+
+    def execute_script(self, script, *args, **kwargs):
+        return lxml.html.tostring(args[0], encoding='unicode')
+
+
+@pytest.fixture(params=[HEADER_IN_HEAD, HEADER_IN_BODY], ids=['thead', 'tbody'])
+def table(request):
+    return Table(FakeBrowser(request.param), './/table')
+
+
+def test_parse(table):
+    rows = table.parse()
+    assert [row.index for row in rows] == [0, 1, 2]
+    assert [row.name for row in rows] == ['vm1', 'vm2', 'vm3']
+    assert rows[1]['Power State'] == 'off'
+    assert rows[1].power_state == rows[1][1] == 'off'
+    assert rows[2].read() == {'Name': 'vm3', 'Power State': 'suspended'}
+    with pytest.raises(AttributeError):
+        rows[0].missing
+
+
+def test_parsed_row_is_live_row(table):
+    for row in table.parse():
+        live_row = row.row.__locator__()
+        assert live_row.xpath('./td[1]')[0].text == row.name
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from cfme.utils.trackerbot import (
+    depaginate, latest_template, templates_on_provider, templates_to_test, TrackerbotMirror)
+
+
+class FakeEndpoint(object):
+    def __init__(self, objects):
+        self.objects = objects
+        self.calls = []
+
+    def get(self, offset=0, limit=20, modified__gte=None, **kwargs):
+        offset, limit = int(offset), int(limit)
+        self.calls.append(offset)
+        objects = self.objects
+        if modified__gte is not None:
+            objects = [obj for obj in objects if obj['modified'] >= modified__gte]
+        next_offset = offset + limit
+        return {
+            'meta': {
+                'limit': limit,
+                'offset': offset,
+                'total_count': len(objects),
+                'next': ('/api/template/?limit={}&offset={}'.format(limit, next_offset)
+                         if next_offset < len(objects) else None),
+            },
+            'objects': objects[offset:next_offset],
+        }
+
+
+class FakeApi(object):
+    def __init__(self, objects, providertemplates=()):
+        self.template = FakeEndpoint(objects)
+        self.providertemplate = FakeEndpoint(list(providertemplates))
+
+
+def providertemplate(template, provider, modified, tested=False, active=True):
+    return {
+        'id': '{}_{}'.format(template, provider),
+        'modified': modified,
+        'tested': tested,
+        'provider': {'key': provider, 'type': 'rhevm', 'active': active},
+        'template': {'name': template, 'datestamp': template[-4:], 'group': {'name': 'downstream'}},
+    }
+
+
+def test_depaginate_keeps_order():
+    api = FakeApi(list(range(95)))
+    result = depaginate(api, api.template.get(limit=10), workers=4)
+    assert result['objects'] == list(range(95))
+    assert result['meta']['total_count'] == 95
+    assert result['meta']['next'] is None
+    assert sorted(api.template.calls) == list(range(0, 95, 10))
+
+
+def test_depaginate_single_page():
+    api = FakeApi(list(range(5)))
+    result = depaginate(api, api.template.get(limit=10))
+    assert result['objects'] == list(range(5))
+
+
+def test_mirror_refresh(tmpdir):
+    api = FakeApi([], [
+        providertemplate('tpl-0101', 'rhv', '2018-01-01'),
+        providertemplate('tpl-0102', 'rhv', '2018-01-02'),
+    ])
+    mirror = TrackerbotMirror(api, path=tmpdir.join('mirror.json').strpath)
+    assert mirror.providertemplate_ids() == {'tpl-0101_rhv', 'tpl-0102_rhv'}
+
+    # one deleted and one added, the merged data have one object too many
+    api.providertemplate.objects = [
+        providertemplate('tpl-0102', 'rhv', '2018-01-02'),
+        providertemplate('tpl-0103', 'rhv', '2018-01-03'),
+    ]
+    mirror.refresh(['providertemplate'])
+    assert mirror.providertemplate_ids() == {'tpl-0102_rhv', 'tpl-0103_rhv'}
+
+    # one deleted and one added with an older timestamp, the counts match
+    api.providertemplate.objects = [
+        providertemplate('tpl-0103', 'rhv', '2018-01-03'),
+        providertemplate('tpl-0104', 'rhv', '2018-01-01'),
+    ]
+    mirror.refresh(['providertemplate'])
+    assert mirror.providertemplate_ids() == {'tpl-0102_rhv', 'tpl-0103_rhv'}
+    # reconciling by primary key catches it
+    mirror.refresh(['providertemplate'], reconcile=True)
+    assert mirror.providertemplate_ids() == {'tpl-0103_rhv', 'tpl-0104_rhv'}
+    # the mirror is kept on the disk
+    mirror = TrackerbotMirror(api, path=tmpdir.join('mirror.json').strpath)
+    assert mirror.providertemplate_ids() == {'tpl-0103_rhv', 'tpl-0104_rhv'}
+
+
+def test_mirror_queries(tmpdir):
+    api = FakeApi([], [
+        providertemplate('tpl-0101', 'rhv', '2018-01-01', tested=True),
+        providertemplate('tpl-0102', 'rhv', '2018-01-02'),
+        providertemplate('tpl-0103', 'rhv-old', '2018-01-03', active=False),
+        providertemplate('tpl-0102', 'vsphere', '2018-01-02'),
+    ])
+    api.template.objects = [
+        {'name': 'tpl-0101', 'datestamp': '0101', 'group': {'name': 'downstream'},
+         'usable_providers': ['rhv'], 'modified': '2018-01-01'},
+        {'name': 'tpl-0102', 'datestamp': '0102', 'group': {'name': 'downstream'},
+         'usable_providers': ['vsphere'], 'modified': '2018-01-02'},
+        {'name': 'tpl-0103', 'datestamp': '0103', 'group': {'name': 'downstream'},
+         'usable_providers': [], 'modified': '2018-01-03'},
+    ]
+    mirror = TrackerbotMirror(api, path=tmpdir.join('mirror.json').strpath)
+    assert sorted(templates_on_provider(api, 'rhv', mirror=mirror)) == ['tpl-0101', 'tpl-0102']
+    assert sorted(templates_to_test(api, limit=5, mirror=mirror)) == [
+        ['tpl-0102', 'rhv', 'downstream', 'rhevm'], ['tpl-0102', 'vsphere', 'downstream', 'rhevm']]
+    assert latest_template(api, 'downstream', mirror=mirror) == {
+        'latest_template': 'tpl-0102', 'latest_template_providers': ['vsphere']}
+    assert latest_template(api, 'downstream', 'rhv', mirror=mirror)['latest_template'] == 'tpl-0101'
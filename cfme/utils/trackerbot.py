@@ -1,19 +1,27 @@
 import argparse
 import json
+import os
 import time
 from collections import defaultdict
+from concurrent import futures
 
 import requests
 import slumber
 from six.moves.urllib_parse import urlparse, parse_qs
 
 from cfme.utils.conf import env
+from cfme.utils.path import log_path
 from cfme.utils.providers import providers_data
 
 session = requests.Session()
 conf = env.get('trackerbot', {})
 _active_streams = None
 
+#: Page size used when downloading whole tables
+TRACKERBOT_PAGINATE = 500
+#: Number of pages downloaded concurrently by :py:func:`depaginate`
+DEPAGINATE_WORKERS = 8
+
 
 def cmdline_parser():
     """Get a parser with basic trackerbot configuration params already set up
@@ -51,14 +59,41 @@ def active_streams(api, force=False):
     return _active_streams
 
 
-def provider_templates(api):
+def provider_templates(api, mirror=None):
+    """Return a mapping of provider key to the list of template names on that provider
+
+    Args:
+        api: The trackerbot API to query
+        mirror: Optional :py:class:`TrackerbotMirror` to query instead of the API
+    """
+    if mirror is not None:
+        templates = mirror.objects('template')
+    else:
+        templates = depaginate(api, api.template.get(limit=TRACKERBOT_PAGINATE))['objects']
     provider_templates = defaultdict(list)
-    for template in depaginate(api, api.template.get())['objects']:
+    for template in templates:
         for provider in template['providers']:
             provider_templates[provider].append(template['name'])
     return provider_templates
 
 
+def templates_on_provider(api, provider_key, mirror=None):
+    """Return the list of template names on a single provider
+
+    Args:
+        api: The trackerbot API to query
+        provider_key: Key of the provider
+        mirror: Optional :py:class:`TrackerbotMirror` to query instead of the API
+    """
+    if mirror is not None:
+        return [
+            pt['template']['name'] for pt in mirror.objects('providertemplate')
+            if pt['provider']['key'] == provider_key]
+    provider_templates = depaginate(
+        api, api.providertemplate.get(provider=provider_key, limit=TRACKERBOT_PAGINATE))
+    return [pt['template']['name'] for pt in provider_templates['objects']]
+
+
 def mark_provider_template(api, provider, template, tested=None, usable=None,
         diagnosis='', build_number=None, stream=None, custom_data=None):
     """Mark a provider template as tested and/or usable
@@ -109,11 +144,34 @@ def set_provider_active(api, provider, active=True):
     api.provider[provider].patch(active=active)
 
 
-def latest_template(api, group, provider_key=None):
+def latest_template(api, group, provider_key=None, mirror=None):
+    """Return the latest usable template of the group and the providers it is usable on
+
+    Args:
+        api: The trackerbot API to query
+        group: Name of the group (stream) or a :py:class:`Group`
+        provider_key: Only consider the templates usable on this provider
+        mirror: Optional :py:class:`TrackerbotMirror` to query instead of the API
+
+    Returns:
+        ``{'latest_template': name, 'latest_template_providers': [provider keys]}``
+    """
     if not isinstance(group, Group):
         group = Group(str(group))
 
-    if provider_key is None:
+    if mirror is not None:
+        templates = [
+            template for template in mirror.objects('template')
+            if template['group']['name'] == group['name'] and template['usable_providers'] and
+            (provider_key is None or provider_key in template['usable_providers'])]
+        if not templates:
+            return {'latest_template': None, 'latest_template_providers': []}
+        latest = max(templates, key=lambda template: (template['datestamp'], template['name']))
+        return {
+            'latest_template': latest['name'],
+            'latest_template_providers': latest['usable_providers'],
+        }
+    elif provider_key is None:
         # Just get the latest template for a given group, as well as its providers
         response = api.group(group['name']).get()
         return {
@@ -128,19 +186,28 @@ def latest_template(api, group, provider_key=None):
         return response['latest_templates'][group['name']]
 
 
-def templates_to_test(api, limit=1, request_type=None):
+def templates_to_test(api, limit=1, request_type=None, mirror=None):
     """get untested templates to pass to jenkins
 
     Args:
         limit: max number of templates to pull per request
         request_type: request the provider_key of specific type
         e.g openstack
+        mirror: Optional :py:class:`TrackerbotMirror` to query instead of the API, the untested
+            templates on active providers are taken from it newest first
 
     """
+    if mirror is not None:
+        untested = sorted(
+            (pt for pt in mirror.objects('providertemplate')
+             if not pt['tested'] and pt['provider']['active'] and
+             request_type in (None, pt['provider']['type'])),
+            key=lambda pt: pt['template']['datestamp'], reverse=True)[:limit]
+    else:
+        untested = api.untestedtemplate.get(
+            limit=limit, tested=False, provider__type=request_type).get('objects', [])
     templates = []
-    for pt in api.untestedtemplate.get(
-            limit=limit, tested=False, provider__type=request_type).get(
-            'objects', []):
+    for pt in untested:
         name = pt['template']['name']
         group = pt['template']['group']['name']
         provider = pt['provider']['key']
@@ -252,29 +319,50 @@ def trackerbot_add_provider_template(stream, provider, template_name, custom_dat
         print('{}: Error occured while template sync to trackerbot'.format(provider))
 
 
-def depaginate(api, result):
-    """Depaginate the first (or only) page of a paginated result"""
+def _page_request(api, url):
+    """Split a ``meta['next']`` style url to the endpoint and its query params"""
+    parsed_url = urlparse(url)
+    # ugh...need to find the word after 'api/' in the next URL to
+    # get the resource endpoint name; not sure how to make this better
+    endpoint = parsed_url.path.strip('/').split('/')[-1]
+    params = {k: v[0] for k, v in parse_qs(parsed_url.query).items()}
+    return getattr(api, endpoint), params
+
+
+def depaginate(api, result, workers=DEPAGINATE_WORKERS):
+    """Depaginate the first (or only) page of a paginated result
+
+    The first page tells us the total count and the page size, so the remaining pages are
+    requested concurrently using up to ``workers`` threads and stitched together in order.
+    """
     meta = result['meta']
     if meta['next'] is None:
         # No pages means we're done
         return result
 
     # make a copy of meta that we'll mess with and eventually return
-    # since we'll be chewing on the 'meta' object with every new GET
-    # same thing for objects, since we'll just be appending to it
-    # while we pull more records
     ret_meta = meta.copy()
-    ret_objects = result['objects']
-    while meta['next']:
-        # parse out url bits for constructing the new api req
-        next_url = urlparse(meta['next'])
-        # ugh...need to find the word after 'api/' in the next URL to
-        # get the resource endpoint name; not sure how to make this better
-        next_endpoint = next_url.path.strip('/').split('/')[-1]
-        next_params = {k: v[0] for k, v in parse_qs(next_url.query).items()}
-        result = getattr(api, next_endpoint).get(**next_params)
-        ret_objects.extend(result['objects'])
-        meta = result['meta']
+    ret_objects = list(result['objects'])
+    endpoint, params = _page_request(api, meta['next'])
+    limit = meta.get('limit') or len(result['objects'])
+    total_count = meta.get('total_count')
+    if total_count is None or not limit:
+        # Can't plan the pages upfront, follow the links one by one
+        while meta['next']:
+            endpoint, params = _page_request(api, meta['next'])
+            result = endpoint.get(**params)
+            ret_objects.extend(result['objects'])
+            meta = result['meta']
+    else:
+        offsets = range(meta.get('offset', 0) + limit, total_count, limit)
+
+        def get_page(offset):
+            page_params = dict(params, offset=offset, limit=limit)
+            return endpoint.get(**page_params)['objects']
+
+        with futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for page in executor.map(get_page, offsets):
+                ret_objects.extend(page)
 
     # fix meta up to not tell lies
     ret_meta['total_count'] = len(ret_objects)
@@ -286,6 +374,115 @@ def depaginate(api, result):
     }
 
 
+class TrackerbotMirror(object):
+    """Incrementally refreshed local copy of the trackerbot template tables
+
+    The mirror is stored as a JSON file. On :py:meth:`refresh` only the objects modified since
+    the last refresh are downloaded. Deletions don't show up in that data, so a table is
+    reconciled by primary key with the objects on the server, downloading the whole table:
+
+    * when asked to, before acting on the absence of objects (eg. deleting them elsewhere)
+    * when the object counts stop matching, or ``reconcile_interval`` seconds after the last
+      reconciliation
+    * when the data have no ``modified`` timestamps at all
+
+    Args:
+        api: The trackerbot API to mirror
+        path: Where to store the mirror, defaults to ``log/trackerbot_mirror.json``
+        reconcile_interval: Maximum age in seconds of the last reconciliation of a table
+    """
+    #: Mirrored resources and their primary keys
+    RESOURCES = {
+        'provider': 'key',
+        'template': 'name',
+        'providertemplate': 'id',
+    }
+
+    def __init__(self, api, path=None, reconcile_interval=3600):
+        self.api = api
+        self.path = path or log_path.join('trackerbot_mirror.json').strpath
+        self.reconcile_interval = reconcile_interval
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+            except (IOError, ValueError):
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        # Write to a temporary file and move it in place so readers never see a partial file
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.rename(tmp_path, self.path)
+
+    def _reconcile(self, resource):
+        """Rebuild the table from the objects on the server, by their primary keys"""
+        key = self.RESOURCES[resource]
+        endpoint = getattr(self.api, resource)
+        objects = depaginate(self.api, endpoint.get(limit=TRACKERBOT_PAGINATE))['objects']
+        live = {str(obj[key]): obj for obj in objects}
+        table = self.data.get(resource) or {'objects': {}}
+        for pk in set(table['objects']) - set(live):
+            # deleted on the server since the last refresh
+            del table['objects'][pk]
+        table['objects'].update(live)
+        table['reconciled'] = time.time()
+        table['last_modified'] = None
+        return table, objects
+
+    def _refresh_resource(self, resource, reconcile=False):
+        key = self.RESOURCES[resource]
+        endpoint = getattr(self.api, resource)
+        table = self.data.get(resource)
+        if not reconcile and table is not None and table.get('last_modified'):
+            changed = depaginate(
+                self.api,
+                endpoint.get(modified__gte=table['last_modified'], limit=TRACKERBOT_PAGINATE)
+            )['objects']
+            table['objects'].update({str(obj[key]): obj for obj in changed})
+            objects = changed
+            # a differing count means deleted objects, reconcile right away instead of waiting
+            total_count = endpoint.get(limit=1)['meta']['total_count']
+            reconcile = (
+                total_count != len(table['objects']) or
+                time.time() - table.get('reconciled', 0) > self.reconcile_interval)
+        else:
+            reconcile = True
+        if reconcile:
+            table, objects = self._reconcile(resource)
+        modified = [obj['modified'] for obj in objects if obj.get('modified')]
+        if modified:
+            table['last_modified'] = max([table['last_modified'] or ''] + modified)
+        self.data[resource] = table
+
+    def refresh(self, resources=None, reconcile=False):
+        """Bring the mirrored resources up to date (all of them by default)
+
+        Args:
+            resources: Names of the resources to refresh
+            reconcile: Also reconcile the tables with the server, dropping the deleted objects
+        """
+        for resource in (resources or self.RESOURCES):
+            self._refresh_resource(resource, reconcile=reconcile)
+        self._save()
+        return self
+
+    def objects(self, resource):
+        """List of all mirrored objects of the resource, refreshes the mirror if it's empty"""
+        if resource not in self.data:
+            self.refresh([resource])
+        return list(self.data[resource]['objects'].values())
+
+    def providertemplate_ids(self):
+        return set(pt['id'] for pt in self.objects('providertemplate'))
+
+
 def composite_uncollect(build, source='jenkins', limit_ts=None):
     """Composite build function"""
     since = env.get('ts', time.time())
@@ -2,23 +2,29 @@
 # -*- coding: utf-8 -*-
 import click
 import diaper
+import hashlib
 import jenkins
+import json
 import os
 import py
 import re
 import requests
+import shutil
 import subprocess
+import tarfile
 import time
 
 from collections import namedtuple
+from concurrent import futures
 from requests.auth import HTTPBasicAuth
 from six.moves.urllib.parse import urlsplit, urlunsplit
 
 from cfme.test_framework.sprout.client import SproutClient
 from cfme.utils.appliance import IPAppliance
 from cfme.utils.conf import credentials, env
+from cfme.utils.coverage_merge import CoverageMerger
 from cfme.utils.log import logger, add_stdout_handler
-from cfme.utils.path import log_path
+from cfme.utils.path import log_path, scripts_data_path
 from cfme.utils.quote import quote
 from cfme.utils.version import Version
 
@@ -35,6 +41,12 @@ COVERAGE_DIR = '/coverage'
 SCANNER_DIR = '/root/scanner'
 SIMPLECOV_VERSION = '0.16.1'
 CFME_DIR = '/var/www/miq/vmdb'
+#: Downloaded coverage archives, kept between runs
+ARCHIVE_CACHE_DIR = log_path.join('coverage-archives')
+#: Aggregated coverage data per appliance version, kept between runs
+AGGREGATE_DIR = log_path.join('coverage-aggregate')
+#: Ruby script adding the non-covered files to the merged data and generating the report
+COVERAGE_MERGER = scripts_data_path.join('coverage', 'coverage_merger.rb')
 
 
 class SSHCmdException(Exception):
@@ -488,18 +500,98 @@ def sonar_scan(ssh, project_name, project_version, scanner_url, scanner_dir, ser
     run_sonar_scanner(ssh, scanner_dir, timeout)
 
 
-def get_eligible_builds(jenkins_data, jenkins_job, cfme_version):
+def check_build(jenkins_data, jenkins_job, build_number, cfme_version):
+    """Check whether a jenkins build is eligible for the coverage aggregation
+
+    Args:
+        jenkins_data: (:obj:`collections.namedtuple`) with these
+                      attributes:  url, user, token, client
+        jenkins_job:  Jenkins job name such as downstream-59z-tests
+        build_number:  Number of the build to check
+        cfme_version:  Version CFME sources this coverage is against.
+
+    Returns:
+        A tuple of the build appliance version (or None if unknown) and the
+        :py:class:`Build` (or None if the build is not eligible).
+    """
+    # Acquire the artifacts from this build
+    try:
+        artifacts = jenkins_data.client.get_build_info(jenkins_job, build_number)['artifacts']
+        if not artifacts:
+            raise ValueError()
+    except (KeyError, ValueError):
+        logger.info('No artifacts for %s/%s', jenkins_job, build_number)
+        return None, None
+    artifacts = group_list_dict_by(artifacts, 'fileName')
+
+    # Make sure that the appliance version is in these artifacts, and it is the
+    # the same as the version for which we are gathering coverage data.  If this is
+    # not the case this is not an eligible build.
+    if 'appliance_version' not in artifacts:
+        logger.info('appliance_version not in artifacts of %s/%s', jenkins_job, build_number)
+        return None, None
+    build_appliance_version = download_artifact(
+        jenkins_data.user,
+        jenkins_data.token,
+        jenkins_data.url,
+        jenkins_job,
+        build_number,
+        artifacts['appliance_version']['relativePath']).strip()
+    if not build_appliance_version:
+        logger.info('Appliance version unspecified for build %s', build_number)
+        return None, None
+
+    if build_appliance_version != cfme_version:
+        logger.info(
+            'Skipping build %s because it does not have correct version (%s)',
+            build_number,
+            build_appliance_version)
+        return build_appliance_version, None
+
+    # We must have the actual coverage data tarball in the artifacts.
+    # If we do set it in our build object.
+    if 'coverage-results.tgz' not in artifacts:
+        logger.info('coverage-results.tgz not in artifacts of %s/%s', jenkins_job, build_number)
+        return build_appliance_version, None
+
+    # We have all the data to instantiate our Build object, so lets do it.
+    build = Build(
+        number=build_number,
+        job=jenkins_job,
+        coverage_archive=artifacts['coverage-results.tgz']['relativePath'])
+
+    if not check_artifact(
+            jenkins_data.user,
+            jenkins_data.token,
+            jenkins_data.url,
+            jenkins_job,
+            build_number,
+            artifacts['coverage-results.tgz']['relativePath']):
+        logger.info('Coverage archive could not possibly be downloaded, skipping')
+        return build_appliance_version, None
+
+    logger.info('Build %s was found to contain what is needed', build)
+    return build_appliance_version, build
+
+
+def get_eligible_builds(jenkins_data, jenkins_job, cfme_version, skip_builds=None, workers=8):
     """Get eligible builds for a specified jenkins job
 
     An eligible build will be for the specified appliance version, and contain
     the code coverage data.  We return these builds as a list of named tuples
     with the following keys: number, job, coverage_archive.
 
+    The builds are checked concurrently in batches of ``workers``, newest first, until
+    a build with a lower appliance version than the target version is found.
+
     Args:
         jenkins_data: (:obj:`collections.namedtuple`) with these
                       attributes:  url, user, token, client
         jenkins_job:  Jenkins job name such as downstream-59z-tests
         cfme_version:  Version CFME sources this coverage is against.
+        skip_builds:  Set of ``(job, number)`` tuples that are already aggregated and don't
+            have to be checked again.
+        workers:  How many builds to check at a time.
 
     Returns:
         List of eligible builds.  Each build is a (:obj:`collections.namedtuple`)
@@ -509,78 +601,35 @@ def get_eligible_builds(jenkins_data, jenkins_job, cfme_version):
     build_numbers = get_build_numbers(jenkins_data.client, jenkins_job)
     if not build_numbers:
         raise Exception('No builds for job {}'.format(jenkins_job))
+    skip_builds = skip_builds or set()
+    build_numbers = [
+        build_number for build_number in build_numbers
+        if (jenkins_job, build_number) not in skip_builds]
 
     # Find the builds with appliance version
     eligible_builds = set()
-    for build_number in build_numbers:
-
-        # Acquire the artifacts from this build
-        try:
-            artifacts = jenkins_data.client.get_build_info(jenkins_job, build_number)['artifacts']
-            if not artifacts:
-                raise ValueError()
-        except (KeyError, ValueError):
-            logger.info('No artifacts for %s/%s', jenkins_job, build_number)
-            continue
-        artifacts = group_list_dict_by(artifacts, 'fileName')
-
-        # Make sure that the appliance version is in these artifacts, and it is the
-        # the same as the version for which we are gathering coverage data.  If this is
-        # not the case this is not an eligible build.
-        if 'appliance_version' not in artifacts:
-            logger.info('appliance_version not in artifacts of %s/%s', jenkins_job, build_number)
-            continue
-        build_appliance_version = download_artifact(
-            jenkins_data.user,
-            jenkins_data.token,
-            jenkins_data.url,
-            jenkins_job,
-            build_number,
-            artifacts['appliance_version']['relativePath']).strip()
-        if not build_appliance_version:
-            logger.info('Appliance version unspecified for build %s', build_number)
-            continue
-
-        # Build versions that are less than the target version are invalid
-        if Version(build_appliance_version) < Version(cfme_version):
-            logger.info(
-                'Build %s already has lower version (%s) than target version (%s)',
-                build_number, build_appliance_version, cfme_version)
-            logger.info('Ending here')
-            break
-
-        # We must have the actual coverage data tarball in the artifacts.
-        # If we do set it in our build object.
-        if 'coverage-results.tgz' not in artifacts:
-            logger.info('coverage-results.tgz not in artifacts of %s/%s', jenkins_job, build_number)
-            continue
-
-        # We have all the data to instantiate our Build object, so lets do it.
-        # Note, we could fill out its data members a little at a time because
-        # a namedtuple's data members are immutable.
-        build = Build(
-            number=build_number,
-            job=jenkins_job,
-            coverage_archive=artifacts['coverage-results.tgz']['relativePath'])
-
-        if not check_artifact(
-                jenkins_data.user,
-                jenkins_data.token,
-                jenkins_data.url,
-                jenkins_job,
-                build_number,
-                artifacts['coverage-results.tgz']['relativePath']):
-            logger.info('Coverage archive could not possibly be downloaded, skipping')
-            continue
-
-        if build_appliance_version == cfme_version:
-            logger.info('Build %s was found to contain what is needed', build)
-            eligible_builds.add(build)
-        else:
-            logger.info(
-                'Skipping build %s because it does not have correct version (%s)',
-                build_number,
-                build_appliance_version)
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for i in range(0, len(build_numbers), workers):
+            batch = build_numbers[i:i + workers]
+            results = executor.map(
+                lambda build_number: check_build(
+                    jenkins_data, jenkins_job, build_number, cfme_version),
+                batch)
+            lower_version_found = False
+            for build_number, (build_appliance_version, build) in zip(batch, results):
+                # Build versions that are less than the target version are invalid
+                if (build_appliance_version and
+                        Version(build_appliance_version) < Version(cfme_version)):
+                    logger.info(
+                        'Build %s already has lower version (%s) than target version (%s)',
+                        build_number, build_appliance_version, cfme_version)
+                    lower_version_found = True
+                    break
+                if build is not None:
+                    eligible_builds.add(build)
+            if lower_version_found:
+                logger.info('Ending here')
+                break
 
     return eligible_builds
 
@@ -619,7 +668,7 @@ def setup_appliance_for_merger(appliance, ssh):
 
     # Upload the merger
     logger.info('Installing coverage merger')
-    appliance.coverage._upload_coverage_merger()
+    ssh.put_file(COVERAGE_MERGER.strpath, CFME_DIR)
 
     ssh_run_cmd(
         ssh=ssh,
@@ -628,143 +677,155 @@ def setup_appliance_for_merger(appliance, ssh):
             COVERAGE_DIR))
 
 
-def cleanup_coverage_data_wave(ssh, coverage_dir):
-    """Cleanup Coverage Data Wave
+def file_checksum(path):
+    """Return sha256 hex digest of a local file"""
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
 
-    Cleans up coverage data leftover from previous wave, and puts the
-    merged .resultset.json file in a place it will be picked up for merger
-    in the next wave.
 
-    Args:
-        ssh:  ssh object
-        coverage_dir: directory where coverage data is extracted.
+def download_coverage_archive(build, jenkins_data):
+    """Download the coverage archive of a build, unless a verified copy is already cached
 
-    Returns:
-        Nothing
+    The archives are stored in :py:data:`ARCHIVE_CACHE_DIR` along with their sha256 checksum,
+    a cached archive is reused only when its checksum still matches.
 
-    Raises:
+    Args:
+        build:  jenkins job build from which to pull coverage data.
+        jenkins_data:  Named tupple with these attributes:  url, user, token, client
 
+    Returns:
+        Local path to the archive
     """
-    # Remove result set files.   They are all in directories like: $ip/$pid.
-    # So we will remove recursively directories and their contents that start with
-    # a number under the coverage directory.
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='cd {}; rm -rf [0-9]*'.format(coverage_dir),
-        error_msg='Could not cleanup old resultset files.')
+    archive = ARCHIVE_CACHE_DIR.join(build.job, '{}.tgz'.format(build.number))
+    checksum_file = archive.new(ext='.sha256')
+    if archive.check() and checksum_file.check():
+        if file_checksum(archive.strpath) == checksum_file.read().strip():
+            logger.info('Using cached coverage data of build %s/%s', build.job, build.number)
+            return archive.strpath
+        logger.info('Cached coverage data of build %s/%s is corrupted', build.job, build.number)
+    archive.dirpath().ensure(dir=True)
+    logger.info('Downloading the coverage data from build %s/%s', build.job, build.number)
+    download_url = '{}/job/{}/{}/artifact/{}'.format(
+        jenkins_data.url, build.job, build.number, build.coverage_archive)
+    response = requests.get(
+        download_url, verify=False, stream=True,
+        auth=HTTPBasicAuth(jenkins_data.user, jenkins_data.token))
+    response.raise_for_status()
+    tmp_archive = archive.new(ext='.tgz.part')
+    with open(tmp_archive.strpath, 'wb') as f:
+        shutil.copyfileobj(response.raw, f)
+    tmp_archive.rename(archive)
+    checksum_file.write(file_checksum(archive.strpath))
+    return archive.strpath
+
+
+def read_archive_resultsets(archive):
+    """Parse all the ``.resultset.json`` files in a coverage archive
+
+    The per-run merged data are skipped when the archive contains also the raw
+    (per-appliance) result sets, so the data are not counted twice.
 
-    # Move merged resultset where it will be treated like a resultset to be merged.
-    # We will create a directory like 1/1 and move the merged resultset under that.
-    merged_data_dir = py.path.local(coverage_dir).join('/1/1')
-    merged_resultset = py.path.local(coverage_dir).join('/merged/.resultset.json')
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='mkdir -p {}'.format(merged_data_dir),
-        error_msg='Could not make new merged data dir: {}'.format(merged_data_dir))
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='mv {} {}'.format(merged_resultset, merged_data_dir),
-        error_msg='Could not move merged result set, {}, to merged data dir, {}'.format(
-            merged_resultset, merged_data_dir))
-
-    # Remove merged directory.
-    merged_dir = '{}/merged'.format(coverage_dir)
-    ssh_run_cmd(
-        ssh=ssh,
-        cmd='rm -rf {}'.format(merged_dir),
-        error_msg='Failed removing merged directory, {}'.format(merged_dir))
+    Returns:
+        List of parsed result sets
+    """
+    with tarfile.open(archive, 'r:*') as tar:
+        members = [
+            member for member in tar.getmembers()
+            if member.isfile() and os.path.basename(member.name) == '.resultset.json']
+        raw_members = [member for member in members if '/merged/' not in member.name]
+        resultsets = []
+        for member in (raw_members or members):
+            resultsets.append(json.loads(tar.extractfile(member).read().decode('utf-8')))
+        return resultsets
 
 
-def download_and_merge_coverage_data(ssh, builds, jenkins_data, wave_size):
-    """Download and merge coverage data in waves.
+def download_and_merge_coverage_data(builds, jenkins_data, wave_size, merger):
+    """Download and merge coverage data of the builds using a bounded pool of workers
 
-    Download the coverage tarballs from from the specified builds in waves, merging
-    the coverage data a few tarballs at a time.
+    Download the coverage tarballs from the specified builds (or take them from the local
+    cache) and merge them locally, at most ``wave_size`` tarballs at a time.
 
     Args:
-        ssh:  ssh object
         builds:  jenkins job builds from which to pull coverage data.
         jenkins_data:  Named tupple with these attributes:  url, user, token, client
-        wave_size:  How many coverage tarballs to extract at a time when merging
+        wave_size:  How many coverage tarballs to process at a time
+        merger:  :py:class:`cfme.utils.coverage_merge.CoverageMerger` to merge the data into
 
     Returns:
         Nothing
     """
-    # Note, this is totally based around the fact that coverage_merger.rb
-    # doesn't care where a .resultset.json file (i.e. ruby code coverage
-    # data file) comes from, such that we can reuse the merged data file
-    # with successive waves of coverage data from different jenkins builds.
-    #
-    # What we will do for each wave is:
-    #
-    #   * extract some coverage data tarballs.
-    #   * merge those.
-    #   * cleanup the old data, and make the merged data look like just another
-    #     result set.  On the last wave there is no cleanup.
-    i = 0
-    wave = 1
-    while i < len(builds):
-        logger.info('Processing wave #%s of coverage tarballs.', wave)
-        build_wave = builds[i:i + wave_size]
-        for build in build_wave:
-            logger.info('Downloading the coverage data from build %s', build.number)
-            download_url = jenkins_artifact_url(
-                jenkins_data.user,
-                jenkins_data.token,
-                jenkins_data.url,
-                build.job,
-                build.number,
-                build.coverage_archive)
-            ssh_run_cmd(
-                ssh=ssh,
-                cmd='curl -k -o {} {}'.format(
-                    py.path.local(COVERAGE_DIR).join('tmp.tgz'),
-                    quote(download_url)),
-                error_msg='Could not download coverage data from jenkins!')
-
-            logger.info('Extracting the coverage data from build %s', build.number)
-            extract_command = ' && '.join([
-                'cd {}'.format(COVERAGE_DIR),
-                'tar xf tmp.tgz --strip-components=1',
-                'rm -f tmp.tgz'])
-            ssh_run_cmd(
-                ssh=ssh,
-                cmd=extract_command,
-                error_msg='Could not extract coverage data!')
+    def _loader(build):
+        def _load():
+            archive = download_coverage_archive(build, jenkins_data)
+            logger.info('Extracting the coverage data from build %s/%s', build.job, build.number)
+            return read_archive_resultsets(archive)
+        return _load
 
-        merge_coverage_data(
-            ssh=ssh,
-            coverage_dir=COVERAGE_DIR)
+    with futures.ThreadPoolExecutor(max_workers=max(1, wave_size)) as executor:
+        for i in range(0, len(builds), wave_size):
+            logger.info('Processing wave #%s of coverage tarballs.', i // wave_size + 1)
+            for resultsets in executor.map(lambda load: load(),
+                                           [_loader(build) for build in builds[i:i + wave_size]]):
+                for resultset in resultsets:
+                    merger.add_resultset(resultset)
+
+
+def load_aggregate(aggregate_dir):
+    """Load the previous aggregate for incremental processing
+
+    Returns:
+        A tuple of :py:class:`cfme.utils.coverage_merge.CoverageMerger` preloaded with the
+        previous aggregated data and a set of ``(job, number)`` of builds already in it.
+    """
+    merger = CoverageMerger(logger=logger)
+    seen_builds = set()
+    resultset = aggregate_dir.join('.resultset.json')
+    builds_file = aggregate_dir.join('builds.json')
+    if resultset.check() and builds_file.check():
+        merger.add_path(resultset.strpath)
+        seen_builds = set(tuple(build) for build in json.loads(builds_file.read()))
+        logger.info('Loaded previous aggregate of %s builds', len(seen_builds))
+    return merger, seen_builds
 
-        # Increment index and wave count
-        i += wave_size
-        wave += 1
-
-        # We have to cleanup the coverage data we just extracted, move
-        # the merged .resultset.json file, and remove the merged data directory.
-        # We move the .resultset.json files so that it will be seen as just another
-        # result set to merge in the next wave, and the merged data directory is removed
-        # so coverage_merger.rb won't get confused by results already being where it drops
-        # it's results.   However it is important that we don't do that
-        # on the last wave, as we want the merge results to be available after the
-        # last wave.
-        #
-        # XXX: Yes, this is a hack.  Not even one I am proud of.
-        if i < len(builds):
-            cleanup_coverage_data_wave(
-                ssh=ssh,
-                coverage_dir=COVERAGE_DIR,
-            )
+
+def save_aggregate(aggregate_dir, merger, builds):
+    """Store the aggregate and the list of builds in it for the next incremental run"""
+    merger.write(aggregate_dir.strpath)
+    aggregate_dir.join('builds.json').write(json.dumps(sorted(builds)))
+
+
+def upload_merged_coverage_data(ssh, merger, coverage_dir):
+    """Upload the merged coverage data to the appliance so the merger script picks them up
+
+    Args:
+        ssh:  ssh client
+        merger:  :py:class:`cfme.utils.coverage_merge.CoverageMerger` with the merged data
+        coverage_dir:  Directory on the appliance to hold the coverage data.
+    """
+    local_resultset = merger.write(log_path.join('coverage-upload').strpath)
+    # coverage_merger.rb expects $coverage_dir/$ip/$pid/.resultset.json
+    merged_data_dir = py.path.local(coverage_dir).join('/1/1')
+    ssh_run_cmd(
+        ssh=ssh,
+        cmd='rm -rf {}/*; mkdir -p {}'.format(coverage_dir, merged_data_dir),
+        error_msg='Could not make merged data dir: {}'.format(merged_data_dir))
+    ssh.put_file(local_resultset, merged_data_dir.join('.resultset.json').strpath)
 
 
 def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenkins_jobs,
-        wave_size):
+        wave_size, full=False):
     """ Aggregates code coverage data across the builds of specified jenkins jobs
 
     Given the version of the specified appliance, find all builds for the specified jenkins
     jobs for that version, and aggregate all the coverage data.   After this do a sonar scan
     of the aggregated coverage data, and send to configured sonarqube.
 
+    The aggregate is kept locally between runs, so only builds that were not aggregated by
+    the previous run are downloaded and merged, unless ``full`` is requested.
+
     Args:
         appliance:  CFME appliance to use as a source of source code, and as a workspace
             for coverage data merger.
@@ -772,7 +833,8 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
         jenkins_user: Jenkins user name
         jenkins_token:  Jenkins user authentication token.
         jenkins_jobs:  Jenkins job names from which to aggregate coverage data
-        wave_size:  How many coverage tarballs to extract at a time when merging
+        wave_size:  How many coverage tarballs to process at a time when merging
+        full:  Ignore the previous aggregate and merge all the eligible builds.
 
     Returns:
         Nothing
@@ -806,6 +868,13 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
         token=jenkins_token,
         client=jenkins_client)
 
+    # Load the previous aggregate, its builds don't have to be processed again
+    aggregate_dir = AGGREGATE_DIR.join(appliance_version)
+    if full:
+        merger, seen_builds = CoverageMerger(logger=logger), set()
+    else:
+        merger, seen_builds = load_aggregate(aggregate_dir)
+
     # Get the eligible builds for all jobs specified.
     logger.info('Jenkins Jobs: %s', ' '.join(jenkins_jobs))
     eligible_builds = set()
@@ -813,22 +882,38 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
         eligible_builds.update(get_eligible_builds(
             jenkins_data,
             jenkins_job,
-            appliance_version))
-    if not eligible_builds:
+            appliance_version,
+            skip_builds=seen_builds,
+            workers=wave_size))
+    if not eligible_builds and not seen_builds:
         raise Exception(
             'Could not find any coverage reports for {} in {}'.format(
                 appliance_version,
                 ', '.join(jenkins_jobs)))
     eligible_builds = sorted(eligible_builds, key=lambda build: build.number)
-
-    # Merge data and do sonar scan
+    logger.info('%s new builds to aggregate', len(eligible_builds))
+
+    # Merge the data locally and store the aggregate for the next run
+    download_and_merge_coverage_data(
+        builds=eligible_builds,
+        jenkins_data=jenkins_data,
+        wave_size=wave_size,
+        merger=merger)
+    save_aggregate(
+        aggregate_dir, merger,
+        seen_builds | set((build.job, build.number) for build in eligible_builds))
+    logger.info('COVERAGE=%s%%', merger.covered_percent)
+
+    # Let the merger script on the appliance add the non-covered files and do sonar scan
     with appliance.ssh_client as ssh:
         setup_appliance_for_merger(appliance, ssh)
-        download_and_merge_coverage_data(
+        upload_merged_coverage_data(
             ssh=ssh,
-            builds=eligible_builds,
-            jenkins_data=jenkins_data,
-            wave_size=wave_size)
+            merger=merger,
+            coverage_dir=COVERAGE_DIR)
+        merge_coverage_data(
+            ssh=ssh,
+            coverage_dir=COVERAGE_DIR)
         pull_merged_coverage_data(
             ssh=ssh,
             coverage_dir=COVERAGE_DIR)
@@ -856,9 +941,11 @@ def aggregate_coverage(appliance, jenkins_url, jenkins_user, jenkins_token, jenk
 @click.option('--jenkins-token', 'jenkins_token', default=None,
     help='Jenkins user authentication token')
 @click.option('--wave-size', 'wave_size', default=10,
-    help='How many coverage tarballs to extract at a time when merging')
+    help='How many coverage tarballs to download and merge at a time')
+@click.option('--full', 'full', is_flag=True, default=False,
+    help='Ignore the previous aggregate and merge all the eligible builds')
 def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_token, appliance_ip,
-        appliance_version, wave_size):
+        appliance_version, wave_size, full):
     """Aggregate coverage data from jenkins job(s) and upload to sonarqube"""
     if appliance_ip is None and appliance_version is None:
         ValueError('Must specify either --appliance-ip or --find-appliance')
@@ -890,7 +977,8 @@ def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_tok
                     jenkins_user,
                     jenkins_token,
                     jenkins_jobs,
-                    wave_size))
+                    wave_size,
+                    full))
 
         finally:
             with diaper:
@@ -904,7 +992,8 @@ def coverage_report_jenkins(jenkins_url, jenkins_jobs, jenkins_user, jenkins_tok
                 jenkins_user,
                 jenkins_token,
                 jenkins_jobs,
-                wave_size))
+                wave_size,
+                full))
 
 
 if __name__ == '__main__':
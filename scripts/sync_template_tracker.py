@@ -49,10 +49,9 @@ def main(trackerbot_url, mark_usable=None, selected_provider=None):
     else:
         usable = {'usable': mark_usable}
 
-    existing_provider_templates = [
-        pt['id']
-        for pt
-        in trackerbot.depaginate(api, api.providertemplate.get())['objects']]
+    # Only the changes since the last run get downloaded into the local mirror
+    mirror = trackerbot.TrackerbotMirror(api).refresh(['providertemplate'])
+    existing_provider_templates = mirror.providertemplate_ids()
 
     # Find some templates and update the API
     for template_name, providers in template_providers.items():
@@ -99,7 +98,9 @@ def main(trackerbot_url, mark_usable=None, selected_provider=None):
 
     # Remove provider relationships where they no longer exist, skipping unresponsive providers,
     # and providers not known to this environment
-    for pt in trackerbot.depaginate(api, api.providertemplate.get())['objects']:
+    # Reconciled, so no relationship deleted since the last run is acted on again
+    mirror.refresh(['providertemplate'], reconcile=True)
+    for pt in mirror.objects('providertemplate'):
         key, template_name = pt['provider']['key'], pt['template']['name']
         if key not in template_providers[template_name] and key not in unresponsive_providers:
             if key in all_providers:
@@ -110,7 +111,8 @@ def main(trackerbot_url, mark_usable=None, selected_provider=None):
                             template_name, key)
 
     # Remove templates that aren't on any providers anymore
-    for template in trackerbot.depaginate(api, api.template.get())['objects']:
+    # Deleting provider templates doesn't touch the templates, so these have to be reconciled
+    for template in mirror.refresh(['template'], reconcile=True).objects('template'):
         if not template['providers'] and template['name'].strip():
             logger.info("Deleting template %s (no providers)", template['name'])
             api.template(template['name']).delete()
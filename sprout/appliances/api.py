@@ -2,6 +2,7 @@
 import inspect
 import json
 import re
+import time
 from celery import chain
 from celery.result import AsyncResult
 from datetime import datetime
@@ -18,35 +19,52 @@ from appliances.tasks import (
     connect_direct_lun, disconnect_direct_lun, mark_appliance_ready, wait_appliance_ready)
 from sprout.log import create_logger
 
+#: Longest time in seconds a ``request_wait`` call can block
+REQUEST_WAIT_TIMEOUT = 60
+#: How often ``request_wait`` looks at the pool, in seconds
+REQUEST_WAIT_INTERVAL = 2
+
 
 def json_response(data):
     return HttpResponse(json.dumps(data), content_type="application/json")
 
 
-def json_exception(e):
-    return json_response({
+def exception_result(e):
+    return {
         "status": "exception",
         "result": {
             "class": type(e).__name__,
             "message": str(e)
         }
-    })
+    }
 
 
-def json_autherror(message):
-    return json_response({
+def autherror_result(message):
+    return {
         "status": "autherror",
         "result": {
             "message": str(message)
         }
-    })
+    }
 
 
-def json_success(result):
-    return json_response({
+def success_result(result):
+    return {
         "status": "success",
         "result": result
-    })
+    }
+
+
+def json_exception(e):
+    return json_response(exception_result(e))
+
+
+def json_autherror(message):
+    return json_response(autherror_result(message))
+
+
+def json_success(result):
+    return json_response(success_result(result))
 
 
 class JSONMethod(object):
@@ -107,8 +125,20 @@ class JSONApi(object):
                     map(lambda m: m.description, self._methods.values()),
                     key=lambda m: m["name"]),
             })
+        ipaddr = get_ip(request)
         try:
             data = json.loads(request.body)
+        except ValueError as e:
+            return json_exception(e)
+        if isinstance(data, list):
+            # A batch of calls is answered with the list of their results, in the same order
+            return json_response([self.call(call_data, ipaddr) for call_data in data])
+        return json_response(self.call(data, ipaddr))
+
+    def call(self, data, ipaddr):
+        """Process a single call and return its result, ready for the JSON serialization"""
+        method = None
+        try:
             method_name = data["method"]
             args = data["args"]
             kwargs = data["kwargs"]
@@ -116,7 +146,6 @@ class JSONApi(object):
                 method = self._methods[method_name]
             except KeyError:
                 raise NameError("Method {} not found!".format(method_name))
-            ipaddr = get_ip(request)
             create_logger(method).info(
                 "Calling with parameters {!r}{!r} from {!r}".format(tuple(args), kwargs, ipaddr))
             if method.auth:
@@ -125,22 +154,22 @@ class JSONApi(object):
                     try:
                         user = User.objects.get(username=username)
                     except ObjectDoesNotExist:
-                        return json_autherror("User {} does not exist!".format(username))
+                        return autherror_result("User {} does not exist!".format(username))
                     if not user.check_password(password):
-                        return json_autherror("Wrong password for user {}!".format(username))
+                        return autherror_result("Wrong password for user {}!".format(username))
                     create_logger(method).info(
                         "Called by user {}/{}".format(user.id, user.username))
-                    return json_success(method(user, *args, **kwargs))
+                    result = method(user, *args, **kwargs)
                 else:
-                    return json_autherror("Method {} needs authentication!".format(method_name))
+                    return autherror_result("Method {} needs authentication!".format(method_name))
             else:
-                return json_success(method(*args, **kwargs))
+                result = method(*args, **kwargs)
         except Exception as e:
-            create_logger(method).error(
+            create_logger(method or self).error(
                 "Exception raised during call: {}: {}".format(type(e).__name__, str(e)))
-            return json_exception(e)
-        else:
-            create_logger(method).info("Call finished")
+            return exception_result(e)
+        create_logger(method).info("Call finished")
+        return success_result(result)
 
 
 jsonapi = JSONApi()
@@ -242,18 +271,17 @@ def request_appliances(
         ram, cpu, provider_type, template_type).id
 
 
-@jsonapi.authenticated_method
-def request_check(user, request_id):
-    """Return status of the appliance pool"""
+def _pool_status(user, request_id):
     request = AppliancePool.objects.get(id=request_id)
     if user != request.owner and not user.is_staff:
         raise Exception("This pool belongs to a different user!")
+    status = request.status
     return {
-        "fulfilled": request.fulfilled,
+        "fulfilled": status.fulfilled,
         "finished": request.finished,
         "preconfigured": request.preconfigured,
         "yum_update": request.yum_update,
-        "progress": int(round(request.percent_finished * 100)),
+        "progress": int(round(status.percent_finished * 100)),
         "appliances": [
             appliance.serialized
             for appliance
@@ -262,6 +290,34 @@ def request_check(user, request_id):
     }
 
 
+@jsonapi.authenticated_method
+def request_check(user, request_id):
+    """Return status of the appliance pool"""
+    return _pool_status(user, request_id)
+
+
+@jsonapi.authenticated_method
+def request_wait(user, request_id, timeout=REQUEST_WAIT_TIMEOUT, progress=None):
+    """Wait for a change of the appliance pool and return its status.
+
+    Long-polling variant of ``request_check``. It returns as soon as the pool is finished or its
+    progress differs from ``progress``, at the latest after ``timeout`` seconds.
+
+    Args:
+        request_id: ID of the appliance pool.
+        timeout: How long to wait at most, capped at ``REQUEST_WAIT_TIMEOUT`` seconds.
+        progress: The progress the caller knows about, ``None`` to wait only for the finish.
+    """
+    deadline = time.time() + min(max(float(timeout), 0), REQUEST_WAIT_TIMEOUT)
+    while True:
+        status = _pool_status(user, request_id)
+        if status["finished"] or (progress is not None and status["progress"] != progress):
+            return status
+        if time.time() >= deadline:
+            return status
+        time.sleep(REQUEST_WAIT_INTERVAL)
+
+
 @jsonapi.authenticated_method
 def prolong_appliance_lease(user, id, minutes=60):
     """Prolongs the appliance's lease time by specified amount of minutes from current time."""
@@ -15,9 +15,11 @@ from wrapanapi.exceptions import VMInstanceNotFound
 
 from cached_property import cached_property
 from celery import chain
+from collections import namedtuple
 from contextlib import contextmanager
 from datetime import timedelta, date
 from django.contrib.auth.models import User, Group as DjangoGroup
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
 from django.db.models import Q
@@ -37,6 +39,7 @@ from cfme.utils.conf import cfme_data
 from cfme.utils.providers import get_mgmt
 from cfme.utils.timeutil import nice_seconds
 from cfme.utils.version import Version
+from cfme.utils.wait import wait_for
 
 
 # Monkey patch the User object in order to have nicer checks
@@ -134,7 +137,60 @@ class DelayedProvisionTask(MetadataMixin):
             self.provider_to_avoid.id if self.provider_to_avoid is not None else "---")
 
 
+# Plain data of a VM in the provider inventory, see Provider.vm_inventory
+InventoryVM = namedtuple('InventoryVM', ['name', 'uuid'])
+VmInventory = namedtuple('VmInventory', ['fetched', 'vms'])
+
+
+def _vm_attribute(vm, name):
+    try:
+        return getattr(vm, name, None)
+    except Exception:
+        # Some attributes are retrieved from the provider and may fail for a single VM
+        return None
+
+
+class ProviderCapacity(object):
+    """Provisioning capacity of a provider at one moment, see :py:meth:`Provider.capacity_table`.
+
+    The counts can be updated with :py:meth:`reserve` when appliances are planned on the provider,
+    so one table serves all the decisions made in one pass.
+    """
+    def __init__(self, provider, provisioning, managing):
+        self.provider = provider
+        self.provisioning = provisioning
+        self.managing = managing
+
+    @property
+    def remaining_provisioning_slots(self):
+        provider = self.provider
+        result = max(provider.num_simultaneous_provisioning - self.provisioning, 0)
+        if provider.appliance_limit is not None:
+            result = min(result, max(provider.appliance_limit - self.managing, 0))
+        return result
+
+    @property
+    def free(self):
+        return self.remaining_provisioning_slots > 0
+
+    @property
+    def appliance_load(self):
+        if self.provider.appliance_limit is None or self.provider.appliance_limit == 0:
+            return 0.0
+        return float(self.managing) / float(self.provider.appliance_limit)
+
+    def reserve(self, count=1):
+        """Account for ``count`` appliances started on the provider."""
+        self.provisioning += count
+        self.managing += count
+
+
 class Provider(MetadataMixin):
+    # How long the listing of VMs can take, listing on slow providers takes minutes
+    VM_INVENTORY_LOCK_TIME = 15 * 60
+    # Age of the stored inventory after which the readers list the VMs themselves
+    VM_INVENTORY_MAX_AGE = timedelta(minutes=30)
+
     id = models.CharField(max_length=32, primary_key=True, help_text="Provider's key in YAML.")
     working = models.BooleanField(default=False, help_text="Whether provider is available.")
     num_simultaneous_provisioning = models.IntegerField(default=5,
@@ -274,6 +330,94 @@ class Provider(MetadataMixin):
         else:
             return self.appliance_load
 
+    @property
+    def vm_inventory_key(self):
+        return 'vm-inventory-v2-{}'.format(self.id)
+
+    @property
+    def has_vm_inventory(self):
+        return hasattr(self.api, 'list_vms')
+
+    def refresh_vm_inventory_with_vms(self):
+        """Lists the VMs on the provider and stores them as the VM inventory of the provider.
+
+        Only the names and UUIDs are stored, other attributes (IP, power state) are queried from
+        the provider for each VM. Only one listing runs for a provider at a time. If another one
+        is already running, this waits for it and returns its result instead of listing the VMs
+        again.
+
+        Returns:
+            A tuple of the :py:class:`VmInventory` and the list of the listed VM objects,
+            ``None`` when the result of another listing was used.
+        """
+        lock_id = 'lock-{}'.format(self.vm_inventory_key)
+        if not cache.add(lock_id, 'true', self.VM_INVENTORY_LOCK_TIME):
+            wait_for(
+                lambda: cache.get(lock_id) is None,
+                delay=2, num_sec=self.VM_INVENTORY_LOCK_TIME,
+                message='VM inventory of {} being listed'.format(self.id))
+            inventory = redis.get(self.vm_inventory_key)
+            if inventory is not None:
+                return inventory, None
+            # The other listing failed, try on our own
+            return self.refresh_vm_inventory_with_vms()
+        try:
+            vms = self.api.list_vms()
+            inventory = VmInventory(timezone.now(), [
+                InventoryVM(getattr(vm, 'name', vm), _vm_attribute(vm, 'uuid')) for vm in vms])
+            redis.set(self.vm_inventory_key, inventory)
+            return inventory, vms
+        finally:
+            cache.delete(lock_id)
+
+    def refresh_vm_inventory(self):
+        """Lists the VMs on the provider and stores them as the VM inventory of the provider.
+
+        See :py:meth:`refresh_vm_inventory_with_vms`.
+
+        Returns:
+            A :py:class:`VmInventory`.
+        """
+        inventory, _ = self.refresh_vm_inventory_with_vms()
+        return inventory
+
+    def vm_inventory(self, max_age=None):
+        """Returns the stored VM inventory of the provider.
+
+        The inventory is refreshed by the periodic appliance refresh. It is listed here only when
+        it is missing or older than ``max_age``.
+
+        Args:
+            max_age: :py:class:`datetime.timedelta`, defaults to ``VM_INVENTORY_MAX_AGE``.
+        Returns:
+            A :py:class:`VmInventory`.
+        """
+        if max_age is None:
+            max_age = self.VM_INVENTORY_MAX_AGE
+        inventory = redis.get(self.vm_inventory_key)
+        if inventory is None or timezone.now() - inventory.fetched > max_age:
+            inventory = self.refresh_vm_inventory()
+        return inventory
+
+    @classmethod
+    def capacity_table(cls):
+        """The :py:class:`ProviderCapacity` of all providers, loaded with three queries.
+
+        Returns:
+            A dictionary ``{provider_id: ProviderCapacity}``.
+        """
+        provisioning = dict(
+            Appliance.objects
+            .filter(ready=False, marked_for_deletion=False, ip_address=None)
+            .values_list('template__provider').annotate(models.Count('id')).order_by())
+        managing = dict(
+            Appliance.objects.values_list('template__provider')
+            .annotate(models.Count('id')).order_by())
+        return {
+            provider.id: ProviderCapacity(
+                provider, provisioning.get(provider.id, 0), managing.get(provider.id, 0))
+            for provider in cls.objects.all()}
+
     @classmethod
     def get_available_provider_keys(cls):
         return cfme_data.get("management_systems", {}).keys()
@@ -1201,6 +1345,40 @@ class Appliance(MetadataMixin):
             return None
 
 
+class PoolStatus(object):
+    """Progress of an appliance pool computed from the counts of its appliances.
+
+    See :py:attr:`AppliancePool.status`.
+    """
+    def __init__(self, total_count, current_count=0, power_known=0, powered_on=0, with_ip=0,
+                 ready=0):
+        self.total_count = total_count
+        self.current_count = current_count
+        self.power_known = power_known
+        self.powered_on = powered_on
+        self.with_ip = with_ip
+        self.ready = ready
+
+    @property
+    def percent_finished(self):
+        if self.total_count is None:
+            return 0.0
+        total = 4 * self.total_count
+        if total == 0:
+            return 1.0
+        finished = self.power_known + self.powered_on + self.with_ip + self.ready
+        return float(finished) / float(total)
+
+    @property
+    def fulfilled(self):
+        return self.with_ip == self.total_count and self.ready == self.current_count
+
+
+def _count_if(*args, **kwargs):
+    return models.Sum(models.Case(
+        models.When(*args, then=1, **kwargs), default=0, output_field=models.IntegerField()))
+
+
 class AppliancePool(MetadataMixin):
     total_count = models.IntegerField(help_text="How many appliances should be in this pool.")
     group = models.ForeignKey(
@@ -1408,11 +1586,35 @@ class AppliancePool(MetadataMixin):
             return [t for t in q if t.provider.provider_type == self.provider_type]
 
     @property
-    def possible_provisioning_templates(self):
+    def filter_signature(self):
+        """Pools with the same signature have the same :py:attr:`possible_templates`."""
+        return (
+            self.owner_id, self.group_id, self.preconfigured, self.version, self.date,
+            self.provider_id, self.template_type, self.provider_type)
+
+    def provisioning_templates(self, capacity=None, templates=None):
+        """Possible templates on providers with a free provisioning slot, best match first.
+
+        Args:
+            capacity: Result of :py:meth:`Provider.capacity_table`, loaded when not passed.
+            templates: :py:attr:`possible_templates` of the pool, loaded when not passed.
+        """
+        if capacity is None:
+            capacity = Provider.capacity_table()
+        if templates is None:
+            templates = self.possible_templates
+        templates = [
+            tpl for tpl in templates
+            if tpl.provider_id in capacity and capacity[tpl.provider_id].free]
+        # Sort by date and load to pick the best match (least loaded provider)
         return sorted(
-            filter(lambda tpl: tpl.provider.free, self.possible_templates),
-            # Sort by date and load to pick the best match (least loaded provider)
-            key=lambda tpl: (tpl.date, 1.0 - tpl.provider.appliance_load), reverse=True)
+            templates,
+            key=lambda tpl: (tpl.date, 1.0 - capacity[tpl.provider_id].appliance_load),
+            reverse=True)
+
+    @property
+    def possible_provisioning_templates(self):
+        return self.provisioning_templates()
 
     @property
     def possible_providers(self):
@@ -1430,38 +1632,40 @@ class AppliancePool(MetadataMixin):
     def single_or_none_appliance(self):
         return self.appliances.count() <= 1
 
+    @property
+    def status(self):
+        """:py:class:`PoolStatus` of the pool, computed with a single aggregate query."""
+        counts = Appliance.objects.filter(appliance_pool=self).aggregate(
+            current_count=models.Count('id'),
+            power_known=_count_if(
+                ~Q(power_state__in=[Appliance.Power.UNKNOWN, Appliance.Power.ORPHANED])),
+            powered_on=_count_if(power_state=Appliance.Power.ON),
+            with_ip=_count_if(ip_address__isnull=False),
+            ready=_count_if(ready=True))
+        # Sums of no rows are None
+        return PoolStatus(self.total_count, **{
+            key: value or 0 for key, value in counts.items()})
+
     @property
     def current_count(self):
-        return len(self.appliances)
+        return Appliance.objects.filter(appliance_pool=self).count()
 
     @property
     def percent_finished(self):
-        if self.total_count is None:
-            return 0.0
-        total = 4 * self.total_count
-        if total == 0:
-            return 1.0
-        finished = 0
-        for appliance in self.appliances:
-            if appliance.power_state not in {Appliance.Power.UNKNOWN, Appliance.Power.ORPHANED}:
-                finished += 1
-            if appliance.power_state == Appliance.Power.ON:
-                finished += 1
-            if appliance.ip_address is not None:
-                finished += 1
-            if appliance.ready:
-                finished += 1
-        return float(finished) / float(total)
+        return self.status.percent_finished
 
     @property
     def appliance_ips(self):
-        return [ap.ip_address for ap in filter(lambda a: a.ip_address is not None, self.appliances)]
+        return list(
+            Appliance.objects
+            .filter(appliance_pool=self, ip_address__isnull=False)
+            .order_by('id')
+            .values_list('ip_address', flat=True))
 
     @property
     def fulfilled(self):
         try:
-            return (len(self.appliance_ips) == self.total_count and
-                    all(a.ready for a in self.appliances))
+            return self.status.fulfilled
         except ObjectDoesNotExist:
             return False
 
@@ -1556,13 +1760,9 @@ class AppliancePool(MetadataMixin):
 
     @property
     def num_possible_provisioning_slots(self):
-        providers = set([])
-        for template in self.possible_provisioning_templates:
-            providers.add(template.provider)
-        slots = 0
-        for provider in providers:
-            slots += provider.remaining_provisioning_slots
-        return slots
+        capacity = Provider.capacity_table()
+        providers = set(tpl.provider_id for tpl in self.provisioning_templates(capacity))
+        return sum(capacity[provider].remaining_provisioning_slots for provider in providers)
 
     @property
     def num_possible_appliance_slots(self):
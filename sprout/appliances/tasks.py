@@ -18,6 +18,7 @@ from django.db.models import Q
 from django.utils import timezone
 from celery import chain, chord, shared_task
 from celery.exceptions import MaxRetriesExceededError
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from functools import wraps
 from lxml import etree
@@ -38,13 +39,13 @@ from cfme.utils import conf
 from cfme.utils.appliance import Appliance as CFMEAppliance
 from cfme.utils.path import project_path
 from cfme.utils.timeutil import parsetime
-from cfme.utils.trackerbot import api, depaginate
+from cfme.utils.trackerbot import api, TrackerbotMirror
 from cfme.utils.wait import wait_for
 
 from wrapanapi import VmState, Openshift
+from wrapanapi.exceptions import VMInstanceNotFound
 
 LOCK_EXPIRE = 60 * 15  # 15 minutes
-TRACKERBOT_PAGINATE = 100
 
 
 def gen_appliance_name(template_id, username=None):
@@ -227,7 +228,8 @@ def poke_trackerbot(self):
     template_usability = []
     # Extract data from trackerbot
     tbapi = trackerbot()
-    objects = depaginate(tbapi, tbapi.providertemplate().get(limit=TRACKERBOT_PAGINATE))["objects"]
+    # Only the provider templates changed since the last poke are downloaded
+    objects = TrackerbotMirror(tbapi).refresh(['providertemplate']).objects('providertemplate')
     per_group = {}
     for obj in objects:
         if obj["template"]["group"]["name"] == 'unknown':
@@ -688,11 +690,12 @@ def request_appliance_pool(self, appliance_pool_id, time_minutes):
         "Appliance pool {} requested for {} minutes.".format(appliance_pool_id, time_minutes))
     pool = AppliancePool.objects.get(id=appliance_pool_id)
     n = Appliance.give_to_pool(pool)
+    capacity = Provider.capacity_table()
     for i in range(pool.total_count - n):
-        tpls = pool.possible_provisioning_templates
+        tpls = pool.provisioning_templates(capacity)
         if tpls:
-            template_id = tpls[0].id
-            clone_template_to_pool(template_id, pool.id, time_minutes)
+            clone_template_to_pool(tpls[0].id, pool.id, time_minutes)
+            capacity[tpls[0].provider_id].reserve()
         else:
             with transaction.atomic():
                 task = DelayedProvisionTask(pool=pool, lease_time=time_minutes)
@@ -738,43 +741,75 @@ def apply_lease_times_after_pool_fulfilled(self, appliance_pool_id, time_minutes
 def process_delayed_provision_tasks(self):
     """This picks up the provisioning tasks that were delayed due to ocncurrency limit of provision.
 
-    Goes one task by one and when some of them can be provisioned, it starts the provisioning and
-    then deletes the task.
+    The tasks are processed as a queue, the oldest first, grouped by their pool. A pool first
+    takes what it can get from the shepherd, then its appliances are cloned on the providers
+    with free provisioning slots and the provisioned tasks are deleted. The provider capacity is
+    loaded once and updated as the appliances are started, the templates are loaded once for all
+    the pools with the same filter.
     """
-    for task in DelayedProvisionTask.objects.order_by("id"):
-        if task.pool.not_needed_anymore:
-            task.delete()
+    queue = OrderedDict()
+    for task in DelayedProvisionTask.objects.select_related(
+            'pool', 'provider_to_avoid').order_by("id"):
+        queue.setdefault(task.pool_id, []).append(task)
+    if not queue:
+        return
+    capacity = Provider.capacity_table()
+    pool_templates = {}
+    drained_shepherds = set()
+    freed_providers = set()
+    for tasks in queue.values():
+        pool = tasks[0].pool
+        if pool.not_needed_anymore:
+            DelayedProvisionTask.objects.filter(id__in=[task.id for task in tasks]).delete()
             continue
         # Try retrieve from shepherd
-        appliances_given = Appliance.give_to_pool(task.pool, 1)
-        if appliances_given == 0:
-            # No free appliance in shepherd, so do it on our own
-            tpls = task.pool.possible_provisioning_templates
-            if task.provider_to_avoid is not None:
-                filtered_tpls = filter(lambda tpl: tpl.provider != task.provider_to_avoid, tpls)
+        shepherd_key = (pool.filter_signature, pool.override_cpu, pool.override_memory)
+        if shepherd_key not in drained_shepherds:
+            appliances_given = Appliance.give_to_pool(pool, len(tasks))
+            if appliances_given < len(tasks):
+                drained_shepherds.add(shepherd_key)
+            # We took free appliances from shepherd, so we don't need these tasks anymore
+            DelayedProvisionTask.objects.filter(
+                id__in=[task.id for task in tasks[:appliances_given]]).delete()
+            tasks = tasks[appliances_given:]
+        if not tasks:
+            continue
+        # No free appliance in shepherd, so do it on our own
+        if pool.filter_signature not in pool_templates:
+            pool_templates[pool.filter_signature] = pool.possible_templates
+        templates = pool_templates[pool.filter_signature]
+        for task in tasks:
+            tpls = pool.provisioning_templates(capacity, templates)
+            if task.provider_to_avoid_id is not None:
+                filtered_tpls = [
+                    tpl for tpl in tpls if tpl.provider_id != task.provider_to_avoid_id]
                 if filtered_tpls:
                     # There are other providers to provision on, so try one of them
                     tpls = filtered_tpls
                 # If there is no other provider to provision on, we will use the original list.
                 # This will cause additional rejects until the provider quota is met
             if tpls:
-                clone_template_to_pool(tpls[0].id, task.pool.id, task.lease_time)
+                clone_template_to_pool(tpls[0].id, pool.id, task.lease_time)
+                capacity[tpls[0].provider_id].reserve()
                 task.delete()
-            else:
-                # Try freeing up some space in provider
-                for provider in task.pool.possible_providers:
-                    appliances = provider.free_shepherd_appliances.exclude(
-                        **task.pool.appliance_filter_params)
-                    if appliances:
-                        appl = random.choice(appliances)
-                        self.logger.info(
-                            'Freeing some space in provider by killing appliance {}/{}'
-                            .format(appl.id, appl.name))
-                        Appliance.kill(appl)
-                        break  # Just one
-        else:
-            # There was a free appliance in shepherd, so we took it and we don't need this task more
-            task.delete()
+                continue
+            # Try freeing up some space in provider, one appliance per provider and run
+            providers = {tpl.provider_id: tpl.provider for tpl in templates}
+            for provider_id, provider in sorted(providers.items()):
+                if provider_id in freed_providers:
+                    continue
+                appliances = provider.free_shepherd_appliances.exclude(
+                    **pool.appliance_filter_params)
+                if appliances:
+                    appl = random.choice(appliances)
+                    self.logger.info(
+                        'Freeing some space in provider by killing appliance {}/{}'
+                        .format(appl.id, appl.name))
+                    Appliance.kill(appl)
+                    freed_providers.add(provider_id)
+                    break  # Just one
+            # The other tasks of this pool have to wait for the freed slots too
+            break
 
 
 @logged_task()
@@ -1261,39 +1296,61 @@ def refresh_appliances(self):
         refresh_appliances_provider.delay(provider.id)
 
 
-@singleton_task(soft_time_limit=180)
+@singleton_task(soft_time_limit=Provider.VM_INVENTORY_LOCK_TIME)
 def refresh_appliances_provider(self, provider_id):
     """Downloads the list of VMs from the provider, then matches them by name or UUID with
     appliances stored in database.
+
+    This is the periodic refresh of the VM inventory of the provider, the other tasks and the
+    views read the VMs from the inventory.
     """
     self.logger.info("Refreshing appliances in {}".format(provider_id))
     provider = Provider.objects.get(id=provider_id, working=True, disabled=False)
-    if not hasattr(provider.api, "list_vms"):
+    if not provider.has_vm_inventory:
         # Ignore this provider
         return
-    vms = provider.api.list_vms()
+    inventory, listed_vms = provider.refresh_vm_inventory_with_vms()
+    listed_vms = {getattr(vm, 'name', vm): vm for vm in listed_vms or []}
+
+    def _provider_vm(name):
+        # The IP and the power state are queried per VM, only for the VMs of the appliances
+        vm = listed_vms.get(name)
+        if vm is None:
+            try:
+                vm = provider.api.get_vm(name)
+            except VMInstanceNotFound:
+                # Gone since the VMs were listed, it is orphaned on the next refresh
+                return None
+        return vm
+
     dict_vms = {}
     uuid_vms = {}
-    for vm in vms:
+    for vm in inventory.vms:
         dict_vms[vm.name] = vm
         if vm.uuid:
             uuid_vms[vm.uuid] = vm
     for appliance in Appliance.objects.filter(template__provider=provider):
         if appliance.uuid is not None and appliance.uuid in uuid_vms:
             vm = uuid_vms[appliance.uuid]
+            provider_vm = _provider_vm(vm.name)
+            if provider_vm is None:
+                continue
             # Using the UUID and change the name if it changed
             appliance.name = vm.name
-            appliance.ip_address = vm.ip
+            appliance.ip_address = provider_vm.ip
             appliance.set_power_state(Appliance.POWER_STATES_MAPPING.get(
-                vm.state, Appliance.Power.UNKNOWN))
+                provider_vm.state, Appliance.Power.UNKNOWN))
             appliance.save()
         elif appliance.name in dict_vms:
             vm = dict_vms[appliance.name]
+            provider_vm = _provider_vm(vm.name)
+            if provider_vm is None:
+                continue
             # Using the name, and then retrieve uuid
             appliance.uuid = vm.uuid
-            appliance.ip_address = vm.ip
+            appliance.ip_address = provider_vm.ip
             appliance.set_power_state(Appliance.POWER_STATES_MAPPING.get(
-                vm.state, Appliance.Power.UNKNOWN))
+                provider_vm.state, Appliance.Power.UNKNOWN))
             appliance.save()
             self.logger.info("Retrieved UUID for appliance {}/{}: {}".format(
                 appliance.id, appliance.name, appliance.uuid))
@@ -1390,107 +1447,147 @@ def delete_nonexistent_appliances(self):
         Appliance.kill(appliance, force_delete=True)
 
 
+def _split_shepherd_templates(templates):
+    """Split the templates of a group shepherd to the current and the obsolete ones.
+
+    Downstream groups keep the latest build of the latest version, upstream groups (without
+    versions) keep the latest date.
+    """
+    versions = sorted(
+        {tpl.version for tpl in templates if tpl.version is not None}, key=Version, reverse=True)
+    if versions:
+        version = versions[0]
+        date = max(tpl.date for tpl in templates if tpl.version == version)
+        current = [tpl for tpl in templates if tpl.version == version and tpl.date == date]
+        obsolete = [
+            tpl for tpl in templates
+            if tpl.version is not None and (tpl.version != version or tpl.date != date)]
+    elif templates:
+        date = max(tpl.date for tpl in templates)
+        current = [tpl for tpl in templates if tpl.date == date]
+        obsolete = [tpl for tpl in templates if tpl.date != date]
+    else:
+        current, obsolete = [], []
+    return current, obsolete
+
+
+def plan_shepherd_provisioning(deficits, capacity):
+    """Distribute the missing shepherd appliances among the providers.
+
+    The groups get one appliance per round, the least fulfilled groups first, so the groups are
+    balanced when there are not enough slots for all of them. Each appliance goes to the least
+    loaded provider with a free provisioning slot that has one of the group's templates.
+
+    Args:
+        deficits: List of ``(fulfillment, missing count, templates)`` of the groups.
+        capacity: Result of :py:meth:`Provider.capacity_table`, updated with the planned
+            appliances.
+    Returns:
+        List of the templates to provision an appliance from.
+    """
+    pending = [
+        [missing, templates]
+        for fulfillment, missing, templates in sorted(deficits, key=lambda d: d[0])
+        if missing > 0 and templates]
+    planned = []
+    while pending:
+        for group in list(pending):
+            free_templates = [
+                tpl for tpl in group[1]
+                if tpl.provider_id in capacity and capacity[tpl.provider_id].free]
+            if not free_templates:
+                pending.remove(group)
+                continue
+            template = min(
+                free_templates, key=lambda tpl: capacity[tpl.provider_id].appliance_load)
+            capacity[template.provider_id].reserve()
+            planned.append(template)
+            group[0] -= 1
+            if group[0] <= 0:
+                pending.remove(group)
+    return planned
+
+
 def generic_shepherd(self, preconfigured):
     """This task takes care of having the required templates spinned into required number of
     appliances. For each template group, it keeps the last template's appliances spinned up in
     required quantity. If new template comes out of the door, it automatically kills the older
-    running template's appliances and spins up new ones. Sorts the groups by the fulfillment."""
-    for gs in sorted(
-            GroupShepherd.objects.all(), key=lambda g: g.get_fulfillment_percentage(preconfigured)):
-        prov_filter = {'provider__user_groups': gs.user_group}
-        group_versions = Template.get_versions(
-            template_group=gs.template_group, ready=True, usable=True, preconfigured=preconfigured,
-            **prov_filter)
-        group_dates = Template.get_dates(
-            template_group=gs.template_group, ready=True, usable=True, preconfigured=preconfigured,
-            **prov_filter)
-        if group_versions:
-            # Downstream - by version (downstream releases)
-            version = group_versions[0]
-            # Find the latest date (one version can have new build)
-            dates = Template.get_dates(
-                template_group=gs.template_group, ready=True, usable=True,
-                version=group_versions[0], preconfigured=preconfigured, **prov_filter)
-            if not dates:
-                # No template yet?
-                continue
-            date = dates[0]
-            filter_keep = {"version": version, "date": date}
-            filters_kill = []
-            for kill_date in dates[1:]:
-                filters_kill.append({"version": version, "date": kill_date})
-            for kill_version in group_versions[1:]:
-                filters_kill.append({"version": kill_version})
-        elif group_dates:
-            # Upstream - by date (upstream nightlies)
-            filter_keep = {"date": group_dates[0]}
-            filters_kill = [{"date": v} for v in group_dates[1:]]
-        else:
-            continue  # Ignore this group, no templates detected yet
+    running template's appliances and spins up new ones.
 
-        filter_keep.update(prov_filter)
-        for filt in filters_kill:
-            filt.update(prov_filter)
-        # Keeping current appliances
-        # Retrieve list of all templates for given group
-        # I know joins might be a bit better solution but I'll leave that for later.
-        possible_templates = list(
-            Template.objects.filter(
-                usable=True, ready=True, template_group=gs.template_group,
-                preconfigured=preconfigured, **filter_keep).all())
-        # If it can be deployed, it must exist
-        possible_templates_for_provision = filter(lambda tpl: tpl.exists, possible_templates)
-        appliances = []
-        for template in possible_templates:
-            appliances.extend(
-                Appliance.objects.filter(
-                    template=template, appliance_pool=None, marked_for_deletion=False))
+    The data of all the group shepherds is loaded with a few queries at once and the missing
+    appliances of all groups are provisioned in one pass, see
+    :py:func:`plan_shepherd_provisioning`."""
+    shepherds = list(GroupShepherd.objects.select_related('template_group', 'user_group'))
+    if not shepherds:
+        return
+    template_groups = {gs.template_group_id for gs in shepherds}
+    provider_groups = {}
+    for provider_id, group_id in Provider.user_groups.through.objects.values_list(
+            'provider_id', 'group_id'):
+        provider_groups.setdefault(provider_id, set()).add(group_id)
+    templates = list(
+        Template.objects.filter(
+            ready=True, usable=True, preconfigured=preconfigured,
+            template_group__in=template_groups))
+    appliances_by_template = {}
+    for appliance in Appliance.objects.filter(
+            template__template_group__in=template_groups, template__preconfigured=preconfigured,
+            appliance_pool=None, marked_for_deletion=False).select_related('template'):
+        appliances_by_template.setdefault(appliance.template_id, []).append(appliance)
+
+    deficits = []
+    to_kill = {}
+    for gs in shepherds:
+        visible = {
+            provider_id for provider_id, groups in provider_groups.items()
+            if gs.user_group_id in groups}
+        group_templates = [
+            tpl for tpl in templates
+            if tpl.template_group_id == gs.template_group_id and tpl.provider_id in visible]
+        current, obsolete = _split_shepherd_templates(group_templates)
+        if not current:
+            continue  # Ignore this group, no templates detected yet
+        appliances = [
+            appliance for tpl in current for appliance in appliances_by_template.get(tpl.id, [])]
         # If we then want to delete some templates, better kill the eldest. status_changed
         # says which one was provisioned when, because nothing else then touches that field.
         appliances.sort(key=lambda appliance: appliance.status_changed)
         pool_size = gs.template_pool_size if preconfigured else gs.unconfigured_template_pool_size
-        if len(appliances) < pool_size and possible_templates_for_provision:
-            # There must be some templates in order to run the provisioning
-            # Provision ONE appliance at time for each group, that way it is possible to maintain
-            # reasonable balancing
-            with transaction.atomic():
-                # Now look for templates that are on non-busy providers
-                tpl_free = filter(
-                    lambda t: t.provider.free,
-                    possible_templates_for_provision)
-                if tpl_free:
-                    chosen_template = sorted(tpl_free, key=lambda t: t.provider.appliance_load)[0]
-                    new_appliance_name = gen_appliance_name(chosen_template.id)
-                    appliance = Appliance(
-                        template=chosen_template,
-                        name=new_appliance_name)
-                    appliance.save()
-                    self.logger.info(
-                        "Adding an appliance to shepherd: {}/{}".format(appliance.id,
-                                                                        appliance.name))
-                    clone_template_to_appliance.delay(appliance.id, None)
+        if len(appliances) < pool_size:
+            # If it can be deployed, it must exist
+            fulfillment = float(len(appliances)) / float(pool_size)
+            deficits.append(
+                (fulfillment, pool_size - len(appliances), [tpl for tpl in current if tpl.exists]))
         elif len(appliances) > pool_size:
             # Too many appliances, kill the surplus
             # Only kill those that are visible only for one group. This is necessary so the groups
             # don't "fight"
             for appliance in appliances[:len(appliances) - pool_size]:
-                if appliance.is_visible_only_in_group(gs.user_group):
+                if provider_groups.get(appliance.template.provider_id) == {gs.user_group_id}:
                     self.logger.info("Killing an extra appliance {}/{} in shepherd".format(
                         appliance.id, appliance.name))
-                    Appliance.kill(appliance)
-
+                    to_kill[appliance.id] = appliance
         # Killing old appliances
-        for filter_kill in filters_kill:
-            for template in Template.objects.filter(
-                    ready=True, usable=True, template_group=gs.template_group,
-                    preconfigured=preconfigured, **filter_kill):
+        for template in obsolete:
+            for appliance in appliances_by_template.get(template.id, []):
+                self.logger.info(
+                    "Killing appliance {}/{} in shepherd because it is obsolete now".format(
+                        appliance.id, appliance.name))
+                to_kill[appliance.id] = appliance
 
-                for a in Appliance.objects.filter(
-                        template=template, appliance_pool=None, marked_for_deletion=False):
-                    self.logger.info(
-                        "Killing appliance {}/{} in shepherd because it is obsolete now".format(
-                            a.id, a.name))
-                    Appliance.kill(a)
+    planned = plan_shepherd_provisioning(deficits, Provider.capacity_table())
+    new_appliances = []
+    with transaction.atomic():
+        for template in planned:
+            appliance = Appliance(template=template, name=gen_appliance_name(template.id))
+            appliance.save()
+            new_appliances.append(appliance)
+    for appliance in new_appliances:
+        self.logger.info(
+            "Adding an appliance to shepherd: {}/{}".format(appliance.id, appliance.name))
+        clone_template_to_appliance.delay(appliance.id, None)
+    for appliance in to_kill.values():
+        Appliance.kill(appliance)
 
 
 @singleton_task()
@@ -1989,16 +2086,25 @@ def synchronize_untracked_vms_in_provider(self, provider_id):
     """'re'-synchronizes any vms that might be lost during outages."""
     provider = Provider.objects.get(id=provider_id, working=True, disabled=False)
     provider_api = provider.api
-    if not hasattr(provider_api, 'list_vms'):
+    if not provider.has_vm_inventory:
         # This provider does not have VMs
         return
-    for vm in sorted(provider_api.list_vms()):
-        if (
-            Appliance.objects.filter(name=getattr(vm, 'name', vm),
-                                     template__provider=provider).count() != 0
-        ):
+    tracked = set(
+        Appliance.objects.filter(template__provider=provider).values_list('name', flat=True))
+    for vm_name in sorted(vm.name for vm in provider.vm_inventory().vms):
+        if vm_name in tracked:
             continue
         # We have an untracked VM. Let's investigate
+        try:
+            vm = provider_api.get_vm(vm_name)
+        except VMInstanceNotFound:
+            # The VM is gone since the inventory was listed
+            continue
+        except Exception as e:
+            # Eg. more VMs of the same name or an API error, the other VMs can still be checked
+            self.logger.error('Could not look up the untracked VM %s', vm_name)
+            self.logger.exception(e)
+            continue
         try:
             appliance_id = vm.get_meta_value('sprout_id')
         except KeyError:
@@ -755,8 +755,13 @@ def vms_table(request, current_provider=None):
     if not request.user.is_authenticated() or not request.user.is_superuser:
         return go_home(request)
     try:
-        manager = get_mgmt(current_provider)
-        vms = sorted([vm.name for vm in manager.list_vms()])
+        provider = Provider.objects.get(id=current_provider)
+        if request.GET.get('refresh'):
+            inventory = provider.refresh_vm_inventory()
+        else:
+            inventory = provider.vm_inventory()
+        vms = sorted(vm.name for vm in inventory.vms)
+        fetched = inventory.fetched
         return render(request, 'appliances/vms/_list.html', locals())
     except Exception as e:
         return HttpResponse('{}: {}'.format(type(e).__name__, str(e)), content_type="text/plain")
@@ -28,7 +28,7 @@ PIDFILE_FLOWER="./.sprout.flower.pid"
 PIDFILE_LOGSERVER="./.sprout.logserver.pid"
 LOGFILE="./sprout-manager.log"
 UPDATE_LOG="./update.log"
-GUNICORN_CMD="gunicorn --bind 127.0.0.1:${DJANGO_PORT:-8000} -w ${GUNICORN_WORKERS:-4} --access-logfile access.log --error-logfile error.log sprout.wsgi:application"
+GUNICORN_CMD="gunicorn --bind 127.0.0.1:${DJANGO_PORT:-8000} -w ${GUNICORN_WORKERS:-4} -k gthread --threads ${GUNICORN_THREADS:-16} --access-logfile access.log --error-logfile error.log sprout.wsgi:application"
 MEMCACHED_CMD="memcached -l 127.0.0.1 -p ${MEMCACHED_PORT:-23156}"
 WORKER_CMD="./celery_runner worker --app=sprout.celery:app --concurrency=${CELERY_MAX_WORKERS:-8} --loglevel=INFO -Ofair"
 BEAT_CMD="./celery_runner beat --app=sprout.celery:app"
@@ -5,13 +5,14 @@ import math
 import os
 import re
 from collections import namedtuple
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from tempfile import NamedTemporaryFile
 
 import six
 from cached_property import cached_property
 from jsmin import jsmin
-from lxml.html import document_fromstring
+from lxml.html import document_fromstring, fragment_fromstring
 from selenium.common.exceptions import WebDriverException
 from wait_for import TimedOutError, wait_for
 from widgetastic.exceptions import NoSuchElementException, WidgetOperationFailed
@@ -69,6 +70,84 @@ class DynamicTableAddError(Exception):
 # TODO: replace below calls with direct calls later
 ManageIQTree = BootstrapTreeview
 
+# Marks the line breaks in the parsed snapshots, see snapshot_text
+_LINE_BREAK = u"\ue000"
+_BLOCK_TAGS = ("br", "div", "p", "li", "tr", "h1", "h2", "h3", "h4", "table", "ul", "ol")
+
+
+def parse_snapshot(html):
+    """Parses the HTML of a snapshot and marks the places where the browser breaks the lines."""
+    tree = fragment_fromstring(html)
+    for element in tree.iter(*_BLOCK_TAGS):
+        if element.tag != "br":
+            element.text = _LINE_BREAK + (element.text or u"")
+        element.tail = _LINE_BREAK + (element.tail or u"")
+    return tree
+
+
+def snapshot_text(element):
+    """Text of an element of a parsed snapshot, lines with normalized whitespace.
+
+    Approximates the text selenium returns, except that the text of hidden elements is included.
+    """
+    lines = (u" ".join(line.split()) for line in element.text_content().split(_LINE_BREAK))
+    return u"\n".join(line for line in lines if line)
+
+
+def snapshot_normalized_text(element):
+    """Text of an element of a parsed snapshot like the XPath ``normalize-space(.)``."""
+    return u" ".join(element.text_content().replace(_LINE_BREAK, u" ").split())
+
+
+class SnapshotMixin(object):
+    """Opt-in reading of a widget from a single fetch of its HTML.
+
+    Inside ``with widget.snapshot():``, the first read fetches the HTML of the widget with one
+    script call and all reads in the block are answered from it, parsed locally with lxml. That
+    saves a WebDriver round trip for each element of the widget. The page must not change within
+    the block, the snapshot is dropped when the block ends or the widget is clicked.
+
+    .. code-block:: python
+
+        with view.entities.summary("Properties").snapshot() as properties:
+            assert properties.get_text_of("Name") == name
+            assert properties.get_text_of("Type") == vm_type
+
+    Classes using the mixin set ``SNAPSHOT_SCRIPT`` returning the HTML of (a parent of) the widget
+    element and override :py:meth:`snapshot_root` when it is not the widget element itself.
+    """
+
+    SNAPSHOT_SCRIPT = "return arguments[0].outerHTML;"
+    _snapshot_depth = 0
+    _snapshot_element = None
+
+    @contextmanager
+    def snapshot(self):
+        self._snapshot_depth += 1
+        try:
+            yield self
+        finally:
+            self._snapshot_depth -= 1
+            if not self._snapshot_depth:
+                self.drop_snapshot()
+
+    def drop_snapshot(self):
+        self._snapshot_element = None
+
+    def snapshot_root(self, tree):
+        """Returns the element of the widget in the parsed snapshot."""
+        return tree
+
+    @property
+    def snapshot_element(self):
+        """The widget element in the snapshot, ``None`` when not reading from a snapshot."""
+        if not self._snapshot_depth:
+            return None
+        if self._snapshot_element is None:
+            html = self.browser.execute_script(self.SNAPSHOT_SCRIPT, self.__element__())
+            self._snapshot_element = self.snapshot_root(parse_snapshot(html))
+        return self._snapshot_element
+
 
 class SummaryFormItem(Widget):
     """The UI item that shows the values for objects that are NOT VMs, Providers and such ones."""
@@ -111,9 +190,11 @@ class SummaryFormItem(Widget):
         return text
 
 
-class SummaryForm(Widget):
+class SummaryForm(SnapshotMixin, Widget):
     """Represents a group of SummaryFormItem widgets.
 
+    Supports reading from a snapshot, see :py:class:`SnapshotMixin`.
+
     Args:
         group_title (str): title of a summary form, e.g. "Basic Information"
     """
@@ -121,14 +202,25 @@ class SummaryForm(Widget):
     ROOT = ParametrizedLocator(".//h3[normalize-space(.)={@group_title|quote}]")
     ALL_LABELS = "./following-sibling::div//label"
     LABEL_TEXT = "./following-sibling::div//label[normalize-space(.)={}]/following-sibling::div"
+    # The items are siblings of the title
+    SNAPSHOT_SCRIPT = "return arguments[0].parentNode.outerHTML;"
 
     def __init__(self, parent, group_title, logger=None):
         Widget.__init__(self, parent, logger=logger)
         self.group_title = group_title
 
+    def snapshot_root(self, tree):
+        for title in tree.xpath("./h3"):
+            if snapshot_normalized_text(title) == self.group_title:
+                return title
+        raise NoSuchElementException("Summary form {!r} not found".format(self.group_title))
+
     @property
     def items(self):
         """Returns a list of the items names."""
+        root = self.snapshot_element
+        if root is not None:
+            return [snapshot_text(el) for el in root.xpath(self.ALL_LABELS)]
         b = self.browser
         return [b.text(el) for el in b.elements(self.ALL_LABELS)]
 
@@ -141,8 +233,15 @@ class SummaryForm(Widget):
         Args:
             item_name: Name of the item
         """
+        self.drop_snapshot()
         return self.browser.click(self.get_item(item_name))
 
+    def _snapshot_text_of(self, root, item_name):
+        for label in root.xpath(self.ALL_LABELS):
+            if snapshot_normalized_text(label) == item_name:
+                return snapshot_text(label.xpath("./following-sibling::div")[0])
+        raise NoSuchElementException("Item {!r} not found".format(item_name))
+
     def get_text_of(self, item_name):
         """Returns the text of the item with this name.
 
@@ -153,8 +252,12 @@ class SummaryForm(Widget):
             :py:class:`str` or
             :py:class:`list` in case a few values present for 1 field(covers multiple tags)
         """
-
-        multiple_lines = self.get_item(item_name).text.splitlines()
+        root = self.snapshot_element
+        if root is not None:
+            text = self._snapshot_text_of(root, item_name)
+        else:
+            text = self.get_item(item_name).text
+        multiple_lines = text.splitlines()
         if len(multiple_lines) > 1:
             return multiple_lines
         else:
@@ -416,7 +519,63 @@ class TableRow(VanillaTableRow):
     Column = TableColumn
 
 
-class Table(VanillaTable):
+class ParsedTableRow(object):
+    """A row of the table read from its parsed HTML, see :py:meth:`Table.parse`.
+
+    The cells are accessed like in :py:class:`TableRow`, by position, header or attributized
+    header, but they are already read texts. Use :py:attr:`row` for clicking.
+
+    Args:
+        table: The parsed :py:class:`Table`
+        index: Position of the row, starting at 0 like ``table[index]``
+        headers: Texts of the headers, ``None`` for the empty ones
+        cells: Texts of the cells
+    """
+
+    def __init__(self, table, index, headers, cells):
+        self.table = table
+        self.index = index
+        self.headers = headers
+        self.cells = cells
+
+    def _cell_position(self, column):
+        if isinstance(column, int):
+            return column
+        if column in self.headers:
+            return self.headers.index(column)
+        attributized = [attributize_string(header) if header else None for header in self.headers]
+        if column in attributized:
+            return attributized.index(column)
+        raise KeyError("Column {!r} not found in the table".format(column))
+
+    def __getitem__(self, column):
+        return self.cells[self._cell_position(column)]
+
+    def __getattr__(self, column):
+        if column.startswith("_"):
+            raise AttributeError(column)
+        try:
+            return self[column]
+        except (KeyError, IndexError):
+            raise AttributeError("Column {!r} not found in the table".format(column))
+
+    def __iter__(self):
+        return iter(zip(self.headers, self.cells))
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def row(self):
+        """The live row, for clicking and other interaction"""
+        # the table maps the position to the row element, also when the header is in the body
+        return self.table[self.index]
+
+    def read(self):
+        return {header: cell for header, cell in self if header is not None}
+
+
+class Table(SnapshotMixin, VanillaTable):
     CHECKBOX_ALL = "|".join(
         [
             './thead/tr/th[1]/input[contains(@class, "checkall")]',
@@ -444,6 +603,26 @@ class Table(VanillaTable):
     SORT_LINK = VersionPick({Version.lowest(): "./thead/tr/th[{}]/a", "5.9": "./thead/tr/th[{}]"})
     Row = TableRow
 
+    def parse(self):
+        """Reads all rows of the table from a single fetch of its HTML, parsed locally with lxml.
+
+        Much faster than reading the rows through :py:meth:`rows` for large tables, where each row
+        and cell costs a WebDriver round trip. Uses the snapshot when in a ``snapshot()`` block.
+
+        Returns:
+            A list of :py:class:`ParsedTableRow`
+        """
+        root = self.snapshot_element
+        if root is None:
+            root = parse_snapshot(
+                self.browser.execute_script(self.SNAPSHOT_SCRIPT, self.__element__()))
+        headers = [snapshot_normalized_text(header) or None for header in root.xpath(self.HEADERS)]
+        return [
+            ParsedTableRow(
+                self, index, headers, tuple(snapshot_text(cell) for cell in row.xpath("./td")))
+            for index, row in enumerate(root.xpath(self.ROWS))
+        ]
+
     @property
     def checkbox_all(self):
         try:
@@ -525,9 +704,11 @@ class Table(VanillaTable):
             self.logger.debug("sort_by(%r, %r): order already selected", column, order)
 
 
-class SummaryTable(VanillaTable):
+class SummaryTable(SnapshotMixin, VanillaTable):
     """Table used in Provider, VM, Host, ... summaries.
 
+    The fields can be read from a snapshot, see :py:class:`SnapshotMixin`.
+
     Todo:
         * Make it work properly with rowspan (that is for the My Company Tags).
 
@@ -541,9 +722,17 @@ class SummaryTable(VanillaTable):
     def __init__(self, parent, title, *args, **kwargs):
         VanillaTable.__init__(self, parent, self.BASELOC.format(quote(title)), *args, **kwargs)
 
+    def _snapshot_rows(self, root):
+        return [row.xpath("./td") for row in root.xpath("./tbody/tr[./td]")]
+
     @property
     def fields(self):
         """Returns a list of the field names in the table (the left column)."""
+        root = self.snapshot_element
+        if root is not None:
+            return [
+                snapshot_text(cells[0]) for cells in self._snapshot_rows(root)
+                if cells[0].get("class")]
         fields_names = []
         for field in self:
             if self.browser.get_attribute("class", field[0]):
@@ -582,6 +771,28 @@ class SummaryTable(VanillaTable):
             )
             return multiple_fields
 
+    def _snapshot_text_of(self, root, field_name):
+        for cells in self._snapshot_rows(root):
+            if snapshot_normalized_text(cells[0]) == field_name:
+                break
+        else:
+            raise NameError("Could not find field with name {!r}".format(field_name))
+        if not cells[0].get("rowspan"):
+            return snapshot_text(cells[1])
+        rowspan_path = "./tbody//td[contains(text(), {})]/following-sibling::td".format(
+            quote(field_name)
+        )
+        image = root.xpath("{}/*[self::i or self::img]".format(rowspan_path))[0]
+        rowspan_child_class = image.get("class") or image.get("alt")
+        return [
+            snapshot_text(cell)
+            for cell in root.xpath(
+                "./tbody//*[self::i or self::img][contains(@class|@alt, {})]/parent::td".format(
+                    quote(rowspan_child_class)
+                )
+            )
+        ]
+
     def get_text_of(self, field_name):
         """Returns the text of the field with this name.
 
@@ -591,6 +802,9 @@ class SummaryTable(VanillaTable):
         Returns:
             :py:class:`str`
         """
+        root = self.snapshot_element
+        if root is not None:
+            return self._snapshot_text_of(root, field_name)
         fields = self.get_field(field_name)
         if isinstance(fields, (list, tuple)):
             return [field.text for field in fields]
@@ -623,6 +837,7 @@ class SummaryTable(VanillaTable):
         Args:
             field_name: Name of the field (left column)
         """
+        self.drop_snapshot()
         return self.get_field(field_name)[1].click()
 
     def read(self):
@@ -640,6 +855,10 @@ class NestedSummaryTable(SummaryTable):
         for row_pos in range(1, len(self.browser.elements(self.ROWS, parent=self))):
             yield self.Row(self, row_pos)
 
+    def _snapshot_rows(self, root):
+        # The first row holds the headers
+        return SummaryTable._snapshot_rows(self, root)[1:]
+
     def read(self):
         return [{key: col.text for key, col in row} for row in self]
 
@@ -666,6 +885,9 @@ class ParametrizedSummaryTable(ParametrizedView):
     def get_img_of(self, field_name):
         return self._table.get_img_of(field_name)
 
+    def snapshot(self):
+        return self._table.snapshot()
+
     def click_at(self, field_name):
         return self._table.click_at(field_name)
 
@@ -1509,17 +1731,36 @@ class ReportDataControllerMixin(object):
     """
 
     def _invoke_cmd(self, cmd, data=None):
-        raw_data = {"controller": "reportDataController", "action": cmd}
-        if data:
-            raw_data["data"] = [data]
-        json_data = json.dumps(raw_data)
-        js_cmd = "sendDataWithRx({data}); return ManageIQ.qe.gtl.result".format(data=json_data)
-        self.logger.info("executed command: {cmd}".format(cmd=js_cmd))
+        return self._invoke_cmds((cmd, data))[0]
+
+    def _invoke_cmds(self, *commands):
+        """Sends several commands in a single script, waiting for the page only before and after
+
+        Args:
+            commands: Command names or ``(command, data)`` tuples, sent in the given order.
+                Commands loading another page (f.e. ``next_page``) should go last, the commands
+                sent after them would still see the old page.
+
+        Returns:
+            List of the results of the commands
+        """
+        raw_commands = []
+        for command in commands:
+            cmd, data = (command, None) if isinstance(command, six.string_types) else command
+            raw_data = {"controller": "reportDataController", "action": cmd}
+            if data:
+                raw_data["data"] = [data]
+            raw_commands.append(raw_data)
         # command result is always stored in this global variable
+        js_cmd = (
+            "return {commands}.map(function(command) {{ "
+            "sendDataWithRx(command); return ManageIQ.qe.gtl.result; }})"
+        ).format(commands=json.dumps(raw_commands))
+        self.logger.info("executed command: {cmd}".format(cmd=js_cmd))
         self.browser.plugin.ensure_page_safe()
-        result = self.browser.execute_script(js_cmd)
+        results = self.browser.execute_script(js_cmd)
         self.browser.plugin.ensure_page_safe()
-        return result
+        return results
 
     def _call_item_method(self, method):
         raw_data = {
@@ -1557,6 +1798,9 @@ class ReportDataControllerMixin(object):
             return None
 
 
+PaginationState = namedtuple("PaginationState", ["cur_page", "pages_amount"])
+
+
 class PaginationPane(View, ReportDataControllerMixin):
     """ Represents Paginator Pane with js api provided by ManageIQ.
 
@@ -1607,6 +1851,17 @@ class PaginationPane(View, ReportDataControllerMixin):
         # this js call returns None from time to time. this is workaround until it is fixed in js
         return wait_for(self._invoke_cmd, ["get_pages_amount"], num_sec=10, fail_condition=None)[0]
 
+    def _read_state(self, *commands):
+        """Reads the state together with the results of ``commands`` in one script
+
+        Returns:
+            ``(state, results)``, ``None`` when the amount of pages is not known yet
+        """
+        results = self._invoke_cmds("get_current_page", "get_pages_amount", *commands)
+        if results[1] is None:
+            return None
+        return PaginationState(results[0], results[1]), results[2:]
+
     def next_page(self):
         self._invoke_cmd("next_page")
 
@@ -1626,25 +1881,48 @@ class PaginationPane(View, ReportDataControllerMixin):
     def items_amount(self):
         return self._invoke_cmd("pagination_range")["total"]
 
+    def _pages(self, *commands):
+        """Iterates over the pages reading the state and the results of ``commands`` in one script
+
+        Yields:
+            ``(state, results)`` on every page
+        """
+        if not self.exists:
+            return
+        state, results = wait_for(self._read_state, commands, num_sec=10, fail_condition=None)[0]
+        # start iterating at the first page
+        if state.cur_page != 1:
+            self.logger.debug("Resetting paginator to first page")
+            self.first_page()
+            state, results = wait_for(
+                self._read_state, commands, num_sec=10, fail_condition=None)[0]
+
+        for _ in range(state.pages_amount):
+            yield state, results
+            if state.cur_page >= state.pages_amount:
+                # last or only page, stop looping
+                break
+            self.logger.debug("Paginator advancing to next page")
+            self.next_page()
+            state, results = wait_for(
+                self._read_state, commands, num_sec=10, fail_condition=None)[0]
+
     def pages(self):
         """Generator to iterate over pages, yielding after moving to the next page"""
-        if self.exists:
-            # start iterating at the first page
-            if self.cur_page != 1:
-                self.logger.debug("Resetting paginator to first page")
-                self.first_page()
-
-            # Adding 1 to pages_amount to include the last page in loop
-            for page in range(1, self.pages_amount + 1):
-                yield self.cur_page
-                if self.cur_page == self.pages_amount:
-                    # last or only page, stop looping
-                    break
-                else:
-                    self.logger.debug("Paginator advancing to next page")
-                    self.next_page()
-        else:
-            return
+        for state, _ in self._pages():
+            yield state.cur_page
+
+    def collect(self, cmd="get_all_items"):
+        """Sends the command on every page, returns the concatenated results of all pages
+
+        The command is sent together with reading the state of the paginator, so with the default
+        command the items of all pages are read in two scripts per page, the other one advancing to
+        the next page.
+        """
+        collected = []
+        for _, results in self._pages(cmd):
+            collected.extend(results[0] or [])
+        return collected
 
     @property
     def min_item(self):
@@ -2850,17 +3128,32 @@ class EntitiesConditionalView(View, ReportDataControllerMixin):
                 el_name = br.get_attribute("title", el)
                 elements.append({"name": el_name, "entity_id": el_id})
         else:
-            entities = self._invoke_cmd("get_all_items")
-            for entity in entities:
-                try:
-                    name = entity["item"]["cells"]["Name"]
-                except KeyError:
-                    # Floating Ip view has an issue. it doesn't have Name though it should
-                    name = entity["item"]["cells"]["Instance name"]
+            elements = self._elements_of(self._invoke_cmd("get_all_items"))
+        return elements
 
-                elements.append({"name": name, "entity_id": entity["item"]["id"]})
+    @staticmethod
+    def _elements_of(entities):
+        elements = []
+        for entity in entities:
+            try:
+                name = entity["item"]["cells"]["Name"]
+            except KeyError:
+                # Floating Ip view has an issue. it doesn't have Name though it should
+                name = entity["item"]["cells"]["Instance name"]
+
+            elements.append({"name": name, "entity_id": entity["item"]["id"]})
         return elements
 
+    @property
+    def _all_pages_elements(self):
+        if self.browser.product_version < "5.9":
+            elements = []
+            for _ in self.paginator.pages():
+                elements.extend(self._current_page_elements)
+            return elements
+        # the items are read together with the paginator state, page by page
+        return self._elements_of(self.paginator.collect())
+
     @property
     def entity_ids(self):
         return [el["entity_id"] for el in self._current_page_elements]
@@ -2952,17 +3245,10 @@ class EntitiesConditionalView(View, ReportDataControllerMixin):
                 for el in self._current_page_elements
             ]
         else:
-            entities = []
-            for _ in self.paginator.pages():
-                entities.extend(
-                    [
-                        self.parent.entity_class(
-                            parent=self, entity_id=el["entity_id"], name=el["name"]
-                        )
-                        for el in self._current_page_elements
-                    ]
-                )
-            return entities
+            return [
+                self.parent.entity_class(parent=self, entity_id=el["entity_id"], name=el["name"])
+                for el in self._all_pages_elements
+            ]
 
     def get_entity(self, surf_pages=False, use_search=False, **keys):
         """ obtains one entity matched to by_name and stops on that page
@@ -3084,16 +3370,19 @@ class BaseEntitiesView(View):
                     el_name = row.name.text if getattr(row, "name", None) else ""
                     elements.append({"name": el_name, "entity_id": el_id})
             else:
-                entities = self._invoke_cmd("get_all_items")
-                for entity in entities:
-                    elements.append(
-                        {
-                            "name": entity["item"]["cells"].get("Name", None),
-                            "entity_id": entity["item"]["id"],
-                        }
-                    )
+                elements = self._elements_of(self._invoke_cmd("get_all_items"))
             return elements
 
+        @staticmethod
+        def _elements_of(entities):
+            return [
+                {
+                    "name": entity["item"]["cells"].get("Name", None),
+                    "entity_id": entity["item"]["id"],
+                }
+                for entity in entities
+            ]
+
     @entities.register("Tile View")
     class TileView(EntitiesConditionalView):
         pass